@@ -2,6 +2,7 @@
 
 from enum import Enum
 import importlib
+import sys
 import numpy as np
 import traceback
 from datetime import datetime
@@ -236,7 +237,9 @@ def synchronized(timeout=5):
         @wraps(func)
         def wrapper(self, *args, **kwargs):
             # self.print(f'Acquiring lock for {func.__name__}', flag=PRINT.DEBUG)
-            with self.lock.acquire_timeout(timeout=timeout, timeoutMessage=f'Cannot acquire lock for {func.__name__} Stack: {"".join(traceback.format_stack()[:-1])}') as lock_acquired:
+            caller = sys._getframe(1) # pylint: disable = protected-access # stack is only formatted in case of a timeout
+            with self.lock.acquire_timeout(timeout=timeout, timeoutMessage=lambda: f'Cannot acquire lock for {func.__name__} Stack: {"".join(traceback.format_stack(caller))}',
+                                           label=func.__qualname__) as lock_acquired:
                 if lock_acquired:
                     # self.print(f'Lock acquired for {func.__name__}', flag=PRINT.DEBUG)
                     result = func(self, *args, **kwargs)
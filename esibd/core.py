@@ -7,11 +7,18 @@ import re
 import sys
 import traceback
 import subprocess
+import tempfile
+import weakref
+import heapq
+import asyncio
+import io
 from threading import Timer, Thread, current_thread, main_thread
 import threading
 import time
 from typing import Any, List
 from contextlib import contextmanager
+from queue import SimpleQueue
+from collections import deque
 from pathlib import Path
 from datetime import datetime
 from enum import Enum
@@ -191,6 +198,12 @@ class PluginManager():
         self._loading = 0
         self.finalizing = False
         self.closing = False
+        self.acquisitionScheduler = AcquisitionScheduler()
+        self.lockProfiler = lockProfiler
+        self.backpressure = BackpressureController(pluginManager=self)
+        self.deviceInitializer = DeviceInitializer(pluginManager=self)
+        self.widgetRefresh = WidgetRefreshCoordinator()
+        self.serialTransport = SerialTransport()
         self.qm = QMessageBox(QMessageBox.Icon.Information, 'Warning!', 'v!', buttons=QMessageBox.StandardButton.Ok)
 
     @property
@@ -431,6 +444,17 @@ class PluginManager():
     def showThreads(self):
         self.Text.setText('\n'.join([thread.name for thread in threading.enumerate()]), True)
 
+    def showLockProfile(self):
+        self.Text.setText(lockProfiler.report(), True)
+
+    def showAcquisitionJitter(self):
+        timers = []
+        for device in self.DeviceManager.getDevices():
+            timers.append(device.dataTimer)
+            controllers = [device.controller] if device.controller is not None else [channel.controller for channel in device.getChannels()]
+            timers.extend([controller.acquisitionTimer for controller in controllers if controller is not None])
+        self.Text.setText('\n'.join([self.acquisitionScheduler.report(), self.backpressure.report(), self.widgetRefresh.report()] + [timer.report() for timer in timers if timer is not None]), True)
+
     def managePlugins(self):
         """A dialog to select which plugins should be enabled."""
         if self.DeviceManager.recording:
@@ -530,6 +554,10 @@ class PluginManager():
             self.loadPlugins(reload=True) # restore fails if plugins have been added or removed
             self.loading = False
         else:
+            self.acquisitionScheduler.shutdown()
+            self.serialTransport.shutdown()
+            self.deviceInitializer.shutdown()
+            self.widgetRefresh.stop()
             self.logger.close()
 
     def finalizeUiState(self):
@@ -819,15 +847,76 @@ class CloseDialog(QDialog):
         self.setLayout(self.layout)
         buttonBox.button(QDialogButtonBox.StandardButton.Cancel).setFocus()
 
+class StorageCodec():
+    """Encodes values to store them using a compact data type and decodes them for plotting and export."""
+
+    FLOAT32 = 'float32'
+    FLOAT16 = 'float16'
+    INT16 = 'int16'
+    INT32 = 'int32'
+    LOG10 = 'log10 float16'
+    DTYPES = {FLOAT32 : np.float32, FLOAT16 : np.float16, INT16 : np.int16, INT32 : np.int32, LOG10 : np.float16}
+
+    def __init__(self, codec=FLOAT32, resolution=1):
+        """
+        :param codec: One of FLOAT32, FLOAT16, INT16, INT32, or LOG10, defaults to FLOAT32
+        :type codec: str, optional
+        :param resolution: Value of smallest increment for INT16 and INT32, defaults to 1
+        :type resolution: float, optional
+        """
+        self.codec = codec
+        self.resolution = resolution
+        self.dtype = self.DTYPES[codec]
+        self.scaled = codec in [self.INT16, self.INT32]
+        if self.scaled:
+            self.nan = np.iinfo(self.dtype).min # reserved to represent np.nan
+            self.limit = np.iinfo(self.dtype).max # larger values will be clipped
+
+    @property
+    def itemsize(self):
+        return np.dtype(self.dtype).itemsize
+
+    def __eq__(self, other):
+        return isinstance(other, StorageCodec) and self.codec == other.codec and (not self.scaled or self.resolution == other.resolution)
+
+    def __hash__(self):
+        return hash((self.codec, self.resolution if self.scaled else None)) # consistent with __eq__
+
+    def encode(self, x):
+        if self.scaled:
+            x = np.asarray(x, dtype=np.float64) / self.resolution
+            return np.where(np.isnan(x), self.nan, np.clip(np.round(np.nan_to_num(x)), -self.limit, self.limit)).astype(self.dtype)
+        if self.codec == self.LOG10:
+            x = np.asarray(x, dtype=np.float64)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.log10(np.where(x > 0, x, np.nan)).astype(self.dtype) # only positive values can be represented
+        return np.asarray(x, dtype=self.dtype)
+
+    def decode(self, x):
+        if self.scaled:
+            return np.where(x == self.nan, np.nan, x*self.resolution).astype(np.float32)
+        if self.codec == self.LOG10:
+            return np.power(10, x.astype(np.float32))
+        return x.astype(np.float32, copy=False)
+
 class DynamicNp():
     """ A numpy.array that dynamically increases its size in increments to prevent frequent memory allocation while growing."""
     # based on https://stackoverflow.com/questions/7133885/fastest-way-to-grow-a-numpy-numeric-array
-    def __init__(self, initialData=None, max_size=None, dtype=np.float32):
+
+    codec = None
+    """Optional :class:`~esibd.core.StorageCodec` used to store data in a compact data type. Data is decoded by :meth:`~esibd.core.DynamicNp.get`."""
+
+    def __init__(self, initialData=None, max_size=None, dtype=np.float32, codec=None):
         # use float64 for time data
+        self.codec = codec
         self.init(initialData, max_size, dtype)
 
     def init(self, initialData=None, max_size=None, dtype=np.float32):
-        self.data = np.zeros((2000,), dtype=dtype) if initialData is None or initialData.shape[0] == 0 else initialData
+        if self.codec is not None:
+            dtype = self.codec.dtype
+            if initialData is not None:
+                initialData = self.codec.encode(initialData)
+        self.data = np.zeros((2000,), dtype=dtype) if initialData is None or initialData.shape[0] == 0 else initialData.astype(dtype, copy=False)
         self.capacity = self.data.shape[0]
         self.size = 0 if initialData is None else initialData.shape[0]
         self.max_size = max_size
@@ -846,14 +935,11 @@ class DynamicNp():
                 # pad data with NaN to ensure new data is aligned with time axis
                 pad = np.zeros(lenT-self.size)
                 pad[:] = np.nan
-                self.init(np.hstack([self.get(), pad]), max_size=self.max_size) # append padding after existing data to account for time without data collection
+                self.init(np.hstack([self.get(), pad]), max_size=self.max_size, dtype=self.data.dtype) # append padding after existing data to account for time without data collection
             if self.size > lenT:
-                self.init(self.get()[-lenT:], max_size=self.max_size) # remove data older than time axis
+                self.init(self.get()[-lenT:], max_size=self.max_size, dtype=self.data.dtype) # remove data older than time axis
         if self.size == self.capacity:
-            self.capacity *= 4
-            newData = np.zeros((self.capacity,))
-            newData[:self.size] = self.data
-            self.data = newData
+            self.grow()
         if self.max_size is not None and self.size >= self.max_size:
             # Tested performance via console using
             # a = [EsibdCore.DynamicNp(initialData=np.ones(500000), max_size=90) for _ in range(1000)]
@@ -861,15 +947,22 @@ class DynamicNp():
             # timeit.timeit('[d.add(1) for d in a]', number=1, globals=globals())
             # resulting time 2.5 s -> negligible for all relevant use cases
             # thin out old data. use only every second value for first half of array to limit RAM use
-            a, b = np.array_split(self.get(), 2) # split array in two halves # pylint: disable=[unbalanced-tuple-unpacking] # balance not relevant, as long as it is consistent
+            a, b = np.array_split(self.data[:self.size], 2) # split array in two halves # pylint: disable=[unbalanced-tuple-unpacking] # balance not relevant, as long as it is consistent
             self.size = a[1::2].shape[0]+b.shape[0] # only thin out older half, take every second item (starting with the second one to avoid keeping the first for every!)
             self.data[:self.size] = np.hstack([a[1::2], b]) # recombine
             # remove old data as new data is coming in. while this implementation is simpler it limits the length of stored history
             # self.data = np.roll(self.data,-1)
             # self.data[self.size-1] = x
-        self.data[self.size] = x
+        self.data[self.size] = x if self.codec is None else self.codec.encode(x)
         self.size += 1
 
+    def grow(self):
+        """Increases the capacity by a factor of 4."""
+        self.capacity *= 4
+        newData = np.zeros((self.capacity,), dtype=self.data.dtype) # keep dtype
+        newData[:self.size] = self.data
+        self.data = newData
+
     def get(self, length=None, _min=None, _max=None, n=1):
         """Returns actual values.
 
@@ -897,14 +990,670 @@ class DynamicNp():
         # simple and works but causes slow update when n is large
         # display update can be jumpy when large n is combined with short time period. This is very rare and can be avoided by slightly higher number of points
         if _min is not None and _max is not None:
-            return self.data[_min:_max][::n]
-        if _min is not None:
-            return self.data[_min-np.remainder(_min, n):self.size][::n]
-        return self.data[:self.size][::n] # returns everything
+            data = self.data[_min:_max][::n]
+        elif _min is not None:
+            data = self.data[_min-np.remainder(_min, n):self.size][::n]
+        else:
+            data = self.data[:self.size][::n] # returns everything
+        return data if self.codec is None else self.codec.decode(data)
         # Solution C
         # pyqtgraph has build in down sampling, however in automatic mode it does not save as much performance.
         # if n is increased to get similar performance than the code above, the curves are flickering as the displayed points can change (roll) while new data comes in.
 
+class MemoryMappedNp(DynamicNp):
+    """A :class:`~esibd.core.DynamicNp` that stores data in a memory mapped temporary file instead of RAM.
+    The operating system keeps recently used data in memory and moves older data to disk as needed,
+    which allows to keep long histories at full resolution. :meth:`~esibd.core.DynamicNp.get` returns views of the mapped file.
+    The file is deleted automatically when it is no longer used."""
+
+    def __init__(self, initialData=None, max_size=None, dtype=np.float32, codec=None, path=None):
+        """
+        :param path: Directory used for the temporary file, defaults to None (system temp directory)
+        :type path: pathlib.Path, optional
+        """
+        self.path = path
+        super().__init__(initialData=initialData, max_size=max_size, dtype=dtype, codec=codec)
+
+    def init(self, initialData=None, max_size=None, dtype=np.float32):
+        if self.codec is not None:
+            dtype = self.codec.dtype
+            if initialData is not None:
+                initialData = self.codec.encode(initialData)
+        if initialData is not None:
+            initialData = np.array(initialData, dtype=dtype) # copy, initialData may be a view of the file that is about to be replaced
+        self.dtype = dtype
+        self.max_size = max_size
+        self.size = 0 if initialData is None else initialData.shape[0]
+        self.capacity = max(2000, self.size)
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+        self.file = tempfile.TemporaryFile(dir=self.path, suffix='.dat') # pylint: disable = consider-using-with # needs to stay open as long as data is used
+        self.data = np.memmap(self.file, dtype=self.dtype, mode='w+', shape=(self.capacity,))
+        if self.size > 0:
+            self.data[:self.size] = initialData
+
+    def add(self, x, lenT=None):
+        if lenT is not None and self.size != lenT:
+            # pad or trim in place, keep dtype of time
+            if self.size < lenT:
+                pad = np.zeros(lenT-self.size)
+                pad[:] = np.nan
+                self.init(np.hstack([self.get(), pad]), max_size=self.max_size, dtype=self.dtype)
+            else:
+                self.init(self.get()[-lenT:], max_size=self.max_size, dtype=self.dtype)
+        super().add(x)
+
+    def grow(self):
+        """Increases the size of the file by a factor of 4. Existing views stay valid as the file is only extended."""
+        self.capacity *= 4
+        self.data = np.memmap(self.file, dtype=self.dtype, mode='r+', shape=(self.capacity,))
+
+class SegmentedNp(DynamicNp):
+    """A :class:`~esibd.core.DynamicNp` that stores only valid data as a list of segments [start index, :class:`~esibd.core.DynamicNp`] relative to the time axis.
+    NaN values, e.g. while a channel is disabled or if it has been enabled later than others, are not stored.
+    :meth:`~esibd.core.SegmentedNp.get` fills gaps with NaN only for the requested range.
+    Older data is thinned in the same way as :class:`~esibd.core.DynamicNp` to stay aligned with the time axis."""
+
+    def init(self, initialData=None, max_size=None, dtype=np.float32):
+        self.dtype = dtype
+        self.max_size = max_size
+        self.size = 0 if initialData is None else initialData.shape[0]
+        self.segments = []
+        if initialData is not None and self.size > 0:
+            self.segments = self.split(np.asarray(initialData, dtype=np.float32 if self.codec is not None else dtype))
+
+    def split(self, data, offset=0):
+        """Returns segments for all continuous ranges of valid data.
+
+        :param data: Data that may contain NaN
+        :type data: numpy.array
+        :param offset: Index of first element of data, defaults to 0
+        :type offset: int, optional
+        :return: List of [start index, DynamicNp]
+        :rtype: list
+        """
+        valid = np.concatenate(([False], ~np.isnan(data), [False])).astype(np.int8)
+        edges = np.flatnonzero(np.diff(valid)) # alternating start and end indices of valid ranges
+        return [[int(offset+start), DynamicNp(initialData=data[start:end], dtype=self.dtype, codec=self.codec)] for start, end in zip(edges[::2], edges[1::2])]
+
+    @property
+    def data(self):
+        return self.get()
+
+    @property
+    def capacity(self):
+        return sum([segment.capacity for _, segment in self.segments])
+
+    def add(self, x, lenT=None):
+        """Adds the new data point. NaN is not stored.
+
+        :param x: Datapoint to be added
+        :type x: float
+        :param lenT: length of corresponding time array, defaults to None
+        :type lenT: int, optional
+        """
+        if lenT is not None:
+            if self.size > lenT:
+                self.trim(self.size - lenT) # remove data older than time axis
+            self.size = lenT # gaps are implicitly NaN, no padding required
+        if self.max_size is not None and self.size >= self.max_size:
+            self.thin()
+        if not np.isnan(x):
+            if self.segments and self.segments[-1][0] + self.segments[-1][1].size == self.size:
+                self.segments[-1][1].add(x)
+            else:
+                self.segments.append([self.size, DynamicNp(initialData=np.array([x]), dtype=self.dtype, codec=self.codec)])
+        self.size += 1
+
+    def trim(self, length):
+        """Removes the oldest length data points."""
+        segments = []
+        for start, segment in self.segments:
+            if start + segment.size > length:
+                segments.append([max(start - length, 0), segment if start >= length else
+                                  DynamicNp(initialData=segment.get(_min=length-start, _max=segment.size), dtype=self.dtype, codec=self.codec)])
+        self.segments = segments
+        self.size -= length
+
+    def thin(self):
+        """Uses only every second value for first half of all segments, consistent with :meth:`~esibd.core.DynamicNp.add`."""
+        half = self.size - self.size // 2 # size of first half as returned by np.array_split
+        thinned = half // 2
+        segments = []
+        for start, segment in self.segments:
+            data = segment.get()
+            end = start + data.shape[0]
+            if start < half:
+                first = start + 1 - start % 2 # keep every second item starting with the second one, see DynamicNp.add
+                if first < min(end, half):
+                    segments.append([(first-1)//2, data[first-start:min(end, half)-start:2]])
+            if end > half:
+                segments.append([max(start, half) - half + thinned, data[max(start, half)-start:]])
+        self.segments = []
+        for start, data in segments:
+            if self.segments and self.segments[-1][0] + self.segments[-1][1].shape[0] == start: # merge segments that became adjacent
+                self.segments[-1][1] = np.hstack([self.segments[-1][1], data])
+            else:
+                self.segments.append([start, data])
+        self.segments = [[start, DynamicNp(initialData=data, dtype=self.dtype, codec=self.codec)] for start, data in self.segments]
+        self.size = thinned + self.size - half
+
+    def get(self, length=None, _min=None, _max=None, n=1):
+        if length is not None:
+            _min = self.size - length
+        if _min is not None and _max is not None:
+            lower, upper, _ = slice(_min, _max).indices(self.size)
+        elif _min is not None:
+            lower, upper, _ = slice(_min-np.remainder(_min, n), self.size).indices(self.size)
+        else:
+            lower, upper = 0, self.size
+        upper = max(lower, upper)
+        for start, segment in self.segments:
+            if start <= lower and start + segment.size >= upper: # range covered by single segment, no NaN required
+                return segment.get(_min=lower-start, _max=upper-start)[::n]
+        data = np.full((upper-lower,), np.nan, dtype=np.float32 if self.codec is not None else self.dtype)
+        for start, segment in self.segments:
+            if start < upper and start + segment.size > lower:
+                _from, _to = max(start, lower), min(start + segment.size, upper)
+                data[_from-lower:_to-lower] = segment.get(_min=_from-start, _max=_to-start)
+        return data[::n]
+
+class ColumnarNp(DynamicNp):
+    """Time axis of a device that also stores the history of all channels in a single 2D array (samples x columns).
+    Channels use :class:`~esibd.core.ColumnNp` to access their column and set their value for the pending row.
+    Adding a time stamp writes the pending row of all channels with a single vectorized assignment.
+    All columns are thereby always aligned with the time axis and no padding is required."""
+
+    def __init__(self, initialData=None, max_size=None, dtype=np.float64):
+        self.columns = [] # True if column is in use
+        self.matrixDtype = np.float32
+        super().__init__(initialData=initialData, max_size=max_size, dtype=dtype)
+
+    def init(self, initialData=None, max_size=None, dtype=np.float64):
+        """(Re)initializes time and all columns. Columns stay assigned to their channels."""
+        self.size = 0 if initialData is None else initialData.shape[0]
+        self.capacity = max(2000, self.size)
+        self.max_size = max_size
+        self.data = np.zeros((self.capacity,), dtype=dtype)
+        if self.size > 0:
+            self.data[:self.size] = initialData
+        self.matrix = np.full((self.capacity, len(self.columns)), np.nan, dtype=self.matrixDtype)
+        self.row = np.full((len(self.columns),), np.nan, dtype=self.matrixDtype) # pending values of next sample
+
+    def addColumn(self):
+        """Returns the index of a new column. Released columns are reused."""
+        if False in self.columns:
+            column = self.columns.index(False)
+            self.matrix[:, column] = np.nan
+        else:
+            column = len(self.columns)
+            self.matrix = np.hstack([self.matrix, np.full((self.capacity, 1), np.nan, dtype=self.matrixDtype)])
+            self.row = np.hstack([self.row, np.array([np.nan], dtype=self.matrixDtype)])
+        self.columns[column:column+1] = [True]
+        return column
+
+    def releaseColumn(self, column):
+        self.columns[column] = False
+
+    def add(self, x, lenT=None):
+        """Adds the time stamp and writes the pending values of all columns.
+
+        :param x: Time stamp to be added
+        :type x: float
+        :param lenT: Ignored, columns are always aligned with time, defaults to None
+        :type lenT: int, optional
+        """
+        if self.size == self.capacity:
+            self.grow()
+        if self.max_size is not None and self.size >= self.max_size:
+            # thin out older half of all rows, see DynamicNp.add
+            a, b = np.array_split(self.data[:self.size], 2) # pylint: disable=[unbalanced-tuple-unpacking] # balance not relevant, as long as it is consistent
+            c, d = np.array_split(self.matrix[:self.size], 2) # pylint: disable=[unbalanced-tuple-unpacking]
+            self.size = a[1::2].shape[0]+b.shape[0]
+            self.data[:self.size] = np.hstack([a[1::2], b])
+            self.matrix[:self.size] = np.vstack([c[1::2], d])
+        self.data[self.size] = x
+        self.matrix[self.size] = self.row # single vectorized assignment for all channels
+        self.row[:] = np.nan # channels that do not provide a value before next time stamp will be NaN
+        self.size += 1
+
+    def grow(self):
+        self.capacity *= 4
+        newData = np.zeros((self.capacity,), dtype=self.data.dtype)
+        newData[:self.size] = self.data[:self.size]
+        self.data = newData
+        newMatrix = np.full((self.capacity, len(self.columns)), np.nan, dtype=self.matrixDtype)
+        newMatrix[:self.size] = self.matrix[:self.size]
+        self.matrix = newMatrix
+
+    def getMatrix(self, _min=None, _max=None):
+        """Returns a view of the values of all columns in the specified range."""
+        return self.matrix[:self.size][_min:_max]
+
+class ColumnNp(DynamicNp):
+    """Provides the interface of :class:`~esibd.core.DynamicNp` for a single column of a :class:`~esibd.core.ColumnarNp`."""
+
+    def __init__(self, store, initialData=None): # pylint: disable = super-init-not-called # data is managed by store
+        self.store = store
+        self.column = self.store.addColumn()
+        self.finalizer = weakref.finalize(self, self.store.releaseColumn, self.column) # make column available once channel history is replaced
+        self.init(initialData)
+
+    def release(self):
+        """Releases the column immediately so that it can be reused by the history that replaces this one.
+        Only use if this history is no longer accessed. Releasing more than once has no effect."""
+        self.finalizer()
+
+    def init(self, initialData=None, max_size=None, dtype=np.float32): # pylint: disable = unused-argument # use consistent arguments
+        """Copies initialData to the column, aligned with the most recent time stamp.
+        Each value needs a corresponding time stamp in the store. If initialData is longer than the time axis,
+        only the most recent values are copied."""
+        if initialData is not None and initialData.shape[0] > 0:
+            length = min(initialData.shape[0], self.store.size)
+            self.store.matrix[self.store.size-length:self.store.size, self.column] = initialData[-length:]
+
+    @property
+    def data(self):
+        return self.store.matrix[:, self.column]
+
+    @property
+    def size(self):
+        return self.store.size
+
+    @property
+    def max_size(self):
+        return self.store.max_size
+
+    def add(self, x, lenT=None):
+        """Sets the value of the pending row. It is written when the time stamp is added to the store."""
+        self.store.row[self.column] = x
+
+class RingBufferNp(DynamicNp):
+    """A :class:`~esibd.core.DynamicNp` with constant time append and eviction based on a preallocated ring buffer.
+    Once max_size is reached, the oldest value is discarded for every new value instead of thinning the history.
+    Every value is written twice (at i and i + capacity) so that any range of the history is a contiguous
+    view of the buffer and :meth:`~esibd.core.DynamicNp.get` can be used unchanged. This doubles the memory per data point."""
+
+    def init(self, initialData=None, max_size=None, dtype=np.float32):
+        if self.codec is not None:
+            dtype = self.codec.dtype
+            if initialData is not None:
+                initialData = self.codec.encode(initialData)
+        if initialData is not None:
+            initialData = np.asarray(initialData, dtype=dtype)
+            if max_size is not None and initialData.shape[0] > max_size:
+                initialData = initialData[-int(max_size):] # keep only most recent data
+        self.dtype = dtype
+        self.max_size = max_size
+        self.allocate(initialData=initialData, capacity=int(max_size) if max_size is not None else 2000)
+
+    def allocate(self, initialData, capacity):
+        """Allocates a new buffer and copies initialData to the beginning of both halves."""
+        self.size = 0 if initialData is None else initialData.shape[0]
+        self.capacity = max(capacity, self.size, 1)
+        self.buffer = np.zeros((2*self.capacity,), dtype=self.dtype)
+        self.start = 0 # index of oldest value
+        if initialData is not None:
+            self.buffer[:self.size] = initialData
+            self.buffer[self.capacity:self.capacity+self.size] = initialData
+
+    @property
+    def data(self):
+        return self.buffer[self.start:self.start+self.size]
+
+    def add(self, x, lenT=None):
+        """Adds the new data point. Oldest data point is overwritten if max_size is reached.
+
+        :param x: Datapoint to be added
+        :type x: float
+        :param lenT: length of corresponding time array, defaults to None
+        :type lenT: int, optional
+        """
+        if lenT is not None:
+            if self.size < lenT:
+                # pad data with NaN to ensure new data is aligned with time axis. Only needed if channel was enabled later than others or temporarily disabled.
+                pad = np.zeros(lenT-self.size)
+                pad[:] = np.nan
+                self.init(np.hstack([self.get(), pad]), max_size=self.max_size, dtype=self.dtype)
+            if self.size > lenT:
+                # remove data older than time axis without copying
+                self.start = (self.start + self.size - lenT) % self.capacity
+                self.size = lenT
+        if self.size == self.capacity:
+            if self.max_size is None:
+                self.allocate(initialData=self.data.copy(), capacity=self.capacity*4) # no limit defined, grow like DynamicNp
+            else:
+                # evict oldest value
+                self.start = (self.start + 1) % self.capacity
+                self.size -= 1
+        index = (self.start + self.size) % self.capacity
+        if self.codec is not None:
+            x = self.codec.encode(x)
+        self.buffer[index] = x
+        self.buffer[index + self.capacity] = x
+        self.size += 1
+
+class TieredNp(DynamicNp):
+    """A :class:`~esibd.core.DynamicNp` that keeps recent data at full resolution and older data in tiers of fixed width buckets.
+    Each bucket stores min, mean, max, and count and is updated incrementally while data is added.
+    All tiers are updated in parallel so that every tier covers the most recent data and can be used to plot the visible range.
+    Tier 0 is the raw data and is used by default so that :meth:`~esibd.core.DynamicNp.get` keeps its semantics.
+    Tiers of time and channels of the same device are aligned with respect to the most recent bucket.
+    Buckets are defined by a number of data points, not by a duration. Their duration depends on the interval at which data is added
+    and is only approximately constant, e.g. a bucket of 3 data points spans 0.9 s at an interval of 300 ms.
+    Use :meth:`~esibd.core.TieredNp.setBucketSizes` to adjust bucket sizes to a new interval without losing data."""
+
+    MEAN = 'mean'
+    MIN = 'min'
+    MAX = 'max'
+    COUNT = 'count'
+
+    def __init__(self, initialData=None, max_size=None, dtype=np.float32, rawSize=6000, bucketSizes=(10, 60), tierSizes=(3600, 10080)):
+        """
+        :param rawSize: Number of raw data points, defaults to 6000
+        :type rawSize: int, optional
+        :param bucketSizes: Number of data points of the previous tier that are combined in one bucket of the next tier, defaults to (10, 60)
+        :type bucketSizes: tuple, optional
+        :param tierSizes: Maximum number of buckets in each tier, defaults to (3600, 10080)
+        :type tierSizes: tuple, optional
+        """
+        self.rawSize = int(rawSize)
+        self.bucketSizes = [max(int(bucketSize), 1) for bucketSize in bucketSizes]
+        self.tierSizes = tierSizes
+        super().__init__(initialData=initialData, max_size=max_size, dtype=dtype)
+
+    def init(self, initialData=None, max_size=None, dtype=np.float32):
+        self.dtype = initialData.dtype if initialData is not None else dtype
+        self.max_size = max_size
+        self.raw = RingBufferNp(max_size=self.rawSize if max_size is None else min(self.rawSize, int(max_size)), dtype=self.dtype)
+        self.tiers = [{self.MIN : RingBufferNp(max_size=tierSize, dtype=self.dtype), self.MEAN : RingBufferNp(max_size=tierSize, dtype=self.dtype),
+                       self.MAX : RingBufferNp(max_size=tierSize, dtype=self.dtype), self.COUNT : RingBufferNp(max_size=tierSize, dtype=np.int32)}
+                      for tierSize in self.tierSizes]
+        self.accumulators = [[np.nan, np.nan, 0.0, 0] for _ in self.tiers] # min, max, sum, count of current bucket of each tier
+        self.inputs = [0]*len(self.tiers) # number of inputs in current bucket of each tier
+        self.count = 0 # total number of added data points
+        if initialData is not None:
+            self.extend(initialData)
+
+    @property
+    def data(self):
+        return self.raw.data
+
+    @property
+    def size(self):
+        return self.raw.size
+
+    @property
+    def capacity(self):
+        return self.raw.capacity
+
+    def add(self, x, lenT=None):
+        """Adds the new data point to the raw data and the current bucket of all tiers.
+
+        :param x: Datapoint to be added
+        :type x: float
+        :param lenT: length of corresponding time array, defaults to None
+        :type lenT: int, optional
+        """
+        if lenT is not None and self.size < lenT:
+            # pad data with NaN to ensure new data is aligned with time axis. Padding is passed to tiers to keep bucket boundaries aligned.
+            pad = np.zeros(lenT-self.size, dtype=self.dtype)
+            pad[:] = np.nan
+            self.extend(pad)
+        self.raw.add(x, lenT=lenT) # only raw data needs to be trimmed, tiers are aligned with respect to most recent bucket
+        self.addToTier(0, x, x, x if not np.isnan(x) else 0.0, 0 if np.isnan(x) else 1)
+        self.count += 1
+
+    def extend(self, x):
+        """Adds an array of data points. Complete buckets of the first tier are calculated vectorized.
+
+        :param x: Datapoints to be added
+        :type x: numpy.array
+        """
+        if x.shape[0] == 0:
+            return
+        self.raw.init(initialData=np.hstack([self.raw.get(), x]).astype(self.dtype), max_size=self.raw.max_size, dtype=self.dtype)
+        self.count += x.shape[0]
+        if len(self.tiers) == 0:
+            return
+        i = 0
+        while i < x.shape[0] and self.inputs[0] != 0: # complete current bucket
+            self.addToTier(0, x[i], x[i], x[i] if not np.isnan(x[i]) else 0.0, 0 if np.isnan(x[i]) else 1)
+            i += 1
+        numBuckets = (x.shape[0] - i) // self.bucketSizes[0]
+        if numBuckets > 0:
+            buckets = x[i:i + numBuckets*self.bucketSizes[0]].reshape(numBuckets, self.bucketSizes[0])
+            counts = np.sum(~np.isnan(buckets), axis=1)
+            for _min, _max, _sum, count in zip(np.fmin.reduce(buckets, axis=1), np.fmax.reduce(buckets, axis=1), np.nansum(buckets, axis=1), counts):
+                self.addBucket(0, _min, _max, _sum, count)
+            i += numBuckets*self.bucketSizes[0]
+        for value in x[i:]:
+            self.addToTier(0, value, value, value if not np.isnan(value) else 0.0, 0 if np.isnan(value) else 1)
+
+    def addToTier(self, tier, _min, _max, _sum, count):
+        """Adds a data point or a bucket of the previous tier to the current bucket of the given tier."""
+        if tier >= len(self.tiers):
+            return
+        accumulator = self.accumulators[tier]
+        accumulator[0] = np.fmin(accumulator[0], _min) # ignores NaN
+        accumulator[1] = np.fmax(accumulator[1], _max)
+        accumulator[2] += _sum
+        accumulator[3] += count
+        self.inputs[tier] += 1
+        if self.inputs[tier] >= self.bucketSizes[tier]: # bucket size may have been reduced while bucket was filled
+            self.addBucket(tier, *accumulator)
+            self.accumulators[tier] = [np.nan, np.nan, 0.0, 0]
+            self.inputs[tier] = 0
+
+    def setBucketSizes(self, bucketSizes):
+        """Sets the number of data points per bucket for all following buckets, e.g. after the interval has changed.
+        Existing buckets are kept. Tiers of time and channels stay aligned if bucket sizes of all are changed at the same time.
+
+        :param bucketSizes: Number of data points of the previous tier that are combined in one bucket of the next tier.
+        :type bucketSizes: tuple
+        """
+        self.bucketSizes = [max(int(bucketSize), 1) for bucketSize in bucketSizes]
+
+    def alignTo(self, reference):
+        """Pads an empty history with NaN to the size of all tiers of reference and adopts its bucket phase.
+        Use for histories that are created while reference, typically the time axis, already contains data.
+
+        :param reference: History to align with.
+        :type reference: :class:`~esibd.core.TieredNp`
+        """
+        if self.count > 0 or reference.count == 0:
+            return
+        self.raw.init(initialData=np.full(reference.size, np.nan, dtype=self.dtype), max_size=self.raw.max_size, dtype=self.dtype)
+        for tier, referenceTier in zip(self.tiers, reference.tiers):
+            size = referenceTier[self.MEAN].size
+            for aggregate in [self.MIN, self.MEAN, self.MAX]:
+                tier[aggregate].init(initialData=np.full(size, np.nan, dtype=self.dtype), max_size=tier[aggregate].max_size, dtype=self.dtype)
+            tier[self.COUNT].init(initialData=np.zeros(size, dtype=np.int32), max_size=tier[self.COUNT].max_size, dtype=np.int32)
+        self.bucketSizes = list(reference.bucketSizes)
+        self.inputs = list(reference.inputs[:len(self.tiers)]) # current buckets contain only NaN
+        self.count = reference.count
+
+    def addBucket(self, tier, _min, _max, _sum, count):
+        """Stores a complete bucket and adds it to the next tier."""
+        self.tiers[tier][self.MIN].add(_min)
+        self.tiers[tier][self.MAX].add(_max)
+        self.tiers[tier][self.MEAN].add(_sum/count if count > 0 else np.nan)
+        self.tiers[tier][self.COUNT].add(count)
+        self.addToTier(tier + 1, _min, _max, _sum, count)
+
+    def get(self, length=None, _min=None, _max=None, n=1, tier=0, aggregate=MEAN):
+        """Returns actual values of the given tier.
+
+        :param length: will return last 'length' values.
+        :type length: int
+        :param _min: Index of lower limit.
+        :type _min: int
+        :param _max: Index of upper limit.
+        :type _max: int
+        :param n: Will only return every nth value, defaults to 1
+        :type n: int, optional
+        :param tier: 0 for raw data, higher tiers contain buckets of increasing width, defaults to 0
+        :type tier: int, optional
+        :param aggregate: Use MIN, MEAN, MAX, or COUNT of buckets, ignored for raw data, defaults to MEAN
+        :type aggregate: str, optional
+        :return: Values in specified range.
+        :rtype: numpy.array
+        """
+        if tier == 0:
+            return self.raw.get(length=length, _min=_min, _max=_max, n=n)
+        return self.tiers[tier-1][aggregate].get(length=length, _min=_min, _max=_max, n=n)
+
+    def getTierSize(self, tier):
+        return self.size if tier == 0 else self.tiers[tier-1][self.MEAN].size
+
+    def covers(self, tier, t_min):
+        """Returns True if the tier contains all data after t_min. Only meaningful for time."""
+        if tier == 0:
+            complete = self.count == self.raw.size
+        else:
+            complete = self.count < self.tiers[tier-1][self.MEAN].capacity*np.prod(self.bucketSizes[:tier])
+        return complete or (self.getTierSize(tier) > 0 and self.get(tier=tier)[0] <= t_min)
+
+    def selectTier(self, t_min=None, maxPoints=None):
+        """Selects the tier with the highest resolution that covers the range from t_min until now
+        and does not exceed maxPoints. Falls back to the coarsest tier. Only meaningful for time.
+
+        :param t_min: Lower limit of time range, defaults to None (entire history)
+        :type t_min: float, optional
+        :param maxPoints: Preferred maximum number of data points, defaults to None
+        :type maxPoints: int, optional
+        :return: Selected tier
+        :rtype: int
+        """
+        for tier in range(len(self.tiers)):
+            if self.getTierSize(tier + 1) < 2:
+                return tier # next tier has not enough data
+            if self.covers(tier, t_min if t_min is not None else -np.inf):
+                if maxPoints is None:
+                    return tier
+                _time = self.get(tier=tier)
+                if _time.shape[0] - np.searchsorted(_time, t_min if t_min is not None else -np.inf) <= maxPoints:
+                    return tier
+        return len(self.tiers)
+
+class TimeIndex():
+    """Finds indices in the monotonic time axis of a device using binary search.
+    The last range is cached and used as starting point if the range only moves forward, e.g. while following the most recent data."""
+
+    def __init__(self, device):
+        self.device = device
+        self.cache = None
+
+    def getTime(self, tier=0):
+        return self.device.time.get(tier=tier) if tier > 0 else self.device.time.get()
+
+    def nearest(self, _time, t, lo=0):
+        """Returns the index of the time stamp closest to t, equivalent to np.argmin(np.abs(_time - t)) for monotonic _time.
+
+        :param _time: Monotonic time axis
+        :type _time: numpy.array
+        :param t: Time stamp
+        :type t: float
+        :param lo: Lower limit for search, only use if index is known to be larger, defaults to 0
+        :type lo: int, optional
+        :return: Index of closest time stamp
+        :rtype: int
+        """
+        if _time.shape[0] == 0:
+            return 0
+        i = lo + int(np.searchsorted(_time[lo:], t))
+        if i == _time.shape[0]:
+            return i - 1
+        if i > 0 and t - _time[i-1] <= _time[i] - t:
+            return i - 1
+        return i
+
+    def getRange(self, t_min, t_max=None, tier=0):
+        """Returns the indices closest to t_min and t_max.
+
+        :param t_min: Lower time limit
+        :type t_min: float
+        :param t_max: Upper time limit, defaults to None
+        :type t_max: float, optional
+        :param tier: Tier of :class:`~esibd.core.TieredNp`, defaults to 0
+        :type tier: int, optional
+        :return: i_min, i_max (None if t_max is None)
+        :rtype: int, int
+        """
+        _time = self.getTime(tier)
+        if _time.shape[0] == 0:
+            return 0, None if t_max is None else 0
+        key = (id(self.device.time), tier, _time[0]) # first time stamp changes if data is thinned or discarded, which invalidates all indices
+        lo = 0
+        if self.cache is not None and self.cache[0] == key:
+            _, cachedMin, cachedMax, size, i_min, i_max = self.cache
+            if cachedMin == t_min and cachedMax == t_max and size == _time.shape[0]:
+                return i_min, i_max
+            if t_min >= cachedMin:
+                lo = i_min # range moved forward
+        i_min = self.nearest(_time, t_min, lo)
+        i_max = None if t_max is None else self.nearest(_time, t_max, i_min if t_max >= t_min else 0)
+        self.cache = key, t_min, t_max, _time.shape[0], i_min, i_max
+        return i_min, i_max
+
+class EnvelopeNp():
+    """Minimum and maximum of buckets of n data points, used to display many data points without losing spikes.
+    Complete buckets are cached and only new data has to be processed when the envelope is updated.
+    The envelope is not maintained when data is added but updated lazily by :meth:`~esibd.plugins.LiveDisplay.plotChannel`,
+    so no work is done for channels that are not displayed. Thinned plots are only updated if the first displayed index is a multiple of n.
+    As the envelope uses buckets of 2n data points to display as many points as thinning by n, it is updated at half that rate unless the update is forced."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self, n=1, start=0, key=None):
+        self.n = n
+        self.start = start # index of first cached bucket
+        self.end = start # index after last complete cached bucket
+        self.key = key
+        self.mins = np.array([], dtype=np.float32)
+        self.maxs = np.array([], dtype=np.float32)
+
+    def get(self, getValues, _min, _max, n, key=None):
+        """Returns minimum and maximum of every bucket of n data points, starting at the bucket that contains _min.
+
+        :param getValues: Function that returns values for given _min and _max
+        :type getValues: callable
+        :param _min: Index of lower limit.
+        :type _min: int
+        :param _max: Index of upper limit. If None, all data after _min is used.
+        :type _max: int
+        :param n: Number of data points per bucket.
+        :type n: int
+        :param key: Cache is reset if key changes, e.g. if the data is thinned and the index of the first bucket now refers to a different time, defaults to None
+        :type key: any, optional
+        :return: Alternating minimum and maximum of each bucket.
+        :rtype: numpy.array
+        """
+        start = _min - np.remainder(_min, n) # use same start as DynamicNp.get
+        if key != self.key or n != self.n or start < self.start or (_max is not None and _max < self.end):
+            self.reset(n=n, start=start, key=key)
+        elif start > self.start: # drop buckets that are no longer needed
+            self.mins = self.mins[(start - self.start)//n:]
+            self.maxs = self.maxs[(start - self.start)//n:]
+            self.start = start
+            self.key = key
+        values = getValues(self.end, _max)
+        complete = (values.shape[0]//n)*n
+        if complete > 0:
+            buckets = values[:complete].reshape(complete//n, n)
+            self.mins = np.hstack([self.mins, np.fmin.reduce(buckets, axis=1)]) # ignores NaN unless all values in bucket are NaN
+            self.maxs = np.hstack([self.maxs, np.fmax.reduce(buckets, axis=1)])
+            self.end += complete
+        mins, maxs = self.mins, self.maxs
+        if values.shape[0] > complete: # incomplete last bucket is not cached
+            mins = np.hstack([mins, np.fmin.reduce(values[complete:])])
+            maxs = np.hstack([maxs, np.fmax.reduce(values[complete:])])
+        y = np.empty(2*mins.shape[0], dtype=mins.dtype)
+        y[0::2] = mins
+        y[1::2] = maxs
+        return y
+
 def parameterDict(name=None, value=None, default=None, _min=None, _max=None, toolTip=None, items=None, fixedItems=False, tree=None, widgetType=None, advanced=False, header=None,
                     widget=None, event=None, internal=False, attr=None, indicator=False, instantUpdate=True):
     """Provides default values for all properties of a parameter.
@@ -1030,6 +1779,11 @@ class Parameter():
     """If this is not None, parameter is part of a channel otherwise of a setting."""
     extraEvents : List[callable]
     """Used to add internal events on top of the user assigned ones."""
+    store : "ValueStore" = None
+    """If not None, numeric values are read from and written to this :class:`~esibd.core.ValueStore` instead of the widget."""
+    widgetCreated : bool
+    """False until :meth:`~esibd.core.Parameter.applyWidget` has been called. Until then, the value is kept in the parameter itself.
+    Widgets of channels are created on demand, see :meth:`~esibd.core.Channel.realize`."""
 
     def __init__(self, name, _parent=None, default=None, widgetType=None, index=1, items=None, fixedItems=False, widget=None, internal=False,
                     tree=None, itemWidget=None, toolTip=None, event=None, _min=None, _max=None, indicator=False, instantUpdate=True):
@@ -1047,6 +1801,11 @@ class Parameter():
         self.widget = widget
         self.extraEvents = []
         self._valueChanged = False
+        self.store = None
+        self.storeField = None
+        self.storeSlot = None
+        self.widgetCreated = False
+        self._value = None # used until widget is created
         self.event = event
         self.internal = internal
         self.indicator = indicator
@@ -1064,9 +1823,18 @@ class Parameter():
         if self.tree is None: # if this is part of a QTreeWidget, applyWidget() should be called after this parameter is added to the tree
             self.applyWidget() # call after everything else is initialized but before setting value
 
+    @property
+    def storeBound(self):
+        """True if the value is managed by a :class:`~esibd.core.ValueStore`."""
+        return self.store is not None and self.widgetType in [self.TYPE.FLOAT, self.TYPE.EXP]
+
     @property
     def value(self):
         """returns value in correct format, based on widgetType"""
+        if self.storeBound: # model layer, no Qt involved
+            return self.store.get(self)
+        if not self.widgetCreated:
+            return self._value # already converted by setModelValue
         # use widget even for internal settings, should always be synchronized to allow access via both attribute and qSet
         if self.widgetType == self.TYPE.COMBO:
             return self.combo.currentText()
@@ -1092,10 +1860,16 @@ class Parameter():
 
     @value.setter
     def value(self, value):
+        if self.storeBound and (self.indicator or not self.widgetCreated): # widget will be updated at display rate
+            self.store.set(self, value if self.indicator else self.limit(float(value)))
+            return
         if self.internal:
             qSet.setValue(self.fullName, value)
             if self._items is not None:
                 qSet.setValue(self.fullName+self.ITEMS, ','.join(self.items))
+        if not self.widgetCreated:
+            self.setModelValue(value)
+            return
         if self.widgetType == self.TYPE.BOOL:
             value = value if isinstance(value,(bool, np.bool_)) else value in ['True', 'true'] # accepts strings (from ini file or qSet) and bools
             if self.check is not None:
@@ -1127,6 +1901,62 @@ class Parameter():
             self.label.setToolTip(str(value))
             if not self.indicator:
                 self.changedEvent() # emit here as it is not emitted by the label
+        if self.storeBound: # editable widget may have applied limits or rounding
+            self.store.sync(self)
+
+    def setModelValue(self, value):
+        """Sets the value of a parameter whose widget has not been created yet.
+        Applies the same conversion and validation as the widget and triggers :meth:`~esibd.core.Parameter.changedEvent`
+        in the same cases in which the widget would emit a signal when changed programmatically.
+
+        :param value: The new value.
+        :type value: Any
+        """
+        if self.widgetType == self.TYPE.BOOL:
+            value = bool(value) if isinstance(value,(bool, np.bool_)) else value in ['True', 'true'] # accepts strings (from ini file or qSet) and bools
+        elif self.widgetType == self.TYPE.INT:
+            value = self.limit(int(float(value)))
+        elif self.widgetType in [self.TYPE.FLOAT, self.TYPE.EXP]:
+            value = self.limit(float(value))
+        elif self.widgetType == self.TYPE.COLOR:
+            value = pg.mkColor(value).name()
+        elif self.widgetType in [self.TYPE.COMBO, self.TYPE.INTCOMBO, self.TYPE.FLOATCOMBO]:
+            items = self.items
+            text = items[0] if value is None else str(value)
+            if text not in items and self.widgetType is self.TYPE.FLOATCOMBO:
+                text = str(int(float(value))) # try to find int version if float version not found. e.g. 1 instead of 1.0
+            if text not in items:
+                self.print(f'Value {value} not found for {self.fullName}. Defaulting to {items[0]}.', PRINT.WARNING)
+                text = items[0]
+            value = int(text) if self.widgetType == self.TYPE.INTCOMBO else float(text) if self.widgetType == self.TYPE.FLOATCOMBO else text
+        elif self.widgetType == self.TYPE.PATH:
+            value = Path(str(value))
+        else: # TEXT, LABEL
+            value = str(value)
+        changed = not (value == self._value or (isinstance(value, float) and isinstance(self._value, float) and np.isnan(value) and np.isnan(self._value)))
+        self._value = value
+        if self.itemWidget is not None and self.widgetType in [self.TYPE.COMBO, self.TYPE.INTCOMBO, self.TYPE.FLOATCOMBO, self.TYPE.TEXT, self.TYPE.LABEL, self.TYPE.PATH]:
+            self.itemWidget.setText(self.index, str(value)) # placeholder until widget is created
+        if self.widgetType in [self.TYPE.LABEL, self.TYPE.PATH]:
+            if not self.indicator:
+                self.changedEvent() # emit here as it is not emitted by the label
+        elif self.widgetType == self.TYPE.COLOR:
+            self.changedEvent() # ColorButton emits even if color is unchanged
+        elif changed:
+            if self.widgetType in [self.TYPE.INT, self.TYPE.FLOAT, self.TYPE.EXP] and not self.instantUpdate:
+                self._valueChanged = True # event will be triggered once editing is finished
+            elif self.widgetType == self.TYPE.TEXT or (self.widgetType == self.TYPE.BOOL and (self.indicator or not isinstance(self.widget, (type(None), QCheckBox)))):
+                pass # these widgets only emit signals on user interaction
+            else:
+                self.changedEvent()
+
+    def limit(self, value):
+        """Applies :attr:`~esibd.core.Parameter.min` and :attr:`~esibd.core.Parameter.max` like a spinbox."""
+        if self.min is not None:
+            value = max(value, self.min)
+        if self.max is not None:
+            value = min(value, self.max)
+        return value
 
     @property
     def default(self):
@@ -1145,6 +1975,8 @@ class Parameter():
     @property
     def items(self):
         if self.widgetType in [self.TYPE.COMBO, self.TYPE.INTCOMBO, self.TYPE.FLOATCOMBO]:
+            if not self.widgetCreated:
+                return [item.strip(' ') for item in self._items]
             return [self.combo.itemText(i) for i in range(self.combo.count())]
         else:
             return ''
@@ -1183,10 +2015,10 @@ class Parameter():
         elif self.widgetType in [self.TYPE.INT, self.TYPE.FLOAT, self.TYPE.EXP]:
             if self.instantUpdate:
                 # by default trigger events on every change, not matter if through user interface or software
-                self.safeConnect(self.spin, self.spin.valueChanged, self.changedEvent)
+                self.safeConnect(self.spin, self.spin.valueChanged, self.spinChangedEvent)
             else:
                 self.safeConnect(self.spin, self.spin.valueChanged, self.setValueChanged)
-                self.safeConnect(self.spin, self.spin.editingFinished, self.changedEvent)
+                self.safeConnect(self.spin, self.spin.editingFinished, self.spinChangedEvent)
         elif self.widgetType == self.TYPE.BOOL:
             if isinstance(self.check, QCheckBox):
                 self.safeConnect(self.check, self.check.stateChanged, self.changedEvent)
@@ -1206,13 +2038,22 @@ class Parameter():
         if event is not None:
             signal.connect(event)
 
+    def spinChangedEvent(self):
+        """Widgets of parameters that are bound to a :class:`~esibd.core.ValueStore` are views of the store, except for editable widgets that provide user input."""
+        if self.storeBound:
+            if self.store.refreshing or self.indicator:
+                return # value is already in store and events have been triggered by the store
+            self.store.sync(self)
+        self.changedEvent()
+
     def setValueChanged(self):
         self._valueChanged = True
+        if self.storeBound and not (self.store.refreshing or self.indicator):
+            self.store.sync(self)
 
     def setToDefault(self):
         if self.widgetType in [self.TYPE.COMBO, self.TYPE.INTCOMBO, self.TYPE.FLOATCOMBO]:
-            i = self.combo.findText(str(self.default))
-            if i == -1: # add default entry in case it has been deleted
+            if str(self.default) not in self.items: # add default entry in case it has been deleted
                 self.print(f'Adding Default value {self.default} for {self.fullName}.', PRINT.WARNING)
                 self.addItem(self.default)
         self.value = self.default
@@ -1284,12 +2125,15 @@ class Parameter():
                 self.tree.setItemWidget(self.itemWidget, self.index, self.containerize(self.getWidget())) # container required to hide widgets reliable
         self.applyChangedEvent()
 
+        if self.storeBound: # new widget shows the current value on next refresh
+            self.store.pendingRefresh[self.storeField, self.storeSlot] = True
         self.getWidget().setToolTip(self.toolTip)
         self.getWidget().setMinimumHeight(self.rowHeight) # always keep entire row at consistent height
         self.getWidget().setMaximumHeight(self.rowHeight)
         self.getWidget().setObjectName(self.fullName)
         self.getWidget().setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.getWidget().customContextMenuRequested.connect(self.initContextMenu)
+        self.widgetCreated = True
 
     def containerize(self, widget):
         # just hiding widget using setVisible(False) is not reliable due to bug https://bugreports.qt.io/browse/QTBUG-13522
@@ -1335,6 +2179,8 @@ class Parameter():
             self.label.setFont(font)
 
     def getWidget(self):
+        if not self.widgetCreated and hasattr(self.itemWidget, 'realize'):
+            self.itemWidget.realize() # widgets of channels are created on demand
         if self.widgetType in [self.TYPE.COMBO, self.TYPE.INTCOMBO, self.TYPE.FLOATCOMBO]:
             return self.combo
         elif self.widgetType == self.TYPE.TEXT:
@@ -1357,8 +2203,11 @@ class Parameter():
     def addItem(self, value):
         # should only be called for WIDGETCOMBO settings
         if self.validateComboInput(value):
-            if self.combo.findText(str(value)) == -1: # only add item if not already in list
-                self.combo.insertItem(self.combo.count(), str(value))
+            if str(value) not in self.items: # only add item if not already in list
+                if self.widgetCreated:
+                    self.combo.insertItem(self.combo.count(), str(value))
+                else:
+                    self._items.append(str(value)) # used when widget is created
                 self.value = value
 
     def removeCurrentItem(self):
@@ -1470,6 +2319,231 @@ class Setting(QTreeWidgetItem, Parameter):
             else: # save non internal parameters to file
                 self._parent.saveSettings(default=True)
 
+class ValueStore():
+    """Model layer for the values and monitors of all :class:`channels<esibd.core.Channel>` of a :class:`~esibd.plugins.ChannelManager`.
+    Numeric values and monitors are kept in a NumPy array and are read without accessing Qt widgets, e.g. in :meth:`~esibd.plugins.Device.appendData`.
+    Acquisition threads can write values using :meth:`~esibd.core.ValueStore.write`, which only waits while the slots are rearranged by :meth:`~esibd.core.ValueStore.compact`.
+    Indicator widgets are views of the store and are refreshed at display rate by the :class:`~esibd.core.WidgetRefreshCoordinator`.
+    Editable widgets, e.g. of input channels, remain the source of user input and update the store immediately."""
+
+    VALUE   = 0
+    MONITOR = 1
+
+    def __init__(self, manager, capacity=64):
+        """
+        :param manager: The channel manager that owns the store.
+        :type manager: :class:`~esibd.plugins.ChannelManager`
+        :param capacity: Initial number of channels, grows as needed, defaults to 64
+        :type capacity: int, optional
+        """
+        self.manager = manager
+        self.data = np.full((2, capacity), np.nan)
+        self.pendingRefresh = np.zeros((2, capacity), dtype=bool) # widget needs to show new value
+        self.pendingEvents = np.zeros((2, capacity), dtype=bool) # value has been written by a thread, events not yet triggered
+        self.parameters = [[None]*capacity, [None]*capacity]
+        self.channels = [] # slot -> channel
+        self.refreshing = False
+        self.layoutLock = threading.Lock() # slots and arrays are replaced together by compact, uncontended otherwise
+
+    def register(self, channel, parameters):
+        """Assigns a slot to a channel and binds its value and monitor parameters. Call from main thread.
+
+        :param channel: The channel.
+        :type channel: :class:`~esibd.core.Channel`
+        :param parameters: Value and monitor parameters, use None if not applicable.
+        :type parameters: [:class:`~esibd.core.Parameter`, :class:`~esibd.core.Parameter`]
+        :return: The slot of the channel.
+        :rtype: int
+        """
+        if len(self.channels) == self.data.shape[1]:
+            self.compact()
+        slot = len(self.channels)
+        self.channels.append(channel)
+        for field, parameter in enumerate(parameters):
+            self.parameters[field][slot] = parameter
+            if parameter is not None:
+                parameter.store, parameter.storeField, parameter.storeSlot = self, field, slot
+        return slot
+
+    def compact(self):
+        """Releases slots of channels that have been removed from the manager and grows the store if needed.
+        Removed channels fall back to their widgets."""
+        active = {id(channel) for channel in self.manager.channels}
+        channels = [channel for channel in self.channels if id(channel) in active]
+        for slot, channel in enumerate(self.channels):
+            if id(channel) not in active:
+                channel.valueSlot = None
+                for field in [self.VALUE, self.MONITOR]:
+                    if self.parameters[field][slot] is not None:
+                        self.parameters[field][slot].store = None
+        capacity = max(64, 2*len(channels) + 1)
+        with self.layoutLock: # writes have to use either old or new slots and arrays consistently
+            data = np.full((2, capacity), np.nan)
+            pendingRefresh = np.zeros((2, capacity), dtype=bool)
+            pendingEvents = np.zeros((2, capacity), dtype=bool)
+            parameters = [[None]*capacity, [None]*capacity]
+            for slot, channel in enumerate(channels):
+                data[:, slot] = self.data[:, channel.valueSlot]
+                pendingRefresh[:, slot] = True
+                pendingEvents[:, slot] = self.pendingEvents[:, channel.valueSlot]
+                for field in [self.VALUE, self.MONITOR]:
+                    parameter = self.parameters[field][channel.valueSlot]
+                    parameters[field][slot] = parameter
+                    if parameter is not None:
+                        parameter.storeSlot = slot
+                channel.valueSlot = slot
+            self.data, self.pendingRefresh, self.pendingEvents, self.parameters, self.channels = data, pendingRefresh, pendingEvents, parameters, channels
+
+    def get(self, parameter):
+        return self.data[parameter.storeField, parameter.storeSlot]
+
+    def set(self, parameter, value):
+        """Sets the value of an indicator from the main thread. Events are triggered immediately, the widget is updated on next refresh.
+
+        :param parameter: A parameter bound to the store.
+        :type parameter: :class:`~esibd.core.Parameter`
+        :param value: New value.
+        :type value: float
+        """
+        value = np.nan if value is None else float(value)
+        field, slot = parameter.storeField, parameter.storeSlot
+        old = self.data[field, slot]
+        self.data[field, slot] = value
+        if not (old == value or (np.isnan(old) and np.isnan(value))):
+            self.pendingRefresh[field, slot] = True
+            self.pendingEvents[field, slot] = False
+            parameter.changedEvent()
+
+    def sync(self, parameter):
+        """Copies the value of an editable widget to the store, e.g. after user input."""
+        self.data[parameter.storeField, parameter.storeSlot] = parameter.spin.value()
+
+    def write(self, field, channels, values, measuredTime):
+        """Writes values of multiple channels without accessing widgets. Can be called from any thread.
+        Events and widget updates are executed by :meth:`~esibd.core.ValueStore.dispatchEvents` and :meth:`~esibd.core.ValueStore.refresh` in the main thread.
+
+        :param field: :attr:`~esibd.core.ValueStore.VALUE` or :attr:`~esibd.core.ValueStore.MONITOR`
+        :type field: int
+        :param channels: Channels that correspond to values.
+        :type channels: [:class:`~esibd.core.Channel`]
+        :param values: New values.
+        :type values: numpy.array
+        :param measuredTime: Time of the reading in s since epoch.
+        :type measuredTime: float
+        :return: Mask of values that could not be written as the corresponding channels are not bound to the store.
+        :rtype: numpy.array
+        """
+        for channel in channels:
+            channel.measuredTime = measuredTime
+        with self.layoutLock: # slots and arrays may be replaced by compact in main thread
+            slots = np.array([-1 if channel.valueSlot is None or self.parameters[field][channel.valueSlot] is None or not self.parameters[field][channel.valueSlot].storeBound
+                              else channel.valueSlot for channel in channels], dtype=np.int64)
+            bound = slots >= 0
+            slots = slots[bound]
+            old = self.data[field, slots]
+            new = values[bound]
+            changed = ~((old == new) | (np.isnan(old) & np.isnan(new)))
+            self.data[field, slots] = new
+            self.pendingEvents[field, slots[changed]] = True
+            self.pendingRefresh[field, slots[changed]] = True
+        return ~bound
+
+    def dispatchEvents(self):
+        """Triggers events of values that have been written by threads. Call from main thread."""
+        fields, slots = np.nonzero(self.pendingEvents)
+        self.pendingEvents[fields, slots] = False
+        for field, slot in zip(fields, slots):
+            parameter = self.parameters[field][slot]
+            if parameter is not None and parameter.storeBound:
+                parameter.changedEvent()
+
+    def refresh(self):
+        """Updates widgets that do not show the current value if they are in a visible row of the channel tree. Call from main thread at display rate.
+
+        :return: Number of updated widgets and number of widgets that remain marked as they are not visible.
+        :rtype: int, int
+        """
+        self.dispatchEvents()
+        if not self.pendingRefresh.any():
+            return 0, 0
+        tree = self.manager.tree
+        if tree is None or not tree.isVisible():
+            return 0, int(np.count_nonzero(self.pendingRefresh)) # update when tree becomes visible
+        viewport = tree.viewport().rect()
+        fields, slots = np.nonzero(self.pendingRefresh)
+        updates = 0
+        self.refreshing = True # widget changes should not trigger events again
+        tree.setUpdatesEnabled(False) # repaint once after all widgets are updated
+        try:
+            for field, slot in zip(fields, slots):
+                parameter = self.parameters[field][slot]
+                if parameter is None or not parameter.storeBound or parameter.spin is None:
+                    self.pendingRefresh[field, slot] = False
+                    continue
+                try:
+                    rect = tree.visualItemRect(self.channels[slot]) # empty if row is hidden
+                    if rect.isEmpty() or not rect.intersects(viewport):
+                        continue # keep marked
+                    parameter.spin.setValue(self.data[field, slot])
+                    if not parameter.indicator: # limits of editable widgets apply
+                        self.sync(parameter)
+                    updates += 1
+                except RuntimeError:
+                    pass # widget has been deleted
+                self.pendingRefresh[field, slot] = False
+        finally:
+            self.refreshing = False
+            tree.setUpdatesEnabled(True)
+        return updates, fields.shape[0] - updates
+
+class WidgetRefreshCoordinator():
+    """Refreshes the widgets of all :class:`ValueStores<esibd.core.ValueStore>` from a single timer at a configurable rate.
+    Only widgets in visible rows of channel trees are updated. Widgets in hidden rows, collapsed or scrolled out of view, stay marked
+    and are updated as soon as they become visible. Channels that have not created their widgets yet are realized when they become visible. Values and events are not affected and are processed at the full acquisition rate."""
+
+    def __init__(self, rate=10):
+        """
+        :param rate: Refresh rate in Hz, defaults to 10
+        :type rate: float, optional
+        """
+        self.stores = []
+        self.updates = 0 # number of widget updates
+        self.deferred = 0 # number of widget updates postponed as rows were not visible
+        self.realized = 0 # number of channels for which widgets have been created on demand
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.refresh)
+        self.setRate(rate)
+
+    def setRate(self, rate):
+        """Sets the refresh rate.
+
+        :param rate: Refresh rate in Hz.
+        :type rate: float
+        """
+        self.rate = rate
+        self.timer.start(int(1000/max(rate, 1)))
+
+    def register(self, store):
+        if store not in self.stores:
+            self.stores.append(store)
+
+    def unregister(self, store):
+        if store in self.stores:
+            self.stores.remove(store)
+
+    def refresh(self):
+        for store in self.stores:
+            self.realized += store.manager.realizeVisibleChannels()
+            updates, deferred = store.refresh()
+            self.updates += updates
+            self.deferred += deferred
+
+    def report(self):
+        return f'Widget refresh: {self.rate:g} Hz, {len(self.stores)} channel trees, updated {self.updates}, deferred {self.deferred}, created widgets for {self.realized} channels.'
+
+    def stop(self):
+        self.timer.stop()
+
 class RelayChannel():
 
     def getRecordingData(self):
@@ -1485,8 +2559,14 @@ class RelayChannel():
     def recording(self):
         return self.sourceChannel.getDevice().recording if self.sourceChannel is not None else False
 
-    def getValues(self, length=None, _min=None, _max=None, n=1, subtractBackground=None):
-        return self.sourceChannel.getValues(length, _min, _max, n, subtractBackground) if self.sourceChannel is not None else None
+    def getValues(self, length=None, _min=None, _max=None, n=1, subtractBackground=None, tier=0):
+        return self.sourceChannel.getValues(length, _min, _max, n, subtractBackground, tier) if self.sourceChannel is not None else None
+
+    def getTimes(self):
+        return self.sourceChannel.getTimes() if self.sourceChannel is not None else None
+
+    def getValuesInWindow(self, t_start, t_end, subtractBackground=None):
+        return self.sourceChannel.getValuesInWindow(t_start, t_end, subtractBackground) if self.sourceChannel is not None else None
 
     @property
     def value(self):
@@ -1663,14 +2743,21 @@ class Channel(QTreeWidgetItem):
         if hasattr(self.device, 'logY'):
             self.logY = self.device.logY
         self.tree = tree # may be None for internal default channels
+        self.lazyWidgets = self.tree is not None and (self.device.lazyWidgets if hasattr(self.device, 'lazyWidgets') else False)
+        self.realized = False # True once widgets have been created
         self.plotCurve = None
         self.rowHeight = QLineEdit().sizeHint().height() - 4
         self.signalComm = self.SignalCommunicate()
         self.signalComm.updateValueSignal.connect(self.updateValueParallel)
         self.lastAppliedValue = None # keep track of last value to identify what has changed
         self.parameters = []
+        self.parameterCache = {} # name -> parameter, avoids searching parameters on every attribute access
+        self.valueStore = None
+        self.valueSlot = None
         self.displayedParameters = []
-        self.values = DynamicNp(max_size=self.device.maxDataPoints if hasattr(self.device, 'maxDataPoints') else None)
+        self.values = self.createHistory(max_size=self.device.maxDataPoints if hasattr(self.device, 'maxDataPoints') else None)
+        self.times = None # only used if device stores time stamps per channel
+        self.measuredTime = None # time of last reading as provided by the controller
         self.inout = self.device.inout if hasattr(self.device, 'inout') else INOUT.NONE
         self.controller = None
         self.defaultStyleSheet = None # will be initialized when color is set
@@ -1679,7 +2766,7 @@ class Channel(QTreeWidgetItem):
 
         if self.inout != INOUT.NONE and self.useBackgrounds:
                 # array of background history. managed by instrument manager to keep timing synchronous
-                self.backgrounds = DynamicNp(max_size=self.device.maxDataPoints if hasattr(self.device, 'maxDataPoints') else None)
+                self.backgrounds = self.createHistory(max_size=self.device.maxDataPoints if hasattr(self.device, 'maxDataPoints') else None)
 
         # self.value = None # will be replaced by wrapper
         # generate property for direct access of parameter values
@@ -1700,6 +2787,10 @@ class Channel(QTreeWidgetItem):
                                                     instantUpdate=default[Parameter.INSTANTUPDATE] if Parameter.INSTANTUPDATE in default else True,
                                                     itemWidget=self, index=i, tree=self.tree,
                                                     event=default[Parameter.EVENT] if Parameter.EVENT in default else None))
+        if self.tree is not None and hasattr(self.device, 'valueStore'): # internal default channels are not stored
+            self.valueStore = self.device.valueStore
+            self.valueSlot = self.valueStore.register(self, [next((parameter for parameter in self.parameters if parameter.name == name), None) for name in [self.VALUE, self.MONITOR]])
+
     HEADER      = 'HEADER'
     SELECT      = 'Select'
     COLLAPSE    = 'Collapse'
@@ -1717,6 +2808,8 @@ class Channel(QTreeWidgetItem):
     DISPLAYGROUP= 'Group'
     SCALING     = 'Scaling'
     COLOR       = 'Color'
+    STORAGE     = 'Storage'
+    RESOLUTION  = 'Resolution'
     MIN         = 'Min'
     MAX         = 'Max'
     OPTIMIZE    = 'Optimize'
@@ -1813,6 +2906,13 @@ class Channel(QTreeWidgetItem):
         if self.useBackgrounds:
             channel[self.BACKGROUND] = parameterDict(value=0, widgetType=Parameter.TYPE.FLOAT, advanced=False,
                                 header='BG      ', attr='background')
+        if self.inout != INOUT.NONE:
+            channel[self.STORAGE ] = parameterDict(value=StorageCodec.FLOAT32, widgetType=Parameter.TYPE.COMBO, advanced=True, attr='storage', event=lambda: self.storageChanged(),
+                                    items=', '.join(StorageCodec.DTYPES.keys()), fixedItems=True,
+                                    toolTip=f'Data type used to store history. {StorageCodec.INT16} and {StorageCodec.INT32} store multiples of resolution.\n' +
+                                    f'{StorageCodec.LOG10} is suitable for positive values spanning many orders of magnitude, e.g. pressures.')
+            channel[self.RESOLUTION] = parameterDict(value=0.001, widgetType=Parameter.TYPE.FLOAT, advanced=True, attr='resolution', event=lambda: self.storageChanged(),
+                                    toolTip=f'Resolution used to store history for {StorageCodec.INT16} and {StorageCodec.INT32}.')
         return channel
 
     def getSortedDefaultChannel(self):
@@ -1847,6 +2947,9 @@ class Channel(QTreeWidgetItem):
             self.insertDisplayedParameter(self.OPTIMIZE, before=self.DISPLAY)
         if self.inout != INOUT.NONE and self.useBackgrounds:
             self.insertDisplayedParameter(self.BACKGROUND, before=self.DISPLAY)
+        if self.inout != INOUT.NONE:
+            self.insertDisplayedParameter(self.STORAGE, before=self.SCALING)
+            self.insertDisplayedParameter(self.RESOLUTION, before=self.SCALING)
 
     def tempParameters(self):
         """List of parameters, such as live signal or status, that will not be saved and restored."""
@@ -1860,9 +2963,13 @@ class Channel(QTreeWidgetItem):
         return tempParameters
 
     def getParameterByName(self, name):
-        parameter = next((parameter for parameter in self.parameters if parameter.name.strip().lower() == name.strip().lower()), None)
+        parameter = self.parameterCache.get(name)
         if parameter is None:
-            self.print(f'Could not find parameter {name}.', PRINT.WARNING)
+            parameter = next((parameter for parameter in self.parameters if parameter.name.strip().lower() == name.strip().lower()), None)
+            if parameter is None:
+                self.print(f'Could not find parameter {name}.', PRINT.WARNING)
+            else:
+                self.parameterCache[name] = parameter
         return parameter
 
     def asDict(self, temp=False):
@@ -1890,7 +2997,8 @@ class Channel(QTreeWidgetItem):
             self.device.pluginManager.DeviceManager.globalUpdate(inout=self.inout)
 
     def collapseChanged(self, toggle=True):
-        self.getParameterByName(self.COLLAPSE).getWidget().setIcon(self.device.makeCoreIcon('toggle-small-expand.png' if self.collapse else 'toggle-small.png'))
+        if self.realized: # otherwise icon will be set in initWidgets
+            self.getParameterByName(self.COLLAPSE).getWidget().setIcon(self.device.makeCoreIcon('toggle-small-expand.png' if self.collapse else 'toggle-small.png'))
         if toggle and not self.device.loading: # otherwise only update icon
             self.device.toggleAdvanced()
 
@@ -1912,10 +3020,49 @@ class Channel(QTreeWidgetItem):
             self.values.add(x=self.monitor if (self.useMonitors and self.enabled and self.real) else self.value, lenT=lenT)
         if self.useBackgrounds:
             self.backgrounds.add(x=self.background, lenT=lenT)
+        if getattr(self.device, 'timestampMode', None) == getattr(self.device, 'CHANNELTIME', None):
+            if self.times is None:
+                self.times = self.createTimeHistory()
+            self.times.add(x=self.measuredTime if self.measuredTime is not None else time.time(), lenT=lenT)
+        else:
+            self.times = None
+
+    def createTimeHistory(self):
+        """Returns a history for time stamps of this channel, initialized with the time axis of the device to stay aligned."""
+        if self.device.historyMode == self.device.COLUMNAR: # columns use float32, time stamps need float64
+            return DynamicNp(initialData=self.device.time.get(), max_size=self.device.maxDataPoints, dtype=np.float64)
+        return self.device.createHistory(initialData=self.device.time.get(), max_size=self.device.maxDataPoints, dtype=np.float64)
+
+    def getTimes(self):
+        """Returns the time stamps of the channel if stored per channel and the time axis of the device otherwise."""
+        return self.times.get() if self.times is not None else self.device.time.get()
+
+    def getValuesInWindow(self, t_start, t_end, subtractBackground=None):
+        """Returns values measured between t_start and t_end, e.g. to average all samples within the dwell time of a scan step.
+
+        :param t_start: Start of window in s since epoch.
+        :type t_start: float
+        :param t_end: End of window in s since epoch.
+        :type t_end: float
+        :param subtractBackground: Indicates if background should be subtracted, defaults to None
+        :type subtractBackground: bool, optional
+        :return: Values within window.
+        :rtype: numpy.array
+        """
+        times = self.getTimes()
+        values = self.getValues(subtractBackground=subtractBackground)
+        length = min(times.shape[0], values.shape[0]) # align most recent values
+        times, values = times[times.shape[0]-length:], values[values.shape[0]-length:]
+        return values[np.searchsorted(times, t_start, side='left'):np.searchsorted(times, t_end, side='right')]
 
-    def getValues(self, length=None, _min=None, _max=None, n=1, subtractBackground=None): # pylint: disable = unused-argument # use consistent arguments for all versions of getValues
+    def getValues(self, length=None, _min=None, _max=None, n=1, subtractBackground=None, tier=0): # pylint: disable = unused-argument # use consistent arguments for all versions of getValues
         """Returns plain Numpy array of values.
-        Note that background subtraction only affects what is displayed, the raw signal and background curves are always retained."""
+        Note that background subtraction only affects what is displayed, the raw signal and background curves are always retained.
+        Tiers other than 0 are only available for :class:`~esibd.core.TieredNp` histories."""
+        if tier > 0:
+            if self.useBackgrounds and subtractBackground:
+                return self.values.get(length=length, _min=_min, _max=_max, n=n, tier=tier) - self.backgrounds.get(length=length, _min=_min, _max=_max, n=n, tier=tier)
+            return self.values.get(length=length, _min=_min, _max=_max, n=n, tier=tier)
         if self.useBackgrounds and subtractBackground:
             return self.values.get(length=length, _min=_min, _max=_max, n=n) - self.backgrounds.get(length=length, _min=_min, _max=_max, n=n)
         else:
@@ -1923,10 +3070,44 @@ class Channel(QTreeWidgetItem):
 
     def clearHistory(self, max_size=None): # overwrite as needed, e.g. when keeping history of more than one parameter
         if self.device.pluginManager.DeviceManager is not None and (self.device.pluginManager.Settings is not None and not self.device.pluginManager.Settings.loading):
-            self.values = DynamicNp(max_size=max_size if max_size is not None else 600000/int(self.device.interval)) # 600000 -> only keep last 10 min to save ram unless otherwise specified
+            if isinstance(self.values, ColumnNp):
+                self.values.release() # reuse column instead of adding a new one
+            self.values = self.createHistory(max_size=max_size if max_size is not None else 600000/int(self.device.interval)) # 600000 -> only keep last 10 min to save ram unless otherwise specified
+            self.times = None # recreated from time axis of device on next append
         self.clearPlotCurve()
         if self.useBackgrounds:
-            self.backgrounds = DynamicNp(max_size=max_size)
+            if isinstance(self.backgrounds, ColumnNp):
+                self.backgrounds.release()
+            self.backgrounds = self.createHistory(max_size=max_size)
+
+    def createHistory(self, initialData=None, max_size=None, dtype=np.float32):
+        """Returns a new history container using the history mode of the device and the storage codec of the channel if applicable."""
+        if hasattr(self.device, 'createHistory'):
+            return self.device.createHistory(initialData=initialData, max_size=max_size, dtype=dtype, codec=self.getStorageCodec())
+        return DynamicNp(initialData=initialData, max_size=max_size, dtype=dtype)
+
+    def getStorageCodec(self):
+        """Returns the :class:`~esibd.core.StorageCodec` used to store the history or None if the default float32 is used."""
+        if self.STORAGE not in [parameter.name for parameter in self.parameters] or self.storage == StorageCodec.FLOAT32:
+            return None # parameters not yet initialized or default
+        return StorageCodec(codec=self.storage, resolution=self.resolution)
+
+    def getStorageBytes(self):
+        """Returns the number of bytes used to store a single value."""
+        codec = self.getStorageCodec()
+        return 4 if codec is None else codec.itemsize
+
+    def storageChanged(self):
+        """Converts existing history to the selected storage codec."""
+        if self.inout == INOUT.NONE or isinstance(self.values, (TieredNp, ColumnNp)):
+            return # tiered and columnar histories do not use codecs
+        if self.values.codec == self.getStorageCodec():
+            return # avoid copying history, e.g. when channels are initialized with the default codec
+        self.values = self.createHistory(initialData=self.values.get(), max_size=self.values.max_size)
+        if self.useBackgrounds:
+            self.backgrounds = self.createHistory(initialData=self.backgrounds.get(), max_size=self.backgrounds.max_size)
+        if hasattr(self.device, 'estimateStorage') and not self.loading:
+            self.device.estimateStorage()
 
     def clearPlotCurve(self):
         if self.plotCurve is not None:
@@ -1962,7 +3143,7 @@ class Channel(QTreeWidgetItem):
         qb = QBrush(color)
         for i in range(len(self.parameters)+1): # use highest index
             self.setBackground(i, qb) # use correct color even when widgets are hidden
-        for parameter in self.parameters:
+        for parameter in self.parameters if self.realized else []: # widgets will be colored when created
             widget = parameter.getWidget()
             widget.container.setStyleSheet(f'background-color: {color.name()};')
             if isinstance(widget, QToolButton):
@@ -1995,8 +3176,9 @@ class Channel(QTreeWidgetItem):
                 self.rowHeight = normalHeight*4
             case 'huge':
                 self.rowHeight = normalHeight*6
-        for parameter in self.parameters:
-            parameter.setHeight(self.rowHeight)
+        if self.realized:
+            for parameter in self.parameters:
+                parameter.setHeight(self.rowHeight)
         if not self.loading:
             self.tree.scheduleDelayedItemsLayout()
 
@@ -2006,9 +3188,10 @@ class Channel(QTreeWidgetItem):
         # return super().sizeHint(option, index)
 
     def realChanged(self):
-        self.getParameterByName(self.ENABLED).getWidget().setVisible(self.real)
-        if self.useMonitors:
-            self.getParameterByName(self.MONITOR).getWidget().setVisible(self.real)
+        if self.realized: # otherwise visibility will be applied in realize
+            self.getParameterByName(self.ENABLED).getWidget().setVisible(self.real)
+            if self.useMonitors:
+                self.getParameterByName(self.MONITOR).getWidget().setVisible(self.real)
         if not self.device.loading:
             self.device.pluginManager.DeviceManager.globalUpdate(inout=self.inout)
 
@@ -2036,15 +3219,20 @@ class Channel(QTreeWidgetItem):
     def updateWarningState(self, warn):
         if warn != self.warningState:
             self.warningState = warn
-            self.getParameterByName(self.MONITOR).getWidget().setStyleSheet(self.warningStyleSheet if warn else self.defaultStyleSheet)
+            if self.realized: # otherwise style will be applied in realize
+                self.getParameterByName(self.MONITOR).getWidget().setStyleSheet(self.warningStyleSheet if warn else self.defaultStyleSheet)
 
 
     def initGUI(self, item):
         """Call after item has been added to tree.
         Item needs parent for all graphics operations.
+        If the device uses :attr:`~esibd.plugins.ChannelManager.lazyWidgets`, only values are initialized here
+        and widgets are created by :meth:`~esibd.core.Channel.realize` once they are needed.
         """
-        for parameter in self.parameters:
-            parameter.applyWidget()
+        self.realized = not self.lazyWidgets
+        if self.realized:
+            for parameter in self.parameters:
+                parameter.applyWidget()
         for name, default in self.getSortedDefaultChannel().items():
             # add default value if not found in file. Will be saved to file later.
             if name in item and name not in self.tempParameters():
@@ -2055,6 +3243,47 @@ class Channel(QTreeWidgetItem):
                     self.print(f'Added missing parameter {name} to channel {item[self.NAME]} using default value {default[self.VALUE]}.')
                     self.device.channelsChanged = True
 
+        if self.realized:
+            self.initWidgets()
+        if self.inout != INOUT.NONE:
+            self.updateColor()
+            if self.realized:
+                self.realChanged()
+            self.storageChanged()
+            if self.inout == INOUT.IN:
+                self.updateMin()
+                self.updateMax()
+        self.scalingChanged()
+
+    def realize(self):
+        """Creates the widgets of all parameters and lets them show the current values.
+        Called when the channel is scrolled into view or when a widget is accessed, see :attr:`~esibd.plugins.ChannelManager.lazyWidgets`."""
+        if self.realized or not self.lazyWidgets:
+            return
+        self.realized = True
+        loading = self.device._loading # restore state of caller, realize may be triggered while loading
+        self.device.loading = True # only update widgets, events have been handled when values were set
+        try:
+            for parameter in self.parameters:
+                value = parameter.value
+                parameter.applyWidget()
+                parameter.value = value
+                self.setText(parameter.index, '') # remove placeholder
+            self.initWidgets()
+            if self.inout != INOUT.NONE:
+                self.updateColor()
+                self.realChanged()
+                if self.useMonitors and self.warningState:
+                    self.getParameterByName(self.MONITOR).getWidget().setStyleSheet(self.warningStyleSheet)
+                if self.inout == INOUT.IN:
+                    self.updateMin()
+                    self.updateMax()
+            self.scalingChanged()
+        finally:
+            self.device._loading = loading
+
+    def initWidgets(self):
+        """Customizes widgets after they have been created. Extend to customize additional widgets."""
         if self.inout != INOUT.NONE and self.EQUATION in self.displayedParameters:
             line = self.getParameterByName(self.EQUATION).line
             line.setMinimumWidth(200)
@@ -2083,19 +3312,21 @@ class Channel(QTreeWidgetItem):
             collapse.value = initialValue
             collapse.getWidget().setIcon(self.device.makeCoreIcon('toggle-small-expand.png' if self.collapse else 'toggle-small.png'))
 
-        if self.inout != INOUT.NONE:
-            self.updateColor()
-            self.realChanged()
-            if self.inout == INOUT.IN:
-                self.updateMin()
-                self.updateMax()
-        self.scalingChanged()
-
     def updateMin(self):
-        self.getParameterByName(self.VALUE).spin.setMinimum(self.min)
+        value = self.getParameterByName(self.VALUE)
+        value.min = self.min
+        if value.spin is not None:
+            value.spin.setMinimum(self.min)
+        else:
+            value.value = value.value # apply limit
 
     def updateMax(self):
-        self.getParameterByName(self.VALUE).spin.setMaximum(self.max)
+        value = self.getParameterByName(self.VALUE)
+        value.max = self.max
+        if value.spin is not None:
+            value.spin.setMaximum(self.max)
+        else:
+            value.value = value.value # apply limit
 
     def onDelete(self):
         """Extend to handle events on deleting. E.g. handle references that should remain available."""
@@ -3441,29 +4672,133 @@ class SciAxisItem(pg.AxisItem): # pylint: disable = abstract-method
                 dstrings.append(e)
         return dstrings
 
+class LockProfiler():
+    """Records how long threads wait for and hold each :class:`~esibd.core.TimeoutLock` while enabled.
+    Used to identify which device or plugin is blocking others, e.g. acquisition threads waiting for an export.
+    Disabled by default, as recording adds a small overhead to every hardware transaction.
+    Use :meth:`~esibd.core.PluginManager.showLockProfile` to view results or :meth:`~esibd.core.LockProfiler.dump` to save them to a file."""
+
+    def __init__(self):
+        self.enabled = False
+        self.stats = {} # (lock name, thread name, label) -> [count, timeouts, total wait, max wait, total hold, max hold] in s
+        self.holders = {} # lock -> (thread name, label, time acquired)
+        self._lock = threading.Lock()
+
+    def acquired(self, lock, label):
+        with self._lock:
+            self.holders[lock] = (current_thread().name, label, time.perf_counter())
+
+    def record(self, lock, label, wait, hold, acquired=True):
+        """Adds a single use of a lock to the statistics.
+
+        :param lock: The lock.
+        :type lock: :class:`~esibd.core.TimeoutLock`
+        :param label: Name of the function that used the lock.
+        :type label: str
+        :param wait: Time waited for the lock in s.
+        :type wait: float
+        :param hold: Time the lock has been held in s.
+        :type hold: float
+        :param acquired: False if the lock could not be acquired before timeout, defaults to True
+        :type acquired: bool, optional
+        """
+        key = (lock.name, current_thread().name, label)
+        with self._lock:
+            if acquired:
+                self.holders.pop(lock, None)
+            stats = self.stats.setdefault(key, [0, 0, 0, 0, 0, 0])
+            stats[0] += 1
+            stats[1] += 0 if acquired else 1
+            stats[2] += wait
+            stats[3] = max(stats[3], wait)
+            stats[4] += hold
+            stats[5] = max(stats[5], hold)
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+
+    def report(self):
+        """Returns statistics sorted by total wait time and the current holder of each lock."""
+        with self._lock:
+            stats = sorted(self.stats.items(), key=lambda item: item[1][2], reverse=True)
+            now = time.perf_counter()
+            holders = [f'{lock.name}: held by {thread} in {label} for {(now-start)*1000:.1f} ms' for lock, (thread, label, start) in self.holders.items()]
+        lines = [f'Lock profiling {"enabled" if self.enabled else "disabled"}.',
+                 'lock | thread | function | count | timeouts | wait total, mean, max (ms) | hold total, mean, max (ms)']
+        for (lockName, thread, label), (count, timeouts, wait, maxWait, hold, maxHold) in stats:
+            lines.append(f'{lockName} | {thread} | {label} | {count} | {timeouts} | {wait*1000:.1f}, {wait/count*1000:.2f}, {maxWait*1000:.1f} | '
+                         f'{hold*1000:.1f}, {hold/count*1000:.2f}, {maxHold*1000:.1f}')
+        if holders:
+            lines.append('Currently held:')
+            lines.extend(holders)
+        return '\n'.join(lines)
+
+    def dump(self, file):
+        """Saves the report to a text file.
+
+        :param file: File path.
+        :type file: pathlib.Path | str
+        """
+        with open(file, 'w', encoding='utf-8') as profileFile:
+            profileFile.write(f'{datetime.now():%Y-%m-%d %H:%M:%S}\n{self.report()}\n')
+
+lockProfiler = LockProfiler()
+"""Shared :class:`~esibd.core.LockProfiler` of all :class:`~esibd.core.TimeoutLock` instances."""
+
 class TimeoutLock(object):
     """A Lock that allows to specify a timeout inside a with statement.
-    Can be used as normal Lock or optionally using 'with self.lock.acquire_timeout(1) as lock_acquired:'"""
+    Can be used as normal Lock or optionally using 'with self.lock.acquire_timeout(1) as lock_acquired:'
+    Wait and hold times are recorded by the :class:`~esibd.core.LockProfiler` when enabled."""
     # based on https://stackoverflow.com/questions/16740104/python-lock-with-statement-and-timeout
     def __init__(self, _parent):
         self._lock = threading.Lock()
         self._parent = _parent
         self.print = _parent.print
+        self._name = None
+        self._profile = None
+
+    @property
+    def name(self):
+        """Name of the lock used by the :class:`~esibd.core.LockProfiler`, based on the plugin or channel that owns the lock."""
+        if self._name is None:
+            parent = self._parent
+            if hasattr(parent, 'name'):
+                self._name = parent.name
+            elif getattr(parent, 'channel', None) is not None:
+                self._name = f'{parent.device.name} {parent.channel.name} {type(parent).__name__}'
+            elif getattr(parent, 'device', None) is not None:
+                self._name = f'{parent.device.name} {type(parent).__name__}'
+            else:
+                self._name = type(parent).__name__
+        return self._name
 
     def acquire(self, blocking=True, timeout=-1):
         return self._lock.acquire(blocking, timeout)
 
     @contextmanager
-    def acquire_timeout(self, timeout, timeoutMessage=None, lock_acquired=False):
+    def acquire_timeout(self, timeout, timeoutMessage=None, lock_acquired=False, label=None):
         """
         :param timeout: timeout in seconds
         :type timeout: float, optional
-        :param timeoutMessage: Message shown in case of a timeout
-        :type timeoutMessage: str, optional
+        :param timeoutMessage: Message shown in case of a timeout. Use a function returning the message if it is expensive to create, e.g. if it contains a stack trace.
+        :type timeoutMessage: str | callable, optional
         :param lock_acquired: True if lock has already been acquired in callstack. Use to prevent deadlocks
         :type lock_acquired: bool, optional
+        :param label: Name of the function using the lock shown by the :class:`~esibd.core.LockProfiler`. Defaults to the name of the calling function.
+        :type label: str, optional
         """
+        profiling = lockProfiler.enabled and not lock_acquired
+        if profiling:
+            label = label or sys._getframe(2).f_code.co_name # pylint: disable = protected-access # skip contextmanager frame, only evaluated while profiling
+            start = time.perf_counter()
         result = lock_acquired or self._lock.acquire(timeout=timeout)
+        if profiling:
+            acquired = time.perf_counter()
+            if result:
+                lockProfiler.acquired(self, label)
+            else:
+                lockProfiler.record(self, label, wait=acquired-start, hold=0, acquired=False)
         try:
             yield result
         except Exception as e:
@@ -3471,23 +4806,921 @@ class TimeoutLock(object):
             self._parent.errorCount += 1
         finally:
             if result and not lock_acquired:
+                if profiling:
+                    lockProfiler.record(self, label, wait=acquired-start, hold=time.perf_counter()-acquired)
                 self._lock.release()
             if self._parent.errorCount > 10:
                 if hasattr(self._parent, 'closeCommunication'):
                     self.print(f'Closing communication of {self._parent.name} after more than 10 consecutive errors.', flag=PRINT.ERROR) # {e}
                     self._parent.closeCommunication()
         if not result and timeoutMessage is not None:
-            self.print(timeoutMessage, flag=PRINT.ERROR)
+            self.print(timeoutMessage() if callable(timeoutMessage) else timeoutMessage, flag=PRINT.ERROR)
 
     def release(self):
         self._lock.release()
 
     def __enter__(self):
-        self._lock.__enter__()
+        if lockProfiler.enabled:
+            label = sys._getframe(1).f_code.co_name # pylint: disable = protected-access
+            start = time.perf_counter()
+            self._lock.__enter__()
+            self._profile = (label, start, time.perf_counter()) # only accessed by thread holding the lock
+            lockProfiler.acquired(self, label)
+        else:
+            self._lock.__enter__()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._profile is not None:
+            label, start, acquired = self._profile
+            self._profile = None
+            lockProfiler.record(self, label, wait=acquired-start, hold=time.perf_counter()-acquired)
         self._lock.__exit__(exc_type, exc_val, exc_tb)
 
+class LineFramer():
+    """Splits a stream of bytes into lines, independent of how the lines are split or combined across reads."""
+
+    def __init__(self, EOL='\n', encoding='utf-8'):
+        """
+        :param EOL: End of line character(s), defaults to '\\n'
+        :type EOL: str, optional
+        :param encoding: Encoding used to decode lines, defaults to 'utf-8'
+        :type encoding: str, optional
+        """
+        self.EOL = EOL.encode(encoding)
+        self.encoding = encoding
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """Adds received data and returns all lines that are complete.
+
+        :param data: Received data.
+        :type data: bytes
+        :return: Complete lines without EOL.
+        :rtype: list[str]
+        """
+        self.buffer.extend(data)
+        lines = []
+        while True:
+            index = self.buffer.find(self.EOL)
+            if index == -1:
+                return lines
+            lines.append(self.buffer[:index].decode(self.encoding, errors='replace'))
+            del self.buffer[:index+len(self.EOL)]
+
+    def reset(self):
+        """Discards incomplete data, e.g. after a timeout."""
+        self.buffer.clear()
+
+class SerialConnection():
+    """Asynchronous line based communication with a single serial port, see :class:`~esibd.core.SerialTransport`.
+    Received lines are assigned to pending requests in the order the requests have been sent.
+    Lines that are not requested, e.g. data streamed by the device, are queued and can be read using :meth:`~esibd.core.SerialConnection.readLine`."""
+
+    def __init__(self, transport, port, encoding='utf-8', EOL='\n'):
+        self.transport = transport
+        self.loop = transport.loop
+        self.port = port
+        self.encoding = encoding
+        self.framer = LineFramer(EOL=EOL, encoding=encoding)
+        self.pending = deque() # futures of requests waiting for a response
+        self.lines = deque() # unrequested lines
+        self.lineAvailable = None
+        self.pollTask = None
+        self.reader = False
+
+    async def open(self):
+        """Starts reading from the port. Uses a file descriptor based reader if supported and polling otherwise (e.g. on Windows)."""
+        self.lineAvailable = asyncio.Event()
+        try:
+            self.loop.add_reader(self.port.fileno(), self.onReadable)
+            self.reader = True
+        except (AttributeError, NotImplementedError, io.UnsupportedOperation, ValueError):
+            self.pollTask = self.loop.create_task(self.poll())
+
+    async def close(self):
+        if self.reader:
+            self.loop.remove_reader(self.port.fileno())
+            self.reader = False
+        if self.pollTask is not None:
+            self.pollTask.cancel()
+            self.pollTask = None
+        while self.pending:
+            self.pending.popleft().cancel()
+
+    def onReadable(self):
+        try:
+            self.receive(self.port.read(max(self.port.in_waiting, 1)))
+        except (OSError, serial.SerialException):
+            self.loop.remove_reader(self.port.fileno()) # port has been closed
+            self.reader = False
+
+    async def poll(self):
+        while True:
+            waiting = self.port.in_waiting
+            if waiting > 0:
+                self.receive(self.port.read(waiting))
+            else:
+                await asyncio.sleep(0.002)
+
+    def receive(self, data):
+        for line in self.framer.feed(data):
+            while self.pending and self.pending[0].done():
+                self.pending.popleft() # request timed out or has been cancelled
+            if self.pending:
+                self.pending.popleft().set_result(line)
+            else:
+                self.lines.append(line)
+                self.lineAvailable.set()
+
+    async def request(self, message, responses=1, timeout=2, clear=True):
+        """Writes a message and waits for the given number of response lines.
+
+        :param message: Message.
+        :type message: str
+        :param responses: Number of lines expected in response, defaults to 1
+        :type responses: int, optional
+        :param timeout: Timeout in s, defaults to 2
+        :type timeout: float, optional
+        :param clear: Discard unrequested lines before writing, similar to :meth:`~esibd.core.DeviceController.clearBuffer`, defaults to True
+        :type clear: bool, optional
+        :return: Responses
+        :rtype: list[str]
+        """
+        if clear:
+            self.lines.clear()
+            self.lineAvailable.clear()
+        futures = [self.loop.create_future() for _ in range(responses)]
+        self.pending.extend(futures)
+        self.port.write(message.encode(self.encoding))
+        if responses == 0:
+            return []
+        try:
+            return await asyncio.wait_for(asyncio.gather(*futures), timeout=timeout)
+        except asyncio.TimeoutError:
+            for future in futures:
+                future.cancel() # will be skipped when next line is received
+            return [future.result() if future.done() and not future.cancelled() else '' for future in futures]
+
+    async def nextLine(self, timeout=2):
+        while not self.lines:
+            self.lineAvailable.clear()
+            try:
+                await asyncio.wait_for(self.lineAvailable.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return ''
+        return self.lines.popleft()
+
+    def query(self, message, responses=1, timeout=2, clear=True):
+        """Thread safe version of :meth:`~esibd.core.SerialConnection.request`. Blocks the calling thread but not the event loop."""
+        return asyncio.run_coroutine_threadsafe(self.request(message, responses=responses, timeout=timeout, clear=clear), self.loop).result()
+
+    def write(self, message, clear=True):
+        """Thread safe write without waiting for a response. The response can be read using :meth:`~esibd.core.SerialConnection.readLine`."""
+        self.query(message, responses=0, clear=clear)
+
+    def readLine(self, timeout=2):
+        """Thread safe read of the next unrequested line. Returns an empty string after timeout, like pyserial."""
+        return asyncio.run_coroutine_threadsafe(self.nextLine(timeout=timeout), self.loop).result()
+
+    def readLines(self):
+        """Thread safe read of all unrequested lines received so far without waiting, e.g. to read data streamed by the device in bursts."""
+        lines = []
+        while self.lines: # popleft is atomic, lines can be added concurrently by the event loop
+            lines.append(self.lines.popleft())
+        return lines
+
+    @property
+    def waiting(self):
+        """Number of received lines that have not been read."""
+        return len(self.lines)
+
+class SerialTransport():
+    """Serves many serial ports from a single thread running an asyncio event loop.
+    Ports are read as soon as data arrives, independent of the threads that send requests.
+    :class:`DeviceControllers<esibd.core.DeviceController>` attach their port using :meth:`~esibd.core.DeviceController.attachSerialTransport`
+    after which :meth:`~esibd.core.DeviceController.serialWrite`, :meth:`~esibd.core.DeviceController.serialRead`, and
+    :meth:`~esibd.core.DeviceController.serialQuery` use the transport. Works with any object that provides the pyserial interface,
+    including ports opened on pseudo terminals for testing."""
+
+    def __init__(self):
+        self.loop = None
+        self.thread = None
+        self.connections = {} # id(port) -> SerialConnection
+
+    def start(self):
+        if self.loop is not None:
+            return
+        self.loop = asyncio.new_event_loop()
+        self.thread = Thread(target=self.loop.run_forever, name='serialTransportThread')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def attach(self, port, encoding='utf-8', EOL='\n'):
+        """Starts asynchronous reading from port.
+
+        :param port: Serial port.
+        :type port: serial.Serial
+        :param encoding: Encoding used for sending and receiving messages, defaults to 'utf-8'
+        :type encoding: str, optional
+        :param EOL: End of line character(s) used to separate messages, defaults to '\\n'
+        :type EOL: str, optional
+        :return: Connection
+        :rtype: :class:`~esibd.core.SerialConnection`
+        """
+        self.start()
+        self.detach(port)
+        connection = SerialConnection(transport=self, port=port, encoding=encoding, EOL=EOL)
+        asyncio.run_coroutine_threadsafe(connection.open(), self.loop).result()
+        self.connections[id(port)] = connection
+        return connection
+
+    def detach(self, port):
+        connection = self.connections.pop(id(port), None)
+        if connection is not None:
+            asyncio.run_coroutine_threadsafe(connection.close(), self.loop).result()
+
+    def getConnection(self, port):
+        return self.connections.get(id(port)) if port is not None else None
+
+    def shutdown(self):
+        if self.loop is not None:
+            for connection in list(self.connections.values()):
+                self.detach(connection.port)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.loop = None
+
+class PeriodicTimer():
+    """Repeats a loop at a fixed period using absolute deadlines based on time.monotonic.
+    In contrast to sleeping for the interval after each iteration, the period does not depend on the time needed for the work done in each iteration and does not drift.
+    Iterations that finish after their deadline are counted as overruns. If more than a whole period is lost, missed deadlines are skipped instead of catching up in a burst.
+
+    Usage::
+
+        timer = PeriodicTimer(interval=lambda: self.device.interval)
+        while acquiring():
+            ... # do work
+            timer.wait()
+    """
+
+    def __init__(self, interval, name=''):
+        """
+        :param interval: Interval in ms or function that returns the current interval in ms. Changes apply to the next deadline.
+        :type interval: float | callable
+        :param name: Name used in reports, typically the device name, defaults to ''
+        :type name: str, optional
+        """
+        self.interval = interval
+        self.name = name
+        self.deadline = time.monotonic()
+        self.count = 0 # number of iterations
+        self.overruns = 0 # number of iterations that finished after their deadline
+        self.skipped = 0 # number of deadlines skipped after overruns longer than the interval
+        self.lateness = 0 # lateness of last iteration in s
+        self.maxLateness = 0
+
+    def getInterval(self):
+        """Returns the current interval in s."""
+        return (self.interval() if callable(self.interval) else self.interval)/1000
+
+    def reset(self):
+        """Starts a new period now, e.g. after the loop has been paused."""
+        self.deadline = time.monotonic()
+
+    def wait(self):
+        """Sleeps until the next deadline. Returns immediately if the deadline has already passed."""
+        interval = self.getInterval()
+        self.deadline += interval
+        self.count += 1
+        self.lateness = time.monotonic() - self.deadline
+        if self.lateness <= 0:
+            time.sleep(-self.lateness)
+            return
+        self.overruns += 1
+        self.maxLateness = max(self.maxLateness, self.lateness)
+        if interval > 0 and self.lateness >= interval: # continue on the original grid after skipping missed deadlines
+            missed = int(self.lateness // interval)
+            self.skipped += missed
+            self.deadline += missed*interval
+
+    def report(self):
+        return f'{self.name}: interval {self.getInterval()*1000:.0f} ms, iterations {self.count}, overruns {self.overruns}, skipped {self.skipped}, lateness max {self.maxLateness*1000:.1f} ms, last {max(self.lateness, 0)*1000:.1f} ms'
+
+class CommandQueue():
+    """Sends commands of a :class:`~esibd.core.DeviceController` from a single worker thread in the order in which they have been queued.
+    Consecutive setpoints are sent as one batch. Setpoints of the same channel that are queued while waiting are coalesced.
+    As the value is read when it is sent, the last value wins. Setpoints are never moved across other commands, e.g. commands that turn outputs on or off."""
+
+    def __init__(self, name, applySetpoints, print):
+        """
+        :param name: Name of the worker thread, typically the device name.
+        :type name: str
+        :param applySetpoints: Function that applies the setpoints of a list of channels in a single transaction.
+        :type applySetpoints: callable
+        :param print: Function used to report errors.
+        :type print: callable
+        """
+        self.name = name
+        self.applySetpoints = applySetpoints
+        self.print = print
+        self.entries = deque() # lists of channels (setpoints) and functions (other commands)
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+        self.busy = False
+
+    def start(self):
+        """Starts the worker thread if needed. Call with condition acquired."""
+        self.running = True
+        if self.thread is None:
+            self.thread = Thread(target=self.run, name=f'{self.name} commandQueueThread')
+            self.thread.daemon = True
+            self.thread.start()
+
+    def putSetpoint(self, channel):
+        """Queues the setpoint of a channel.
+
+        :param channel: Channel with new setpoint.
+        :type channel: :class:`~esibd.core.Channel`
+        """
+        with self.condition:
+            if self.entries and isinstance(self.entries[-1], list): # add to pending batch
+                if not any(queued is channel for queued in self.entries[-1]):
+                    self.entries[-1].append(channel)
+            else:
+                self.entries.append([channel])
+            self.start()
+            self.condition.notify_all()
+
+    def putCommand(self, function):
+        """Queues a command that is executed after all previously queued setpoints and before all setpoints queued later.
+
+        :param function: Function that sends the command.
+        :type function: callable
+        """
+        with self.condition:
+            self.entries.append(function)
+            self.start()
+            self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and not self.entries:
+                    self.condition.wait()
+                if not self.running:
+                    self.thread = None # new thread will be started by next command
+                    return
+                entry = self.entries.popleft()
+                self.busy = True
+            try:
+                self.execute(entry)
+            finally:
+                self.done()
+
+    def execute(self, entry):
+        try:
+            if isinstance(entry, list):
+                self.applySetpoints(entry)
+            else:
+                entry()
+        except Exception as e: # pylint: disable = broad-except # keep worker alive, no control over hardware specific exceptions
+            self.print(f'Error while sending queued command: {e}', PRINT.ERROR)
+
+    def takeSetpoints(self):
+        """Removes the next batch of setpoints if no other command has to be sent before it.
+        Allows to combine setpoints with other communication, e.g. with the queries of the acquisition loop, in one round trip.
+        Call :meth:`~esibd.core.CommandQueue.done` after the setpoints have been sent.
+
+        :return: Channels with new setpoints, empty if no setpoints are due.
+        :rtype: [:class:`~esibd.core.Channel`]
+        """
+        with self.condition:
+            if self.busy or not self.entries or not isinstance(self.entries[0], list):
+                return []
+            self.busy = True # keep order with commands queued later
+            return self.entries.popleft()
+
+    def done(self):
+        """Marks the current entry as sent."""
+        with self.condition:
+            self.busy = False
+            self.condition.notify_all()
+
+    def flush(self, timeout=2):
+        """Waits until all queued commands have been sent.
+
+        :param timeout: Timeout in s, defaults to 2
+        :type timeout: float, optional
+        :return: True if all commands have been sent before timeout.
+        :rtype: bool
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.running or (not self.entries and not self.busy), timeout=timeout)
+
+    def sendPending(self):
+        """Sends all queued commands from the calling thread, e.g. if the worker thread did not send them in time."""
+        with self.condition:
+            entries = list(self.entries)
+            self.entries.clear()
+        for entry in entries:
+            self.execute(entry)
+
+    def stop(self):
+        """Discards pending commands and stops the worker thread. Use :meth:`~esibd.core.CommandQueue.flush` before to send pending commands."""
+        with self.condition:
+            if self.entries:
+                self.print(f'Discarding {len(self.entries)} queued commands.', PRINT.WARNING)
+            self.running = False
+            self.entries.clear()
+            self.condition.notify_all()
+
+class AcquisitionJob():
+    """A periodic job of the :class:`~esibd.core.AcquisitionScheduler`. Keeps track of the timing jitter of the job."""
+
+    def __init__(self, name, function, interval, print=None): # pylint: disable = redefined-builtin # print is consistent with other classes
+        """
+        :param name: Name used in reports, typically the device name.
+        :type name: str
+        :param function: Function that is executed periodically in a worker thread.
+        :type function: callable
+        :param interval: Function that returns the current interval in ms.
+        :type interval: callable
+        :param print: Function used to report errors, defaults to None
+        :type print: callable, optional
+        """
+        self.name = name
+        self.function = function
+        self.interval = interval
+        self.print = print
+        self.deadline = time.monotonic()
+        self.active = True
+        self.running = False
+        self.count = 0 # number of executions
+        self.skipped = 0 # number of deadlines missed because previous execution did not complete
+        self.jitter = 0 # delay of last execution relative to deadline in s
+        self.meanJitter = 0
+        self.maxJitter = 0
+
+    def run(self, deadline):
+        """Executes the job and updates timing statistics. Executed in worker thread."""
+        jitter = time.monotonic() - deadline
+        self.count += 1
+        self.jitter = jitter
+        self.meanJitter += (jitter - self.meanJitter) / self.count
+        self.maxJitter = max(self.maxJitter, jitter)
+        try:
+            self.function()
+        except Exception as e: # pylint: disable = broad-except # keep worker alive, no control over hardware specific exceptions
+            if self.print is not None:
+                self.print(f'Error in acquisition job {self.name}: {e}', PRINT.ERROR)
+        finally:
+            self.running = False
+
+    def report(self):
+        return f'{self.name}: interval {self.interval():.0f} ms, executions {self.count}, skipped {self.skipped}, jitter mean {self.meanJitter*1000:.1f} ms, max {self.maxJitter*1000:.1f} ms, last {self.jitter*1000:.1f} ms'
+
+class AcquisitionScheduler():
+    """Executes periodic acquisition jobs of all :class:`DeviceControllers<esibd.core.DeviceController>` using a single
+    timing thread and a fixed number of daemon worker threads instead of one polling thread per controller.
+    Deadlines are based on the previous deadline rather than the end of the last execution to avoid drift.
+    If a job is still running when its next deadline is reached, the execution is skipped instead of queued."""
+
+    def __init__(self, maxWorkers=8):
+        self.maxWorkers = maxWorkers
+        self.jobs = []
+        self.heap = [] # (deadline, sequence number, job)
+        self.sequence = 0 # resolves ties between equal deadlines
+        self.condition = threading.Condition()
+        self.queue = SimpleQueue() # (job, deadline) due for execution, None stops a worker
+        self.workers = []
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.queue = SimpleQueue() # do not execute jobs left over from previous run
+        self.workers = []
+        for i in range(self.maxWorkers): # daemon threads do not block closing the application if a device does not respond
+            worker = Thread(target=self.work, args=(self.queue,), name=f'acquisitionWorker{i}')
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+        self.thread = Thread(target=self.run, name='acquisitionSchedulerThread')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def register(self, name, function, interval, print=None): # pylint: disable = redefined-builtin # print is consistent with other classes
+        """Adds a periodic job. The first execution is scheduled immediately.
+
+        :param name: Name used in reports, typically the device name.
+        :type name: str
+        :param function: Function that is executed periodically in a worker thread.
+        :type function: callable
+        :param interval: Function that returns the current interval in ms.
+        :type interval: callable
+        :param print: Function used to report errors, defaults to None
+        :type print: callable, optional
+        :return: The job, use it to unregister.
+        :rtype: :class:`~esibd.core.AcquisitionJob`
+        """
+        self.start()
+        job = AcquisitionJob(name=name, function=function, interval=interval, print=print)
+        with self.condition:
+            self.jobs.append(job)
+            self.push(job)
+            self.condition.notify()
+        return job
+
+    def unregister(self, job):
+        """Removes a job. A running execution will complete but the job will not be executed again."""
+        with self.condition:
+            job.active = False
+            if job in self.jobs:
+                self.jobs.remove(job)
+
+    def push(self, job):
+        self.sequence += 1
+        heapq.heappush(self.heap, (job.deadline, self.sequence, job))
+
+    def run(self):
+        """Waits for the next deadline and submits due jobs to the worker pool. Executed in acquisitionSchedulerThread."""
+        while self.running:
+            with self.condition:
+                if not self.heap:
+                    self.condition.wait(timeout=1)
+                    continue
+                deadline, _, job = self.heap[0]
+                now = time.monotonic()
+                if deadline > now:
+                    self.condition.wait(timeout=deadline - now) # wakes up early if a new job is registered
+                    continue
+                heapq.heappop(self.heap)
+                if not job.active:
+                    continue # drop unregistered job
+                if job.running:
+                    job.skipped += 1
+                else:
+                    job.running = True
+                    self.queue.put((job, deadline))
+                interval = max(job.interval(), 1) / 1000
+                job.deadline = deadline + interval
+                if job.deadline < now: # fell behind by more than one interval, resynchronize instead of catching up
+                    job.deadline = now + interval
+                self.push(job)
+
+    def work(self, queue):
+        """Executes due jobs. Executed in acquisitionWorker threads."""
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+            job, deadline = item
+            job.run(deadline)
+
+    def report(self):
+        """Returns timing statistics of all jobs."""
+        with self.condition:
+            return '\n'.join([job.report() for job in self.jobs])
+
+    def shutdown(self):
+        with self.condition:
+            self.running = False
+            self.jobs.clear()
+            self.heap.clear()
+            self.condition.notify()
+        for _ in self.workers:
+            self.queue.put(None)
+        self.workers = []
+
+class BackpressureController():
+    """Keeps the user interface responsive if it cannot keep up with the data acquired by all devices.
+    Measures the latency of the main thread event queue using probe events and degrades the display in graded steps:
+    First the plot frame rate is lowered, then the number of displayed data points is reduced, and finally history appends of all devices are batched into a single event.
+    Acquisition and recording continue at the full rate on all levels. Levels are restored one by one once the latency is low again.
+    Each step is reported in the log."""
+
+    class SignalCommunicate(QObject):
+        probeSignal = pyqtSignal(float)
+        stoppedSignal = pyqtSignal()
+        appendBatchSignal = pyqtSignal()
+
+    LEVELS = [ # (plot interval in s, max display size, batch appends, description)
+        (0, None, False, 'full plot frame rate'),
+        (0.2, None, False, 'plot frame rate limited to 5 Hz'),
+        (1, None, False, 'plot frame rate limited to 1 Hz'),
+        (1, 1000, False, 'displayed data points limited to 1000 per channel'),
+        (1, 250, False, 'displayed data points limited to 250 per channel'),
+        (1, 250, True, 'history appends batched'),
+    ]
+
+    def __init__(self, pluginManager):
+        self.pluginManager = pluginManager
+        self.signalComm = self.SignalCommunicate()
+        self.signalComm.probeSignal.connect(self.probeReceived)
+        self.signalComm.stoppedSignal.connect(self.reset)
+        self.signalComm.appendBatchSignal.connect(self.appendBatch)
+        self.probeInterval = 500 # ms
+        self.highLatency = 0.25 # s, escalate if exceeded by consecutive probes
+        self.lowLatency = 0.05 # s, restore if not exceeded by consecutive probes
+        self.escalateCount = 3
+        self.restoreCount = 20
+        self.level = 0
+        self.latency = 0 # s
+        self.maxLatency = 0 # s
+        self.high = 0 # number of consecutive probes above highLatency
+        self.low = 0 # number of consecutive probes below lowLatency
+        self.probePending = False
+        self.lastPlotTimes = {} # device name -> time of last plot request
+        self.displaySize = None # (limit_display_size, max_display_size) before limiting
+        self.batch = []
+        self.batchLock = threading.Lock()
+        self.thread = None
+        self.timer = None
+
+    @property
+    def plotInterval(self):
+        return self.LEVELS[self.level][0]
+
+    @property
+    def batching(self):
+        return self.LEVELS[self.level][2]
+
+    def start(self):
+        """Starts probing the main thread while devices are recording."""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.thread = Thread(target=self.runProbe, args=(lambda: self.pluginManager.DeviceManager.recording,), name='backpressureProbeThread')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def runProbe(self, recording):
+        self.timer = PeriodicTimer(interval=self.probeInterval, name='backpressure probe')
+        while recording():
+            if not self.probePending: # do not flood a blocked main thread with probes
+                self.probePending = True
+                self.signalComm.probeSignal.emit(time.monotonic())
+            self.timer.wait()
+        self.signalComm.stoppedSignal.emit()
+
+    def probeReceived(self, sent):
+        """Evaluates the time a probe has been waiting in the main thread event queue and changes the level if needed."""
+        self.probePending = False
+        self.latency = time.monotonic() - sent
+        self.maxLatency = max(self.maxLatency, self.latency)
+        if self.latency > self.highLatency:
+            self.high += 1
+            self.low = 0
+            if self.high >= self.escalateCount and self.level < len(self.LEVELS) - 1:
+                self.setLevel(self.level + 1)
+        elif self.latency < self.lowLatency:
+            self.low += 1
+            self.high = 0
+            if self.low >= self.restoreCount and self.level > 0:
+                self.setLevel(self.level - 1)
+        # else: keep counters. Latency often alternates while the event queue is catching up.
+
+    def setLevel(self, level):
+        """Applies a degradation level and reports it in the log.
+
+        :param level: Index of :attr:`~esibd.core.BackpressureController.LEVELS`.
+        :type level: int
+        """
+        escalate = level > self.level
+        self.level = level
+        self.high = 0
+        self.low = 0
+        DeviceManager = self.pluginManager.DeviceManager
+        maxDisplaySize = self.LEVELS[level][1]
+        if maxDisplaySize is not None:
+            if self.displaySize is None:
+                self.displaySize = (DeviceManager.limit_display_size, DeviceManager.max_display_size)
+            DeviceManager.limit_display_size = True
+            DeviceManager.max_display_size = min(self.displaySize[1], maxDisplaySize) if self.displaySize[0] else maxDisplaySize # keep if already smaller
+        elif self.displaySize is not None: # restore user settings
+            DeviceManager.limit_display_size, DeviceManager.max_display_size = self.displaySize
+            self.displaySize = None
+        if not self.batching:
+            self.appendBatch() # do not leave requests behind when leaving batch mode
+        if escalate:
+            self.pluginManager.logger.print(f'Slow GUI detected (event latency {self.latency*1000:.0f} ms), level {level}: {self.LEVELS[level][3]}.'
+                                            ' Acquisition and recording continue at full rate.', flag=PRINT.WARNING)
+        else:
+            self.pluginManager.logger.print(f'GUI responsive again, level {level}: {self.LEVELS[level][3]}.')
+
+    def reset(self):
+        """Restores full display performance, e.g. after recording stopped."""
+        if self.level > 0:
+            self.setLevel(0)
+        self.probePending = False
+        self.lastPlotTimes.clear()
+
+    def plotDue(self, name):
+        """Returns True if a device should plot now according to the current plot frame rate.
+
+        :param name: Device name.
+        :type name: str
+        """
+        if self.level == 0:
+            return True
+        now = time.monotonic()
+        if now - self.lastPlotTimes.get(name, 0) < self.plotInterval:
+            return False
+        self.lastPlotTimes[name] = now
+        return True
+
+    def requestAppend(self, device):
+        """Queues a history append from a data thread. All pending appends are executed in one main thread event.
+
+        :param device: The device that should append data.
+        :type device: :class:`~esibd.plugins.Device`
+        """
+        with self.batchLock:
+            self.batch.append(device)
+            emit = len(self.batch) == 1 # one event for all requests received until the batch is processed
+        if emit:
+            self.signalComm.appendBatchSignal.emit()
+
+    def appendBatch(self):
+        with self.batchLock:
+            batch, self.batch = self.batch, []
+        for device in batch:
+            if device.recording:
+                device.appendData()
+
+    def report(self):
+        return (f'Backpressure level {self.level}: {self.LEVELS[self.level][3]}, event latency {self.latency*1000:.1f} ms, max {self.maxLatency*1000:.1f} ms\n'
+                + (self.timer.report() if self.timer is not None else ''))
+
+class InitializationEntry():
+    """Initialization of a single :class:`~esibd.core.DeviceController` managed by the :class:`~esibd.core.DeviceInitializer`."""
+
+    PENDING      = 'pending'
+    INITIALIZING = 'initializing'
+    READY        = 'ready'
+    FAILED       = 'failed'
+    TIMEOUT      = 'timeout'
+
+    def __init__(self, controller, function):
+        """
+        :param controller: The controller to be initialized.
+        :type controller: :class:`~esibd.core.DeviceController`
+        :param function: Function that initializes the communication. Executed in worker thread.
+        :type function: callable
+        """
+        self.controller = controller
+        self.function = function
+        self.name = f'{controller.device.name} {controller.channel.name}' if controller.channel is not None else controller.device.name
+        self.timeout = controller.initTimeout
+        self.status = self.PENDING
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+
+    @property
+    def settled(self):
+        return self.status in [self.READY, self.FAILED, self.TIMEOUT]
+
+    def elapsed(self):
+        if self.started is None:
+            return 0
+        return (self.finished or time.monotonic()) - self.started
+
+class DeviceInitializer():
+    """Initializes the communication of all :class:`DeviceControllers<esibd.core.DeviceController>` concurrently using a bounded number of daemon worker threads.
+    Each controller has its own deadline defined by :attr:`~esibd.core.DeviceController.initTimeout`. Controllers that miss their deadline are reported and do not block others.
+    Callbacks registered with :meth:`~esibd.core.DeviceInitializer.whenReady`, e.g. to start recording, are executed once all pending controllers are ready, failed, or timed out.
+    Thus, starting a complete setup takes as long as the slowest device instead of the sum of all devices.
+    A live status table is shown if initialization takes longer than a second."""
+
+    class SignalCommunicate(QObject):
+        finishedSignal = pyqtSignal(object)
+
+    def __init__(self, pluginManager, maxWorkers=16):
+        self.pluginManager = pluginManager
+        self.maxWorkers = maxWorkers
+        self.signalComm = self.SignalCommunicate()
+        self.signalComm.finishedSignal.connect(self.finished)
+        self.entries = []
+        self.callbacks = []
+        self.slots = threading.Semaphore(maxWorkers) # daemon threads do not block closing the application if a device does not respond
+        self.batchStart = None
+        self.dialog = None
+        self.tree = None
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.update)
+        self.timer.setInterval(200)
+
+    @property
+    def busy(self):
+        return any(not entry.settled for entry in self.entries)
+
+    def submit(self, controller, function):
+        """Schedules initialization of a controller. Call from main thread.
+
+        :param controller: The controller to be initialized.
+        :type controller: :class:`~esibd.core.DeviceController`
+        :param function: Function that initializes the communication, typically :meth:`~esibd.core.DeviceController.runInitialization`.
+        :type function: callable
+        """
+        if not self.busy: # start new batch
+            self.entries = []
+            self.batchStart = time.monotonic()
+        entry = InitializationEntry(controller, function)
+        self.entries.append(entry)
+        thread = Thread(target=self.run, args=(entry,), name=f'{entry.name} initThread')
+        thread.daemon = True
+        thread.start()
+        self.timer.start()
+
+    def run(self, entry):
+        """Executes the initialization. Executed in initThread."""
+        with self.slots:
+            entry.started = time.monotonic()
+            entry.status = entry.INITIALIZING
+            try:
+                entry.function()
+            except Exception as e: # pylint: disable=[broad-except] # report and continue with other devices
+                entry.controller.print(f'Initialization failed: {e}', PRINT.ERROR)
+                entry.controller.initializing = False
+            entry.finished = time.monotonic()
+        self.signalComm.finishedSignal.emit(entry) # queued after initCompleteSignal if emitted by function
+
+    def finished(self, entry):
+        """Evaluates the result of an initialization in the main thread."""
+        if entry.controller.initialized:
+            if entry.status == entry.TIMEOUT:
+                entry.controller.print(f'Initialization completed after {entry.elapsed():.1f} s, {entry.elapsed()-entry.timeout:.1f} s after the deadline.', PRINT.WARNING)
+            entry.status = entry.READY
+        elif entry.status != entry.TIMEOUT:
+            entry.status = entry.FAILED
+        self.update()
+
+    def update(self):
+        """Checks deadlines, updates the status table, and executes callbacks once all controllers are settled."""
+        now = time.monotonic()
+        for entry in self.entries:
+            if entry.status == entry.INITIALIZING and now - entry.started > entry.timeout:
+                entry.status = entry.TIMEOUT
+                entry.controller.print(f'Initialization did not complete within {entry.timeout:g} s. Continuing without it.', PRINT.WARNING)
+        if self.batchStart is not None and now - self.batchStart > 1:
+            self.showStatus()
+        if not self.busy:
+            self.timer.stop()
+            self.complete()
+
+    def complete(self):
+        if self.batchStart is not None:
+            ready = [entry for entry in self.entries if entry.status == entry.READY]
+            message = f'Initialized {len(ready)} of {len(self.entries)} controllers in {time.monotonic()-self.batchStart:.1f} s.'
+            notReady = [f'{entry.name} ({entry.status})' for entry in self.entries if entry.status != entry.READY]
+            if notReady:
+                self.pluginManager.logger.print(f"{message} Not ready: {', '.join(notReady)}.", flag=PRINT.WARNING)
+            else:
+                self.pluginManager.logger.print(message)
+            self.batchStart = None
+        if self.dialog is not None:
+            self.dialog.close()
+            self.dialog = None
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def whenReady(self, callback):
+        """Executes callback once all controllers that are currently initializing are settled, or immediately if none are initializing.
+
+        :param callback: Function executed in the main thread.
+        :type callback: callable
+        """
+        if self.busy:
+            self.callbacks.append(callback)
+        else:
+            callback()
+
+    def showStatus(self):
+        """Shows and updates a table with the initialization status of all controllers."""
+        if self.dialog is None:
+            self.dialog = QDialog(self.pluginManager.mainWindow)
+            self.dialog.setWindowTitle('Initializing Devices')
+            self.dialog.resize(500, 300)
+            lay = QVBoxLayout()
+            self.tree = QTreeWidget()
+            self.tree.setHeaderLabels(['Device', 'Status', 'Time (s)', 'Deadline (s)'])
+            self.tree.setRootIsDecorated(False)
+            lay.addWidget(self.tree)
+            self.dialog.setLayout(lay)
+            self.dialog.show()
+        self.tree.clear()
+        for entry in self.entries:
+            self.tree.addTopLevelItem(QTreeWidgetItem([entry.name, entry.status, f'{entry.elapsed():.1f}', f'{entry.timeout:g}']))
+
+    def report(self):
+        return '\n'.join(['Device | Status | Time (s) | Deadline (s)'] + [f'{entry.name} | {entry.status} | {entry.elapsed():.1f} | {entry.timeout:g}' for entry in self.entries])
+
+    def shutdown(self):
+        self.timer.stop()
+
 class DeviceController(QObject):
     """Each :class:`~esibd.plugins.Device` or :class:`~esibd.core.Channel` comes with a :class:`~esibd.core.DeviceController`. The
     :class:`~esibd.core.DeviceController` is not itself a :class:`~esibd.plugins.Plugin`. It only abstracts the direct
@@ -3512,6 +5745,9 @@ class DeviceController(QObject):
         """Signal that triggers the acquisition to stop after communication errors."""
         updateValueSignal = pyqtSignal()
         """Signal that transfers new data from the :attr:`~esibd.core.DeviceController.acquisitionThread` to the corresponding channels."""
+        updateValuesSignal = pyqtSignal(object, object, float)
+        """Signal that notifies the main thread about values written to the :class:`~esibd.core.ValueStore`.
+        Transfers values that could not be written to the store, the corresponding channel indices, and the time of the reading. See :meth:`~esibd.core.DeviceController.publishValues`."""
 
     parent : any # Device or Channel, cannot specify without causing circular import
     """Reference to the associated class."""
@@ -3519,10 +5755,19 @@ class DeviceController(QObject):
     """Reference to :meth:`~esibd.plugins.Plugin.print`."""
     port : serial.Serial = None
     """Port for serial communication."""
-    initThread : Thread = None
-    """A parallel thread used to initialize communication."""
+    initTimeout : float = 10
+    """Time in s after which initialization is reported as not ready by the :class:`~esibd.core.DeviceInitializer`, so that other devices can start recording."""
     acquisitionThread : Thread = None
     """A parallel thread that regularly reads values from the device."""
+    useScheduler : bool = False
+    """If True, :meth:`~esibd.core.DeviceController.readValues` is registered as periodic job of the
+    :class:`~esibd.core.AcquisitionScheduler` instead of running :meth:`~esibd.core.DeviceController.runAcquisition` in a dedicated thread."""
+    acquisitionJob : AcquisitionJob = None
+    """Job used instead of *acquisitionThread* if :attr:`~esibd.core.DeviceController.useScheduler` is True."""
+    acquisitionTimer : PeriodicTimer = None
+    """Timer used by :meth:`~esibd.core.DeviceController.runAcquisition` to repeat acquisition at the device interval without drift."""
+    commandQueue : CommandQueue = None
+    """Queue used to send setpoints and other commands to the hardware from a single worker thread, see :meth:`~esibd.core.DeviceController.queueSetpoint`."""
     lock : TimeoutLock # Lock
     """Lock used to avoid race conditions when communicating with the hardware."""
     acquiring : bool = False
@@ -3542,6 +5787,7 @@ class DeviceController(QObject):
         self.signalComm = self.SignalCommunicate()
         self.signalComm.initCompleteSignal.connect(self.initComplete)
         self.signalComm.updateValueSignal.connect(self.updateValue)
+        self.signalComm.updateValuesSignal.connect(self.updateValues)
         self.signalComm.closeCommunicationSignal.connect(self.closeCommunication)
 
     @property
@@ -3553,7 +5799,7 @@ class DeviceController(QObject):
         self.device.print(f'{controller_name}: {message}', flag=flag)
 
     def initializeCommunication(self):
-        """Starts the :meth:`~esibd.core.DeviceController.initThread`."""
+        """Submits :meth:`~esibd.core.DeviceController.runInitialization` to the :class:`~esibd.core.DeviceInitializer`, which initializes all controllers concurrently."""
         self.print('initializeCommunication', PRINT.DEBUG)
         if self.initializing:
             return
@@ -3561,12 +5807,10 @@ class DeviceController(QObject):
             self.closeCommunication() # terminate old thread before starting new one
         self.initializing = True
         self.errorCount = 0
-        self.initThread = Thread(target=self.fakeInitialization if getTestMode() else self.runInitialization, name=f'{self.device.name} initThread')
-        self.initThread.daemon = True
-        self.initThread.start() # initialize in separate thread
+        self.device.pluginManager.deviceInitializer.submit(self, self.fakeInitialization if getTestMode() else self.runInitialization) # initialize in worker thread
 
     def runInitialization(self):
-        """Hardware specific initialization of communication. Executed in initThread (no access to GUI!)."""
+        """Hardware specific initialization of communication. Executed in a worker thread of the :class:`~esibd.core.DeviceInitializer` (no access to GUI!)."""
 
     def fakeInitialization(self):
         """Called in test mode instead of runInitialization"""
@@ -3594,6 +5838,14 @@ class DeviceController(QObject):
             if self.acquisitionThread.is_alive():
                 self.print('Data reading thread did not complete. Reset connection manually.', PRINT.ERROR)
                 return
+        if self.useScheduler:
+            scheduler = self.device.pluginManager.acquisitionScheduler
+            if self.acquisitionJob is not None:
+                scheduler.unregister(self.acquisitionJob)
+            self.acquiring = True
+            self.acquisitionJob = scheduler.register(name=f'{self.device.name} {self.channel.name}' if self.channel is not None else self.device.name,
+                                                     function=self.runAcquisitionStep, interval=lambda: self.device.interval, print=self.print)
+            return
         self.acquisitionThread = Thread(target=self.runAcquisition, args =(lambda: self.acquiring,), name=f'{self.device.name} acquisitionThread')
         self.acquisitionThread.daemon = True
         self.acquiring = True # terminate old thread before starting new one
@@ -3602,6 +5854,7 @@ class DeviceController(QObject):
     def runAcquisition(self, acquiring):
         """Runs acquisition loop. Executed in acquisitionThread.
         Overwrite with hardware specific acquisition code."""
+        self.acquisitionTimer = PeriodicTimer(interval=lambda: self.device.interval, name=self.device.name)
         while acquiring():
             with self.lock.acquire_timeout(1, timeoutMessage='Could not acquire lock to acquire data') as lock_acquired:
                 if lock_acquired:
@@ -3610,13 +5863,69 @@ class DeviceController(QObject):
                     else:
                         pass # implement real feedback
                     self.signalComm.updateValueSignal.emit()
-            time.sleep(self.device.interval/1000) # release lock before waiting!
+            self.acquisitionTimer.wait() # release lock before waiting!
+
+    def runAcquisitionStep(self):
+        """Runs a single acquisition cycle. Executed by a worker thread of the :class:`~esibd.core.AcquisitionScheduler`."""
+        with self.lock.acquire_timeout(1, timeoutMessage='Could not acquire lock to acquire data') as lock_acquired:
+            if lock_acquired and self.acquiring: # acquiring may have changed while waiting for lock
+                self.readValues() # exceptions are handled by lock
+
+    def readValues(self):
+        """Reads values once and passes them to the main thread, e.g. using :meth:`~esibd.core.DeviceController.publishValues`.
+        Executed with lock acquired. Overwrite with hardware specific code if :attr:`~esibd.core.DeviceController.useScheduler` is True."""
 
     def updateValue(self):
         """Called from acquisitionThread to update the
         value of the channel(s) in the main thread.
         Overwrite with specific update code."""
 
+    def publishValues(self, values, indices=None):
+        """Writes the values of all channels from one read cycle to the :class:`~esibd.core.ValueStore` of the device without accessing widgets or locks.
+        A single signal triggers events and handles channels that are not bound to the store in the main thread.
+        Call from acquisitionThread instead of emitting updateValueSignal to avoid
+        implementing :meth:`~esibd.core.DeviceController.updateValue`.
+
+        :param values: Values in the order of :meth:`~esibd.plugins.ChannelManager.getChannels`, or in the order of indices if provided.
+        :type values: numpy.array
+        :param indices: Indices of the channels that correspond to values, defaults to None (all channels)
+        :type indices: numpy.array, optional
+        """
+        channels = self.device.getChannels()
+        values = np.array(values, dtype=np.float64) # copy, values may be reused by the acquisitionThread
+        indices = np.arange(min(len(channels), values.shape[0])) if indices is None else np.asarray(indices, dtype=np.int64)
+        values = values[:indices.shape[0]]
+        measuredTime = time.time() # same clock as the time axis of devices and the averaging windows of scans
+        unbound = self.device.valueStore.write(ValueStore.MONITOR if self.device.useMonitors else ValueStore.VALUE,
+                                               [channels[i] for i in indices], values, measuredTime)
+        self.signalComm.updateValuesSignal.emit(values[unbound], indices[unbound], measuredTime)
+
+    def updateValues(self, values, indices, measuredTime):
+        """Triggers events for values published by :meth:`~esibd.core.DeviceController.publishValues` in the main thread.
+        Widgets are updated at display rate by the :class:`~esibd.core.ValueStore`.
+        Values of channels that are not bound to the store are set directly.
+        Sets monitors if the device uses monitors and values otherwise.
+
+        :param values: Values of channels that are not bound to the store.
+        :type values: numpy.array
+        :param indices: Indices of the channels that correspond to values.
+        :type indices: numpy.array
+        :param measuredTime: Time of the reading in s since epoch.
+        :type measuredTime: float
+        """
+        self.device.valueStore.dispatchEvents()
+        if indices.shape[0] == 0:
+            return
+        channels = self.device.getChannels()
+        useMonitors = self.device.useMonitors
+        for i, value in zip(indices, values):
+            channel = channels[i]
+            channel.measuredTime = measuredTime
+            if useMonitors:
+                channel.monitor = value
+            else:
+                channel.value = value
+
     def closeCommunication(self):
         """Closes all open ports.
         This should free up all resources and allow for clean reinitialization.
@@ -3626,14 +5935,65 @@ class DeviceController(QObject):
         self.print('closeCommunication', PRINT.DEBUG)
         if self.acquiring:
             self.stopAcquisition() # only call if not already called by device
+        if self.commandQueue is not None:
+            self.commandQueue.stop()
         self.initialized = False
 
+    def queueSetpoint(self, channel):
+        """Queues the setpoint of a channel to be applied by :meth:`~esibd.core.DeviceController.applySetpoints` in the :class:`~esibd.core.CommandQueue` worker thread.
+        Use instead of starting a new thread for every change. Setpoints that have not been sent yet are replaced by newer ones.
+
+        :param channel: Channel with new setpoint.
+        :type channel: :class:`~esibd.core.Channel`
+        """
+        self.getCommandQueue().putSetpoint(channel)
+
+    def queueCommand(self, function):
+        """Queues a command, e.g. to turn outputs on or off, that is executed in order with queued setpoints.
+
+        :param function: Function that sends the command.
+        :type function: callable
+        """
+        self.getCommandQueue().putCommand(function)
+
+    def flushCommands(self, timeout=2):
+        """Waits until all queued commands have been sent, e.g. before closing communication.
+        Commands that have not been sent by the worker thread before timeout are sent from the calling thread.
+
+        :param timeout: Timeout in s, defaults to 2
+        :type timeout: float, optional
+        :return: True if all commands have been sent by the worker thread before timeout.
+        :rtype: bool
+        """
+        if self.commandQueue is None or self.commandQueue.flush(timeout=timeout):
+            return True
+        self.print(f'Queued commands have not been sent within {timeout} s. Sending remaining commands directly.', PRINT.ERROR)
+        self.commandQueue.sendPending()
+        return False
+
+    def getCommandQueue(self):
+        if self.commandQueue is None:
+            self.commandQueue = CommandQueue(name=self.device.name, applySetpoints=self.applySetpoints, print=self.print)
+        return self.commandQueue
+
+    def applySetpoints(self, channels):
+        """Applies setpoints of all given channels, if possible in a single transaction. Executed in the :class:`~esibd.core.CommandQueue` worker thread.
+        Overwrite with hardware specific code if using :meth:`~esibd.core.DeviceController.queueSetpoint`.
+
+        :param channels: Channels in the order in which their setpoints have been changed.
+        :type channels: list[:class:`~esibd.core.Channel`]
+        """
+
     def stopAcquisition(self):
         """Terminates acquisition but leaves communication initialized."""
         self.print('stopAcquisition', PRINT.DEBUG)
         if self.device.recording:
             self.device.recording = False # stop recording if controller is stopping acquisition
-        if self.acquisitionThread is not None:
+        scheduled = self.acquisitionJob is not None
+        if scheduled:
+            self.device.pluginManager.acquisitionScheduler.unregister(self.acquisitionJob)
+            self.acquisitionJob = None
+        if self.acquisitionThread is not None or scheduled:
             with self.lock.acquire_timeout(1, timeoutMessage='Could not acquire lock to stop acquisition.'):
                 # use lock in runAcquisition to make sure acquiring flag is not changed before last call completed
                 # set acquiring flag anyways if timeout expired. Possible errors have to be handled
@@ -3653,6 +6013,10 @@ class DeviceController(QObject):
         :type encoding: str, optional
         """
         try:
+            connection = self.device.pluginManager.serialTransport.getConnection(port)
+            if connection is not None:
+                connection.write(message) # encoding defined in attachSerialTransport
+                return
             self.clearBuffer(port) # make sure communication does not break if for any reason the port is not empty. E.g. old return value has not been read.
             port.write(bytes(message, encoding))
         except serial.SerialTimeoutException as e:
@@ -3680,6 +6044,10 @@ class DeviceController(QObject):
         :rtype: str
         """
         try:
+            connection = self.device.pluginManager.serialTransport.getConnection(port)
+            if connection is not None: # encoding and EOL defined in attachSerialTransport
+                message = connection.readLine(timeout=port.timeout if port.timeout is not None else 2)
+                return message.strip(strip).rstrip() if strip is not None else message.rstrip()
             if EOL == '\n':
                 if strip is not None:
                     return port.readline().decode(encoding).strip(strip).rstrip()
@@ -3704,6 +6072,97 @@ class DeviceController(QObject):
                 self.signalComm.closeCommunicationSignal.emit()
         return ''
 
+    def serialQuery(self, port, message, responses=1, strip=None):
+        """Writes a message and returns the matching response without blocking other ports.
+        Requires a port attached using :meth:`~esibd.core.DeviceController.attachSerialTransport`,
+        falls back to :meth:`~esibd.core.DeviceController.serialWrite` and :meth:`~esibd.core.DeviceController.serialRead` otherwise.
+
+        :param port: Serial port.
+        :type port: serial.Serial
+        :param message: Message.
+        :type message: str
+        :param responses: Number of lines expected in response. Only the last line is returned, defaults to 1
+        :type responses: int, optional
+        :param strip: Characters to be stripped from the response, defaults to None
+        :type strip: str, optional
+        :return: response
+        :rtype: str
+        """
+        return self.serialQueryLines(port, message, responses=responses, strip=strip)[-1] if responses > 0 else ''
+
+    def serialQueryLines(self, port, message, responses=1, strip=None):
+        """Like :meth:`~esibd.core.DeviceController.serialQuery` but returns all response lines.
+        Use to send multiple queries in one message and receive all responses in a single round trip.
+
+        :param port: Serial port.
+        :type port: serial.Serial
+        :param message: Message, may contain multiple commands.
+        :type message: str
+        :param responses: Number of lines expected in response, defaults to 1
+        :type responses: int, optional
+        :param strip: Characters to be stripped from the responses, defaults to None
+        :type strip: str, optional
+        :return: Responses in the order in which they have been received. Responses that have not been received before timeout are empty.
+        :rtype: list[str]
+        """
+        connection = self.device.pluginManager.serialTransport.getConnection(port)
+        if connection is None:
+            self.serialWrite(port, message)
+            return [self.serialRead(port, strip=strip) for _ in range(responses)]
+        try:
+            lines = connection.query(message, responses=responses, timeout=port.timeout if port.timeout is not None else 2)
+        except (serial.SerialException, OSError) as e:
+            self.print(f'Serial error, try to reinitialize communication: {e}. Message: {message}.', PRINT.ERROR)
+            self.signalComm.closeCommunicationSignal.emit()
+            return ['']*responses
+        return [line.strip(strip).rstrip() if strip is not None else line.rstrip() for line in lines]
+
+    def serialWaiting(self, port):
+        """Returns the number of received lines if the port is attached to the :class:`~esibd.core.SerialTransport` and the number of bytes otherwise."""
+        connection = self.device.pluginManager.serialTransport.getConnection(port)
+        return connection.waiting if connection is not None else port.in_waiting
+
+    def serialReadLines(self, port, encoding='utf-8', EOL='\n'):
+        """Reads all complete lines that have been received without waiting for more, e.g. to read data that is streamed by the device.
+
+        :param port: Serial port.
+        :type port: serial.Serial
+        :param encoding: Encoding used if the port is not attached to the :class:`~esibd.core.SerialTransport`, defaults to 'utf-8'
+        :type encoding: str, optional
+        :param EOL: End of line character(s) used if the port is not attached to the :class:`~esibd.core.SerialTransport`, defaults to '\\n'
+        :type EOL: str, optional
+        :return: Lines without line termination.
+        :rtype: list[str]
+        """
+        connection = self.device.pluginManager.serialTransport.getConnection(port)
+        if connection is not None: # encoding and EOL defined in attachSerialTransport
+            return [line.rstrip() for line in connection.readLines()]
+        lines = []
+        try:
+            while port.in_waiting > 0: # lines are sent completely, only wait for incomplete last line
+                lines.append(self.serialRead(port, encoding=encoding, EOL=EOL))
+        except serial.SerialException as e:
+            self.print(f'Error while reading lines: {e}', PRINT.ERROR)
+        return lines
+
+    def attachSerialTransport(self, port, encoding='utf-8', EOL='\n'):
+        """Reads port asynchronously using the shared :class:`~esibd.core.SerialTransport`.
+        Call after opening the port. :meth:`~esibd.core.DeviceController.serialWrite`, :meth:`~esibd.core.DeviceController.serialRead`,
+        and :meth:`~esibd.core.DeviceController.serialQuery` will use the transport for this port.
+
+        :param port: Serial port.
+        :type port: serial.Serial
+        :param encoding: Encoding used for sending and receiving messages, defaults to 'utf-8'
+        :type encoding: str, optional
+        :param EOL: End of line character(s) used to separate messages, defaults to '\\n'
+        :type EOL: str, optional
+        """
+        self.device.pluginManager.serialTransport.attach(port, encoding=encoding, EOL=EOL)
+
+    def detachSerialTransport(self, port):
+        """Stops asynchronous reading. Call before closing the port."""
+        self.device.pluginManager.serialTransport.detach(port)
+
     def clearBuffer(self, port=None):
         port = port if port is not None else self.port
         if port is None:
@@ -46,7 +46,7 @@ from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6 import QtCore
 import esibd.core as EsibdCore
 import esibd.const as EsibdConst
-from esibd.core import (INOUT, Parameter, PluginManager, parameterDict, DynamicNp, PRINT, Channel, MetaChannel, TimeoutLock, ScanChannel, RelayChannel, # DeviceController,
+from esibd.core import (INOUT, Parameter, PluginManager, parameterDict, DynamicNp, RingBufferNp, TieredNp, MemoryMappedNp, ColumnarNp, ColumnNp, SegmentedNp, EnvelopeNp, TimeIndex, PeriodicTimer, ValueStore, PRINT, Channel, MetaChannel, TimeoutLock, ScanChannel, RelayChannel, # DeviceController,
                         ToolButton, QLabviewSpinBox, QLabviewDoubleSpinBox, QLabviewSciSpinBox, MultiState, PlotWidget, PlotItem, TreeWidget)
 from esibd.const import * # pylint: disable = wildcard-import, unused-wildcard-import  # noqa: F403
 if sys.platform == 'win32':
@@ -1351,28 +1351,54 @@ class LiveDisplay(Plugin):
             i_min = 0
             i_max = 0
             n = 1
+            tier = 0
             timeAxis = []
+            maxPoints = self.pluginManager.DeviceManager.max_display_size if self.pluginManager.DeviceManager.limit_display_size else None
             if (len(self.livePlotWidgets) > 0 and  # range determined by user
                 any([livePlotWidget.getViewBox().mouseEnabled()[0] and livePlotWidget.getAxis('bottom').range[0] != 0
                      for livePlotWidget in self.livePlotWidgets if isinstance(livePlotWidget, (pg.PlotItem, pg.PlotWidget))])):
                 t_min, t_max = self.livePlotWidgets[0].getAxis('bottom').range # is [0, 1] if nothing has been plotted before, use display time in this case
-                i_min = np.argmin(np.abs(_time - t_min))
-                i_max = np.argmin(np.abs(_time - t_max))
+                if isinstance(device.time, TieredNp):
+                    tier = device.time.selectTier(t_min=t_min, maxPoints=maxPoints)
+                    _time = device.time.get(tier=tier)
+                i_min, i_max = device.timeIndex.getRange(t_min, t_max, tier=tier)
                 n = max(int((i_max-i_min)/self.pluginManager.DeviceManager.max_display_size), 1) if self.pluginManager.DeviceManager.limit_display_size else 1
-                timeAxis = device.time.get(_min=i_min, _max=i_max, n=n)
+                if tier > 0: # tiers of channels are aligned with respect to most recent bucket -> index relative to end
+                    i_min, i_max = i_min - _time.shape[0], i_max - _time.shape[0]
+                timeAxis = device.time.get(_min=i_min, _max=i_max, n=n, tier=tier) if tier > 0 else device.time.get(_min=i_min, _max=i_max, n=n)
                 # self.print(f'range from x axis {i_min} {i_max} {n} {len(timeAxis)}')
             else: # displayTime determines range
                 if device.time.size > 0:
-                    i_min = (np.argmin(np.abs(_time - (time.time() - self.getDisplayTime()*60)))
+                    if isinstance(device.time, TieredNp):
+                        tier = device.time.selectTier(t_min=time.time() - self.getDisplayTime()*60 if self.getDisplayTime() != -1 else None, maxPoints=maxPoints)
+                        _time = device.time.get(tier=tier)
+                    i_min = (device.timeIndex.getRange(time.time() - self.getDisplayTime()*60, tier=tier)[0]
                                     if self.getDisplayTime() != -1 else 0)
                     i_max = None
                     t_length = _time.shape[0] - i_min # number of indices within displaytime before thinning
                     # determine by how much to limit number of displayed data points
                     n = max(int(t_length/self.pluginManager.DeviceManager.max_display_size), 1) if self.pluginManager.DeviceManager.limit_display_size else 1
-                    timeAxis = device.time.get(_min=i_min, n=n)
-            timeAxes[device.name] = i_min, i_max, n, timeAxis
+                    if tier > 0:
+                        i_min = i_min - _time.shape[0]
+                    timeAxis = device.time.get(_min=i_min, n=n, tier=tier) if tier > 0 else device.time.get(_min=i_min, n=n)
+            envelope = False
+            if tier == 0 and n > 1 and self.pluginManager.DeviceManager.display_envelope:
+                # use min and max of buckets with 2n data points instead of every nth data point -> same number of displayed points but no missing spikes
+                n = 2*n
+                timeAxis = self.getEnvelopeTimeAxis(_time, i_min, i_max, n)
+                envelope = True
+            timeAxes[device.name] = i_min, i_max, n, timeAxis, tier, envelope
         return timeAxes
 
+    def getEnvelopeTimeAxis(self, _time, i_min, i_max, n):
+        """Returns two time stamps per bucket of n data points, matching :meth:`~esibd.core.EnvelopeNp.get`."""
+        end = _time.shape[0] if i_max is None else i_max
+        starts = np.arange(i_min - np.remainder(i_min, n), end, n)
+        timeAxis = np.empty(2*starts.shape[0], dtype=_time.dtype)
+        timeAxis[0::2] = _time[starts]
+        timeAxis[1::2] = _time[np.minimum(starts + n//2, end - 1)]
+        return timeAxis
+
     def plot(self, apply=False):
         """Plots the enabled and initialized channels in the main output plot
             The x axis is either time or a selected channel
@@ -1428,8 +1454,8 @@ class LiveDisplay(Plugin):
 
     def plotChannel(self, livePlotWidget, timeAxes, channel, apply):
         if (channel.enabled or not channel.real) and channel.display and channel.time.size != 0:
-            i_min, i_max, n, timeAxis = timeAxes[channel.getDevice().name]
-            if apply or np.remainder(i_min, n) == 0: # otherwise no update required
+            i_min, i_max, n, timeAxis, tier, envelope = timeAxes[channel.getDevice().name]
+            if apply or tier > 0 or np.remainder(i_min, n) == 0: # otherwise no update required
                 if timeAxis.shape[0] > 1: # need at least 2 data points to plot connecting line segment
                     if channel.plotCurve is None:
                         if isinstance(livePlotWidget, (pg.PlotItem, pg.PlotWidget)):
@@ -1446,8 +1472,15 @@ class LiveDisplay(Plugin):
                     # plotting is very expensive, array manipulation is negligible even with 50000 data points per channel
                     # channel should at any point have as many data points as timeAxis (missing bits will be filled with nan as soon as new data comes in)
                     # however, cant exclude that one data point added between definition of timeAxis and y
-                    y = channel.convertDataDisplay(channel.getValues(subtractBackground=channel.getDevice().subtractBackgroundActive(),
-                                          _min=i_min, _max=i_max, n=n)) # ignore last data point, possibly added after definition of timeAx #, _callSync='off'
+                    subtractBackground = channel.getDevice().subtractBackgroundActive()
+                    if envelope:
+                        if not hasattr(channel, 'envelope'):
+                            channel.envelope = EnvelopeNp()
+                        y = channel.convertDataDisplay(channel.envelope.get(getValues=lambda _min, _max: channel.getValues(subtractBackground=subtractBackground, _min=_min, _max=_max),
+                                    _min=i_min, _max=i_max, n=n, key=(id(channel.getDevice().time), channel.getDevice().time.get()[i_min - np.remainder(i_min, n)], subtractBackground)))
+                    else:
+                        y = channel.convertDataDisplay(channel.getValues(subtractBackground=subtractBackground,
+                                          _min=i_min, _max=i_max, n=n, tier=tier)) # ignore last data point, possibly added after definition of timeAx #, _callSync='off'
                     if y.shape[0] == 0 or all(np.isnan(y)):
                         # cannot draw if only np.nan (e.g. when zooming into old data where a channel did not exist or was not enabled and data was padded with np.nan)
                         channel.clearPlotCurve()
@@ -1456,7 +1489,10 @@ class LiveDisplay(Plugin):
                         if channel.smooth != 0:
                             # y = uniform_filter1d(y, channel.smooth) # revert once nan_policy implemented
                             y = smooth(y, channel.smooth)
-                        channel.plotCurve.setData(timeAxis[:length], y[:length])
+                        if tier > 0: # tiers are aligned with respect to most recent bucket
+                            channel.plotCurve.setData(timeAxis[timeAxis.shape[0]-length:], y[y.shape[0]-length:])
+                        else:
+                            channel.plotCurve.setData(timeAxis[:length], y[:length])
                 else:
                     channel.clearPlotCurve()
         else:
@@ -1521,6 +1557,9 @@ class ChannelManager(Plugin):
     """Use record monitors and compare them to set points."""
     useOnOffLogic = False
     """Creates an Action in the DeviceManager that handles turning key functions on and off."""
+    lazyWidgets = True
+    """If True, widgets of channels are only created when channels become visible or their widgets are accessed.
+    This keeps loading of configurations with thousands of channels fast. Set to False if channels customize widgets in :meth:`~esibd.core.Channel.initGUI`."""
 
     class ChannelPlot(Plugin):
         """Simplified version of the Line plugin for plotting channels."""
@@ -1576,19 +1615,21 @@ class ChannelManager(Plugin):
     def __init__(self, **kwargs): # Always use keyword arguments to allow forwarding to parent classes.
         super().__init__(**kwargs)
         self.channels = []
+        self.valueStore = ValueStore(manager=self) # values and monitors of all channels, used instead of widgets
+        self.pluginManager.widgetRefresh.register(self.valueStore) # widgets are views of the valueStore refreshed at display rate
         self.channelsChanged = False
         self.channelPlot = None
         self.confINI = f'{self.name}.ini' # not a file extension, but complete filename to save and restore configurations
         self.confh5 = f'_{self.name.lower()}.h5'
         self.previewFileTypes = [self.confINI, self.confh5]
         self.changeLog = []
-        self.lagging = 0
         self._recording = False
         self.staticDisplay = self.StaticDisplay(parentPlugin=self, **kwargs) if self.useDisplays else None # need to initialize to access previewFileTypes
         self.liveDisplay = self.LiveDisplay(parentPlugin=self, **kwargs) if self.useDisplays else None
         if self.useDisplays:
             self.signalComm.plotSignal.connect(self.liveDisplay.plot)
         self.dataThread = None
+        self.dataTimer = None
 
     def initGUI(self):
         super().initGUI()
@@ -1720,6 +1761,28 @@ class ChannelManager(Plugin):
             self.tree.insertTopLevelItem(index, channel) # has to be added before populating
         channel.initGUI(item)
 
+    def realizeVisibleChannels(self):
+        """Creates widgets of channels in visible rows, see :meth:`~esibd.core.Channel.realize`.
+
+        :return: Number of channels for which widgets have been created.
+        :rtype: int
+        """
+        if not self.lazyWidgets or self.tree is None or not self.tree.isVisible():
+            return 0
+        viewport = self.tree.viewport().rect()
+        item = self.tree.itemAt(viewport.topLeft())
+        realized = 0
+        while item is not None and self.tree.visualItemRect(item).top() <= viewport.bottom():
+            if isinstance(item, Channel) and not item.realized:
+                if realized == 0:
+                    self.tree.setUpdatesEnabled(False) # repaint once after all widgets are created
+                item.realize()
+                realized += 1
+            item = self.tree.itemBelow(item) # skips hidden and collapsed rows
+        if realized > 0:
+            self.tree.setUpdatesEnabled(True)
+        return realized
+
     def modifyChannel(self):
         selectedChannel = self.getSelectedChannel()
         if selectedChannel is None:
@@ -1780,7 +1843,8 @@ class ChannelManager(Plugin):
             selectedChannel.onDelete()
             self.channels.pop(index)
             self.tree.takeTopLevelItem(index)
-            oldValues = selectedChannel.values.get()
+            oldHistory = selectedChannel.values
+            oldValues = oldHistory.get()
             oldValue = selectedChannel.value
             if up:
                 self.addChannel(item=selectedChannel.asDict(), index=index - 1)
@@ -1788,7 +1852,10 @@ class ChannelManager(Plugin):
                 self.addChannel(item=selectedChannel.asDict(), index=index + 1)
             newChannel = self.getChannelByName(selectedChannel.name)
             if len(oldValues) > 0:
-                newChannel.values = DynamicNp(initialData=oldValues, max_size=self.maxDataPoints)
+                if isinstance(oldHistory, (TieredNp, ColumnNp)):
+                    newChannel.values = oldHistory # keep all tiers or column, rebuilding from raw data would lose older buckets or add a column
+                else:
+                    newChannel.values = newChannel.createHistory(initialData=oldValues, max_size=self.maxDataPoints)
                 newChannel.value = oldValue
             self.loading = False
             if hasattr(self.pluginManager, 'PID'):
@@ -2123,7 +2190,7 @@ class ChannelManager(Plugin):
                 return
         self.clearPlot() # update legend in case channels have changed
         self.recording = True
-        self.lagging = 0
+        self.pluginManager.backpressure.start()
         self.dataThread = Thread(target=self.runDataThread, args =(lambda: self.recording,), name=f'{self.name} dataThread')
         self.dataThread.daemon = True # Terminate with main app independent of stop condition
         self.dataThread.start()
@@ -2151,9 +2218,11 @@ class ChannelManager(Plugin):
     def runDataThread(self, recording):
         """Regularly triggers plotting of data.
         Overwrite to add logic for appending data to channels."""
+        self.dataTimer = PeriodicTimer(interval=lambda: self.interval, name=f'{self.name} data')
         while recording():
-            self.signalComm.plotSignal.emit()
-            time.sleep(self.interval/1000) # in seconds # wait at end to avoid emitting signal after recording set to False
+            if self.pluginManager.backpressure.plotDue(self.name):
+                self.signalComm.plotSignal.emit()
+            self.dataTimer.wait() # wait at end to avoid emitting signal after recording set to False
 
     @property
     def recording(self):
@@ -2179,6 +2248,7 @@ class ChannelManager(Plugin):
         self.clearPlot()
 
     def close(self):
+        self.pluginManager.widgetRefresh.unregister(self.valueStore)
         if self.channelConfigChanged(default=True) or self.channelsChanged:
             self.exportConfiguration(default=True)
         super().close()
@@ -2285,6 +2355,19 @@ class Device(ChannelManager):
     MAXSTORAGE = 'Max storage'
     MAXDATAPOINTS = 'Max data points'
     LOGGING = 'Logging'
+    HISTORYMODE = 'History mode'
+    THINNING = 'Thinning'
+    RINGBUFFER = 'Ring buffer'
+    TIERED = 'Tiered'
+    MEMORYMAPPED = 'Memory mapped'
+    COLUMNAR = 'Columnar'
+    SEGMENTED = 'Segmented'
+    RAWHISTORY = 'Raw history'
+    MAXDISKSTORAGE = 'Max disk storage'
+    TIMESTAMPS = 'Timestamps'
+    APPENDTIME = 'Append time'
+    MEASUREDTIME = 'Measured time'
+    CHANNELTIME = 'Per channel'
     unit : str = 'unit'
     """Unit used in user interface."""
     inout : INOUT
@@ -2304,12 +2387,14 @@ class Device(ChannelManager):
         self.logY = False
         self.updating = False # Suppress events while channel equations are evaluated
         self.time = DynamicNp(dtype=np.float64)
-        self.lastIntervalTime = time.time()*1000
+        self.timeIndex = TimeIndex(self)
+        self.lastIntervalTime = time.monotonic()*1000
         self.interval_tolerance = None # how much the acquisition interval is allowed to deviate
         self.signalComm.appendDataSignal.connect(self.appendData)
         # implement a controller based on DeviceController(_parent=self). In some cases there is no controller for the device, but for every channel. Adjust
         self.controller = None
         self.subtractBackgroundAction = None
+        self.recordingPending = False # True while waiting for initialization of devices before starting recording
 
     def initGUI(self):
         """:meta private:"""
@@ -2324,6 +2409,7 @@ class Device(ChannelManager):
                                                         attr='subtractBackground', event=lambda: self.plot(apply=True))
             self.addAction(event=lambda: self.setBackground(), toolTip='Set current value as background.', icon=self.makeCoreIcon('eraser--pencil.png'))
         self.estimateStorage()
+        self.time = self.createHistory(max_size=self.maxDataPoints, dtype=np.float64, timeAxis=True)
         if self.inout == INOUT.IN:
             self.addAction(lambda: self.loadValues(None), 'Load values only.', before=self.saveAction, icon=self.makeCoreIcon('table-import.png'))
         if self.pluginManager.DeviceManager.restoreData:
@@ -2336,14 +2422,36 @@ class Device(ChannelManager):
         ds = super().getDefaultSettings()
         ds[f'{self.name}/{self.INTERVAL} (measured)'] = parameterDict(value=0, internal=True,
         toolTip=f'Measured plot interval for {self.name} in ms.\n'+
-                ' If this deviates multiple times in a row, the number of display points will be reduced and eventually acquisition\n'+
-                ' will be stopped to ensure the application remains responsive.',
+                ' If the user interface is lagging, the plot frame rate and the number of display points will be reduced\n'+
+                ' while acquisition and recording continue at full rate.',
                                                                 widgetType=Parameter.TYPE.INT, indicator=True, _min=0, _max=10000, attr='interval_measured')
         ds[f'{self.name}/{self.MAXSTORAGE}'] = parameterDict(value=50, widgetType=Parameter.TYPE.INT, _min=5, _max=500, event=lambda: self.estimateStorage(),
                                                           toolTip='Maximum amount of storage used to store history in MB. Updated on next restart to prevent accidental data loss!', attr='maxStorage')
         ds[f'{self.name}/{self.MAXDATAPOINTS}'] = parameterDict(value=500000, indicator=True, widgetType=Parameter.TYPE.INT, attr='maxDataPoints',
         toolTip='Maximum number of data points saved per channel, based on max storage.\n' +
         'If this is reached, older data will be thinned to allow to keep longer history.')
+        ds[f'{self.name}/{self.HISTORYMODE}'] = parameterDict(value=self.THINNING, widgetType=Parameter.TYPE.COMBO, items=f'{self.THINNING}, {self.RINGBUFFER}, {self.TIERED}, {self.MEMORYMAPPED}, {self.COLUMNAR}, {self.SEGMENTED}', fixedItems=True,
+                                                          toolTip=f'{self.THINNING}: Older data will be thinned when max data points is reached to allow to keep longer history.\n' +
+                                                          f'{self.RINGBUFFER}: Oldest data will be discarded when max data points is reached. Faster for many channels but uses twice the memory per data point.\n' +
+                                                          f'{self.TIERED}: Keeps {self.RAWHISTORY.lower()} at full resolution, the last hour as about 1 s and the last week as about 1 min min-mean-max buckets (whole data points).\n' +
+                                                          'For intervals longer than 1 s, buckets contain 1 and 60 data points.\n' +
+                                                          'Only raw data is exported and restored.\n' +
+                                                          f'{self.MEMORYMAPPED}: Stores history in temporary files in the config path. The operating system keeps recent data in RAM.\n' +
+                                                          f'Max data points is based on {self.MAXDISKSTORAGE.lower()} instead of {self.MAXSTORAGE.lower()}.\n' +
+                                                          f'{self.COLUMNAR}: Stores all channels in a single array and appends values of all channels in one step. Older data will be thinned.\n' +
+                                                          f'{self.SEGMENTED}: Like {self.THINNING.lower()} but periods without data (NaN) are not stored. Saves RAM for channels that are rarely enabled.\n' +
+                                                          'Updated on next restart or when clearing history.', attr='historyMode')
+        ds[f'{self.name}/{self.RAWHISTORY}'] = parameterDict(value=10, widgetType=Parameter.TYPE.INT, _min=1, _max=1440,
+                                                          toolTip=f'Minutes of history stored at full resolution in {self.TIERED.lower()} history mode.\n' +
+                                                          'Limited by max data points. Updated on next restart or when clearing history.', attr='rawHistory')
+        ds[f'{self.name}/{self.MAXDISKSTORAGE}'] = parameterDict(value=10, widgetType=Parameter.TYPE.INT, _min=1, _max=1000, event=lambda: self.estimateStorage(),
+                                                          toolTip=f'Maximum amount of disk space used to store history in GB in {self.MEMORYMAPPED.lower()} history mode.\n' +
+                                                          'Updated on next restart to prevent accidental data loss!', attr='maxDiskStorage')
+        ds[f'{self.name}/{self.TIMESTAMPS}'] = parameterDict(value=self.APPENDTIME, widgetType=Parameter.TYPE.COMBO, items=f'{self.APPENDTIME}, {self.MEASUREDTIME}, {self.CHANNELTIME}', fixedItems=True,
+                                                          toolTip=f'{self.APPENDTIME}: Time when data is added to the history.\n' +
+                                                          f'{self.MEASUREDTIME}: Time of the most recent reading provided by the controller(s).\n' +
+                                                          f'{self.CHANNELTIME}: Stores the time of the most recent reading for every channel.\n' +
+                                                          'Measured times are more accurate if the user interface is lagging, e.g. when averaging values during scans.', attr='timestampMode')
         ds[f'{self.name}/Logging'] = parameterDict(value=False, toolTip='Show warnings in console. Only use when debugging to keep console uncluttered.',
                                           widgetType=Parameter.TYPE.BOOL, attr='log')
         return ds
@@ -2358,6 +2466,21 @@ class Device(ChannelManager):
         """Extend to add code to be executed in case the :ref:`acquisition_interval` changes."""
         super().intervalChanged()
         self.estimateStorage()
+        self.updateTierBucketSizes()
+
+    def getTierBucketSizes(self):
+        """Returns the number of data points per bucket for the 1 s and 1 min tiers of the tiered history mode.
+        Buckets contain whole data points, thus the first tier is only exactly 1 s if the interval divides 1000 ms.
+        For intervals of 1 s or longer, the first tier contains one data point per bucket and the second tier buckets of 60 data points."""
+        return (max(round(1000/self.interval), 1), 60)
+
+    def updateTierBucketSizes(self):
+        """Applies bucket sizes for the current interval to existing tiered histories."""
+        bucketSizes = self.getTierBucketSizes()
+        histories = [self.time] + [channel.values for channel in self.channels] + [channel.backgrounds for channel in self.channels if self.useBackgrounds and hasattr(channel, 'backgrounds')]
+        for history in histories:
+            if isinstance(history, TieredNp):
+                history.setBucketSizes(bucketSizes)
 
     def startAcquisition(self):
         """Starts device Acquisition.
@@ -2447,13 +2570,62 @@ class Device(ChannelManager):
         # return self.useBackgrounds and qSet.value(f'{self.name}/subtractBackground', 'false') == 'true'
 
     def estimateStorage(self):
-        numChannelsBackgrounds = len(self.channels) * 2 if self.useBackgrounds else len(self.channels)
-        self.maxDataPoints = (self.maxStorage * 1024**2 - 8) / (4 * numChannelsBackgrounds)  # including time channel
+        # bytes per data point for all channels, depending on storage codec
+        bytesPerDataPoint = sum([channel.getStorageBytes() for channel in self.channels]) * (2 if self.useBackgrounds else 1)
+        if self.historyMode in [self.TIERED, self.COLUMNAR]:
+            bytesPerDataPoint = 4 * len(self.channels) * (2 if self.useBackgrounds else 1) # always float32
+        bytesPerDataPoint = max(bytesPerDataPoint, 4)
+        self.maxDataPoints = (self.maxStorage * 1024**2 - 8) / bytesPerDataPoint  # including time channel
+        if self.historyMode == self.MEMORYMAPPED:
+            self.maxDataPoints = (self.maxDiskStorage * 1024**3 - 8) / bytesPerDataPoint
+        elif self.historyMode == self.RINGBUFFER:
+            self.maxDataPoints = self.maxDataPoints / 2 # ring buffer stores every value twice
         totalDays = self.interval / 1000 * self.maxDataPoints / 3600 / 24
         self.pluginManager.Settings.settings[f'{self.name}/{self.MAXDATAPOINTS}'].getWidget().setToolTip(
-        f'Using an interval of {self.interval} ms and maximum storage of {self.maxStorage:d} MB allows for\n'+
+        (f'Using an interval of {self.interval} ms and maximum disk storage of {self.maxDiskStorage:d} GB allows for\n' if self.historyMode == self.MEMORYMAPPED else
+        f'Using an interval of {self.interval} ms and maximum storage of {self.maxStorage:d} MB allows for\n')+
         f'a history of {totalDays:.2f} days or {self.maxDataPoints} data points for {len(self.channels)} channels.\n'+
-        'After this time, data thinning will allow to retain even older data, but at lower resolution.')
+        ('After this time, the oldest data will be discarded.' if self.historyMode == self.RINGBUFFER else
+        'After this time, data thinning will allow to retain even older data, but at lower resolution.'))
+
+    def createHistory(self, initialData=None, max_size=None, dtype=np.float32, timeAxis=False, codec=None):
+        """Returns a new container for the history of time, values, or backgrounds according to the selected history mode.
+
+        :param initialData: Data used to initialize the history, defaults to None
+        :type initialData: numpy.array, optional
+        :param max_size: Maximum number of data points, defaults to None
+        :type max_size: int, optional
+        :param dtype: Data type, use float64 for time, defaults to np.float32
+        :type dtype: numpy.dtype, optional
+        :param timeAxis: Indicates that the history is used as time axis of the device, defaults to False
+        :type timeAxis: bool, optional
+        :param codec: Codec used to store data in a compact data type. Not used in tiered and columnar history modes, defaults to None
+        :type codec: :class:`~esibd.core.StorageCodec`, optional
+        :return: History container that implements add and get.
+        :rtype: :class:`~esibd.core.DynamicNp`
+        """
+        if self.historyMode == self.COLUMNAR:
+            if timeAxis:
+                if isinstance(self.time, ColumnarNp): # keep columns assigned to existing channels
+                    self.time.init(initialData=initialData, max_size=max_size, dtype=dtype)
+                    return self.time
+                return ColumnarNp(initialData=initialData, max_size=max_size, dtype=dtype)
+            if not isinstance(self.time, ColumnarNp):
+                self.time = ColumnarNp(max_size=max_size)
+            return ColumnNp(store=self.time, initialData=initialData)
+        if self.historyMode == self.RINGBUFFER:
+            return RingBufferNp(initialData=initialData, max_size=max_size, dtype=dtype, codec=codec)
+        if self.historyMode == self.TIERED:
+            history = TieredNp(initialData=initialData, max_size=max_size, dtype=dtype, rawSize=self.rawHistory*60000/self.interval,
+                            bucketSizes=self.getTierBucketSizes())
+            if not timeAxis and initialData is None and isinstance(self.time, TieredNp):
+                history.alignTo(self.time) # channels added later cover the same buckets as the time axis
+            return history
+        if self.historyMode == self.MEMORYMAPPED:
+            return MemoryMappedNp(initialData=initialData, max_size=max_size, dtype=dtype, codec=codec, path=Path(self.pluginManager.Settings.configPath) / 'history' / self.name)
+        if self.historyMode == self.SEGMENTED and not timeAxis: # time axis has no gaps
+            return SegmentedNp(initialData=initialData, max_size=max_size, dtype=dtype, codec=codec)
+        return DynamicNp(initialData=initialData, max_size=max_size, dtype=dtype, codec=codec)
 
     def applyValues(self, apply=False):
         """Applies :class:`~esibd.core.Channel` values to physical devices. Only used by input :class:`devices<esibd.plugins.Device>`.
@@ -2493,8 +2665,7 @@ class Device(ChannelManager):
             # Complete data can still be exported if needed by displaying entire history before exporting.
             # if default == True: save entire history to default file for restoring on next start
             t_min, t_max = self.liveDisplay.livePlotWidgets[0].getAxis('bottom').range
-            i_min = np.argmin(np.abs(_time - t_min))
-            i_max = np.argmin(np.abs(_time - t_max))
+            i_min, i_max = self.timeIndex.getRange(t_min, t_max)
             fullRange = False
         input_group = self.requireGroup(group, INPUTCHANNELS)
         try:
@@ -2503,16 +2674,26 @@ class Device(ChannelManager):
             self.print(f'Could not create data set. If the file already exists, make sure to increase the measurement number and try again. Original error: {e}', PRINT.ERROR)
             return
         output_group = self.requireGroup(group, OUTPUTCHANNELS)
+        # copy values of all channels in one step if they are stored in a single array
+        matrix = (self.time.getMatrix() if fullRange else self.time.getMatrix(i_min, i_max)).copy() if isinstance(self.time, ColumnarNp) else None
         # avoid using getValues() function and use get() to make sure raw data, without background subtraction or unit correction etc. is saved in file
         for channel in self.getDataChannels():
             if channel.name in output_group:
                 self.print(f'Ignoring duplicate channel {channel.name}', PRINT.WARNING)
                 continue
-            value_dataset = output_group.create_dataset(channel.name, data=channel.values.get() if fullRange else channel.values.get()[i_min:i_max], dtype='f')
+            if matrix is not None and isinstance(channel.values, ColumnNp):
+                values = matrix[:, channel.values.column]
+            else:
+                values = channel.values.get() if fullRange else channel.values.get()[i_min:i_max]
+            value_dataset = output_group.create_dataset(channel.name, data=values, dtype='f')
             value_dataset.attrs[UNIT] = self.unit
             if self.useBackgrounds:
                 # Note: If data format will be changed in future (ensuring backwards compatibility), consider saving single 2D data set with data and background instead. for now, no need
-                background_dataset = output_group.create_dataset(channel.name + '_BG', data=channel.backgrounds.get() if fullRange else channel.backgrounds.get()[i_min:i_max], dtype='f')
+                if matrix is not None and isinstance(channel.backgrounds, ColumnNp):
+                    backgrounds = matrix[:, channel.backgrounds.column]
+                else:
+                    backgrounds = channel.backgrounds.get() if fullRange else channel.backgrounds.get()[i_min:i_max]
+                background_dataset = output_group.create_dataset(channel.name + '_BG', data=backgrounds, dtype='f')
                 background_dataset.attrs[UNIT] = self.unit
 
     def restoreOutputData(self):
@@ -2528,15 +2709,15 @@ class Device(ChannelManager):
                     if not (INPUTCHANNELS in group and OUTPUTCHANNELS in group):
                         return False
                     input_group = group[INPUTCHANNELS]
-                    self.time = DynamicNp(initialData=input_group[self.TIME][:], max_size=self.maxDataPoints, dtype=np.float64)
+                    self.time = self.createHistory(initialData=input_group[self.TIME][:], max_size=self.maxDataPoints, dtype=np.float64, timeAxis=True)
                     output_group = group[OUTPUTCHANNELS]
                     for name, item in output_group.items():
                         channel = self.getChannelByName(name.strip('_BG'))
                         if channel is not None:
                             if name.endswith('_BG'):
-                                channel.backgrounds = DynamicNp(initialData=item[:], max_size=self.maxDataPoints)
+                                channel.backgrounds = channel.createHistory(initialData=item[:], max_size=self.maxDataPoints)
                             else:
-                                channel.values = DynamicNp(initialData=item[:], max_size=self.maxDataPoints)
+                                channel.values = channel.createHistory(initialData=item[:], max_size=self.maxDataPoints)
                 except RuntimeError as e:
                     self.print(f'Could not restore data from {file.name}. You can try to fix and then restart. If you record new data it will be overwritten! Error {e}', flag=PRINT.ERROR)
 
@@ -2598,39 +2779,34 @@ class Device(ChannelManager):
             # Equations for output devices are evaluated only when plotting. Calling them for every value change event would cause a massive computational load.
             for channel in self.getChannels():
                 channel.appendValue(lenT=self.time.size, nan=nan) # add time after values to make sure value arrays stay aligned with time array
-            self.time.add(time.time()) # add time in seconds
+            self.time.add(self.getSampleTime()) # add time in seconds
             if self.liveDisplayActive():
-                self.signalComm.plotSignal.emit()
+                if self.pluginManager.backpressure.plotDue(self.name): # plot frame rate may be lower than acquisition rate if GUI is lagging
+                    self.signalComm.plotSignal.emit()
             else:
                 self.measureInterval()
 
+    def getSampleTime(self):
+        """Returns the time stamp used for the next data point in seconds since epoch."""
+        if self.timestampMode == self.APPENDTIME:
+            return time.time()
+        measuredTimes = [channel.measuredTime for channel in self.getChannels() if channel.measuredTime is not None]
+        now = time.time()
+        if len(measuredTimes) == 0:
+            return now # controller does not provide time stamps
+        measuredTime = max(measuredTimes)
+        if measuredTime < now - 2*self.interval/1000:
+            measuredTime = now # controller stopped publishing, do not repeat old time stamp
+        if self.time.size > 0:
+            return max(measuredTime, self.time.get(length=1)[0]) # time axis has to be monotonic
+        return measuredTime
+
     def measureInterval(self):
-        # free up resources by limiting data points or stopping acquisition if UI becomes unresponsive
+        # only an indicator, reactions to a lagging GUI are handled by PluginManager.backpressure without stopping acquisition
         # * when GUI thread becomes unresponsive, this function is sometimes delayed and sometimes too fast.
-        self.interval_measured = int((time.time()*1000-self.lastIntervalTime)) if self.lastIntervalTime is not None else self.interval
+        self.interval_measured = int((time.monotonic()*1000-self.lastIntervalTime)) if self.lastIntervalTime is not None else self.interval
         self.interval_tolerance = max(50, self.interval/10) # larger margin for error if interval is large.
-        if abs(self.interval_measured - self.interval) < self.interval_tolerance:
-            self.lagging = 0 # reset / ignore temporary lag if interval is within range
-        elif self.interval_measured > self.interval + self.interval_tolerance: # increase self.lagging and react if interval is longer than expected
-            if self.lagging < 10:
-                self.lagging += 1
-            elif self.lagging < 20: # lagging 10 times in a row -> reduce data points
-                if self.lagging == 10:
-                    self.pluginManager.DeviceManager.limit_display_size = True
-                    self.pluginManager.DeviceManager.max_display_size = min(self.pluginManager.DeviceManager.max_display_size, 1000) # keep if already smaller
-                    self.print(f'Slow GUI detected, limiting number of displayed data points to {self.pluginManager.DeviceManager.max_display_size} per channel.', flag=PRINT.WARNING)
-                self.lagging += 1
-            else: # lagging > 19 times in a row -> turn of acquisition
-                if self.lagging == 20:
-                    self.print('Slow GUI detected, stopped acquisition. Reduce number of active channels or acquisition interval.'+
-                               ' Identify which plugin(s) is(are) most resource intensive and contact plugin author.', flag=PRINT.WARNING)
-                    self.pluginManager.DeviceManager.closeCommunication()
-        else:
-            # keep self.lagging unchanged. One long interval can be followed by many short intervals when GUI is catching up with events.
-            # This might happen due to another part of the program blocking the GUI temporarily or after decreasing max_display_size.
-            # This should not trigger a reaction but also should not reset self.lagging as plotting is not yet stable.
-            pass
-        self.lastIntervalTime = time.time()*1000
+        self.lastIntervalTime = time.monotonic()*1000
 
     def toggleRecording(self, on=None, manual=False):
         """Toggle recoding of data in :class:`~esibd.plugins.LiveDisplay`."""
@@ -2644,27 +2820,40 @@ class Device(ChannelManager):
             if not self.recording:
                 self.clearPlot()
                 if not self.initialized():
-                    self.initializeCommunication() # will start recording when initialization is complete
+                    self.initializeCommunication() # will start acquisition when initialization is complete
+                    self.recording = True # show state while waiting, toggling off before all devices are ready cancels recording
+                    if not self.recordingPending: # keep at most one pending callback, e.g. if toggled off and on again while initializing
+                        self.recordingPending = True
+                        self.pluginManager.deviceInitializer.whenReady(self.startPendingRecording) # start recording of all devices together
                 else:
                     self.startAcquisition()
-                self.startRecording()
+                    self.startRecording()
+
+    def startPendingRecording(self):
+        """Starts recording once all devices are initialized unless recording has been toggled off in the meantime."""
+        self.recordingPending = False
+        if self.recording:
+            self.startRecording()
 
     def clearHistory(self):
         self.clearPlot()
+        self.time = self.createHistory(max_size=self.maxDataPoints, dtype=np.float64, timeAxis=True) # create time first, channels may depend on it
         for channel in self.getChannels():
             channel.clearHistory(max_size=self.maxDataPoints)
-        self.time = DynamicNp(max_size=self.maxDataPoints, dtype=np.float64)
 
     def runDataThread(self, recording):
         """Regularly triggers reading and appending of data.
         This uses the current value of :class:`channels<esibd.core.Channel>` which is updated
         independently by the corresponding :class:`~esibd.core.DeviceController`."""
+        # deadlines are independent of the time needed to emit the signal and of the precision of time.sleep
+        # -> 10 Hz gives 10 Hz on average and deviations measured by measureInterval are caused by the GUI
+        self.dataTimer = PeriodicTimer(interval=lambda: self.interval, name=f'{self.name} data')
         while recording():
-            # time.sleep precision in low ms range on windows -> will usually be a few ms late
-            # e.g. 0.1 will not give a true 10 Hz repetition rate
-            # if that becomes important and decreasing the interval to compensate for delay is not sufficient a better method is required
-            self.signalComm.appendDataSignal.emit()
-            time.sleep(self.interval/1000) # in seconds # wait at end to avoid emitting signal after recording set to False
+            if self.pluginManager.backpressure.batching:
+                self.pluginManager.backpressure.requestAppend(self) # appends of all devices are executed in one event
+            else:
+                self.signalComm.appendDataSignal.emit()
+            self.dataTimer.wait() # wait at end to avoid emitting signal after recording set to False
 
     def duplicateChannel(self):
         if self.modifyChannel() is not None and self.modifyChannel().getDevice().initialized():
@@ -3339,6 +3528,47 @@ output_index = next((i for i, output in enumerate(outputs) if output.name == '{s
         # trigger from external thread to assure GUI update happens in main thread
         self.recording = recording
 
+    def dwell(self, wait):
+        """Waits for values to settle and then for the averaging time. Executed in runThread.
+
+        :param wait: Wait time in ms.
+        :type wait: int
+        :return: Start and end of the averaging window in s since epoch.
+        :rtype: tuple
+        """
+        time.sleep(wait/1000)
+        t_start = time.time()
+        time.sleep(self.average/1000)
+        return t_start, time.time()
+
+    def getStepMean(self, output, window, subtractBackground=None):
+        """Returns the mean of the last :attr:`~esibd.plugins.Scan.measurementsPerStep` values of output.
+        If measured time stamps are used, returns the mean of all values measured within window instead and waits for data that has been measured
+        but not yet added to the history, e.g. if the user interface is lagging. This also applies to devices that stream samples with measured time stamps.
+        Falls back to the last :attr:`~esibd.plugins.Scan.measurementsPerStep` values if no data has been measured within window.
+
+        :param output: Output channel.
+        :type output: :class:`~esibd.core.ScanChannel`
+        :param window: Start and end of the averaging window as returned by :meth:`~esibd.plugins.Scan.dwell`.
+        :type window: tuple
+        :param subtractBackground: Indicates if background should be subtracted, defaults to None
+        :type subtractBackground: bool, optional
+        """
+        device = output.getDevice()
+        measuredTime = getattr(device, 'timestampMode', Device.APPENDTIME) != Device.APPENDTIME
+        values = None
+        if measuredTime or getattr(device, 'streaming', False):
+            timeout = time.time() + 2*device.interval/1000 + 1
+            while measuredTime and time.time() < timeout:
+                times = output.getTimes()
+                if times is None or (times.shape[0] > 0 and times[-1] >= window[1]):
+                    break
+                time.sleep(.01)
+            values = output.getValuesInWindow(window[0], window[1], subtractBackground=subtractBackground)
+        if values is None or values.shape[0] == 0:
+            values = output.getValues(subtractBackground=subtractBackground, length=self.measurementsPerStep)
+        return np.mean(values)
+
     def run(self, recording):
         """Steps through input values, records output values, and triggers plot update.
         Executed in runThread. Will likely need to be adapted for custom scans."""
@@ -3350,13 +3580,13 @@ output_index = next((i for i, output in enumerate(outputs) if output.name == '{s
                 if not waitLong and abs(_input.value-step[j]) > self.largestep:
                     waitLong=True
                 _input.updateValueSignal.emit(step[j])
-            time.sleep(((self.waitLong if waitLong else self.wait)+self.average)/1000) # if step is larger than threshold use longer wait time
+            window = self.dwell(self.waitLong if waitLong else self.wait) # if step is larger than threshold use longer wait time
             for j, output in enumerate(self.outputs):
                 if len(self.inputs) == 1: # 1D scan
-                    output.recordingData[i] = np.mean(output.getValues(subtractBackground=output.getDevice().subtractBackgroundActive(), length=self.measurementsPerStep))
+                    output.recordingData[i] = self.getStepMean(output, window, subtractBackground=output.getDevice().subtractBackgroundActive())
                 else: # 2D scan, higher dimensions not jet supported
-                    output.recordingData[i%len(self.inputs[1].getRecordingData()), i//len(self.inputs[1].getRecordingData())] = np.mean(output.getValues(subtractBackground=output.getDevice().subtractBackgroundActive(),
-                                                                                                                  length=self.measurementsPerStep))
+                    output.recordingData[i%len(self.inputs[1].getRecordingData()), i//len(self.inputs[1].getRecordingData())] = self.getStepMean(output, window,
+                                                                                                                  subtractBackground=output.getDevice().subtractBackgroundActive())
 
             if i == len(steps)-1 or not recording(): # last step
                 for j, _input in enumerate(self.inputs):
@@ -3946,6 +4176,11 @@ class Console(Plugin):
             "channel.getParameterByName(channel.VALUE).getWidget().setStyleSheet('background-color:red;') # test widget styling",
             "_=[parameter.getWidget().setStyleSheet('background-color:red;border: 0px;padding: 0px;margin: 0px;') for parameter in channel.parameters]",
             "PluginManager.showThreads() # show all active threads",
+            "PluginManager.showAcquisitionJitter() # show timing of scheduled acquisition jobs",
+            "print(PluginManager.deviceInitializer.report()) # show initialization status and time of all controllers",
+            "PluginManager.lockProfiler.enabled = True # record wait and hold times of all locks",
+            "PluginManager.showLockProfile() # show which threads wait for or hold locks",
+            "# PluginManager.lockProfiler.dump(Settings.dataPath / 'lockProfile.txt') # save lock profile to file",
             "[plt.figure(num).get_label() for num in plt.get_fignums()] # show all active matplotlib figures",
             "# Module=EsibdCore.dynamicImport('ModuleName','C:/path/to/module.py') # import a python module, e.g. to run generated plot files.",
             "# PluginManager.test() # Automated testing of all active plugins. Can take a few minutes."
@@ -4598,6 +4833,7 @@ class DeviceManager(Plugin):
         self.timer.timeout.connect(self.store)
         self.timer.setInterval(3600000) # every 1 hour
         self.timer.start()
+        self.pluginManager.widgetRefresh.setRate(self.widgetRefreshRate)
 
     def runTestParallel(self):
         """:meta private:"""
@@ -4682,8 +4918,14 @@ class DeviceManager(Plugin):
         ds = super().getDefaultSettings()
         ds['Acquisition/Max display points'] = parameterDict(value=2000, toolTip='Maximum number of data points per channel used for plotting. Decrease if plotting is limiting performance.',
                                                                 event=lambda: self.livePlot(apply=True), widgetType=Parameter.TYPE.INT, _min=100, _max=100000, attr='max_display_size')
+        ds['Acquisition/Widget refresh rate'] = parameterDict(value=10, toolTip='Rate in Hz at which values are updated in the visible rows of channel lists.\n' +
+                                                               'Values are acquired, recorded, and processed at the full rate independent of this setting.', widgetType=Parameter.TYPE.INT, _min=1, _max=30,
+                                                               event=lambda: self.pluginManager.widgetRefresh.setRate(self.widgetRefreshRate), attr='widgetRefreshRate')
         ds['Acquisition/Limit display points'] = parameterDict(value=True, toolTip="Number of displayed data points will be limited to 'Max display points'", widgetType=Parameter.TYPE.BOOL,
                                                                event=lambda: self.livePlot(apply=True), attr='limit_display_size')
+        ds['Acquisition/Display envelope'] = parameterDict(value=True, toolTip="If display points are limited, show minimum and maximum of groups of data points instead of every nth data point.\n" +
+                                                               'This makes sure that short spikes are always visible.', widgetType=Parameter.TYPE.BOOL,
+                                                               event=lambda: self.livePlot(apply=True), attr='display_envelope')
         ds['Acquisition/Restore data'] = parameterDict(value=True, toolTip='Enable to store and restore data for all devices.',
                                                         widgetType=Parameter.TYPE.BOOL, attr='restoreData')
         return ds
@@ -5380,6 +5622,7 @@ class UCM(ChannelManager):
     inout = INOUT.NONE
     maxDataPoints = 0 # UCM channels do not store data
     useMonitors = True
+    lazyWidgets = False # channels customize widgets in initGUI
 
     class UCMChannel(RelayChannel, Channel):
         """Minimal UI for abstract channel."""
@@ -5616,6 +5859,7 @@ class PID(ChannelManager):
     optional = True
     inout = INOUT.NONE
     maxDataPoints = 0 # PID channels do not store data
+    lazyWidgets = False # channels customize widgets in initGUI
 
     class PIDChannel(RelayChannel, Channel):
         """Minimal UI for abstract PID channel."""
@@ -1,10 +1,8 @@
 # pylint: disable=[missing-module-docstring] # only single class in module
 import socket
-from threading import Thread
-import time
 import numpy as np
 from esibd.plugins import Device
-from esibd.core import Parameter, parameterDict, PluginManager, Channel, PRINT, DeviceController, getTestMode
+from esibd.core import Parameter, parameterDict, PluginManager, Channel, PRINT, DeviceController, PeriodicTimer, LineFramer, getTestMode
 
 def providePlugins():
     return [Voltage]
@@ -98,23 +96,26 @@ class VoltageChannel(Channel):
                                                                     or (not self.device.isOn() and abs(self.monitor - 0) > 1)))
 
     def realChanged(self):
-        self.getParameterByName(self.MODULE).getWidget().setVisible(self.real)
-        self.getParameterByName(self.ID).getWidget().setVisible(self.real)
+        if self.realized: # otherwise visibility will be applied in realize
+            self.getParameterByName(self.MODULE).getWidget().setVisible(self.real)
+            self.getParameterByName(self.ID).getWidget().setVisible(self.real)
         super().realChanged()
 
 class VoltageController(DeviceController):
 
     def __init__(self, _parent, modules):
         super().__init__(_parent=_parent)
-        self.modules    = modules or [0]
+        self.modules    = sorted(modules or [0])
         self.socket     = None
         self.maxID = max([channel.id if channel.real else 0 for channel in self.device.getChannels()]) # used to query correct amount of monitors
-        self.voltages   = np.zeros([len(self.modules), self.maxID+1])
+        self.voltages   = np.zeros([max(self.modules)+1, self.maxID+1]) # indexed by module number
+        self.framer     = LineFramer(EOL='\n')
 
     def runInitialization(self):
         try:
             self.socket = socket.create_connection(address=(self.device.ip, int(self.device.port)), timeout=3)
-            self.print(self.ISEGWriteRead(message='*IDN?\r\n'.encode('utf-8')))
+            self.framer.reset()
+            self.print(self.ISEGWriteRead(message='*IDN?\r\n'))
             self.signalComm.initCompleteSignal.emit()
         except Exception as e: # pylint: disable=[broad-except] # socket does not throw more specific exception
             self.print(f'Could not establish SCPI connection to {self.device.ip} on port {int(self.device.port)}. Exception: {e}', PRINT.WARNING)
@@ -129,31 +130,31 @@ class VoltageController(DeviceController):
 
     def applyVoltage(self, channel):
         if not getTestMode() and self.initialized:
-            Thread(target=self.applyVoltageFromThread, args=(channel,), name=f'{self.device.name} applyVoltageFromThreadThread').start()
+            self.queueSetpoint(channel)
 
-    def applyVoltageFromThread(self, channel):
-        self.ISEGWriteRead(message=f':VOLT {channel.value if channel.enabled else 0},(#{channel.module}@{channel.id})\r\n'.encode('utf-8'))
+    def applySetpoints(self, channels):
+        with self.lock.acquire_timeout(1, timeoutMessage=f'Cannot acquire lock to apply {len(channels)} voltages.') as lock_acquired:
+            if lock_acquired: # all channels in one round trip
+                self.ISEGPipeline(self.setpointCommands(channels))
+
+    def setpointCommands(self, channels):
+        return [f':VOLT {channel.value if channel.enabled else 0},(#{channel.module}@{channel.id})\r\n' for channel in channels]
 
     def updateValue(self):
-        if getTestMode():
-            self.fakeNumbers()
-        else:
-            for channel in self.device.getChannels():
-                if channel.real:
-                    channel.monitor = self.voltages[channel.module][channel.id]
+        self.fakeNumbers() # only used in test mode, real values are applied using publishValues
 
     def voltageON(self, parallel=True): # this can run in main thread
         if not getTestMode() and self.initialized:
-            if parallel:
-                Thread(target=self.voltageONFromThread, name=f'{self.device.name} voltageONFromThreadThread').start()
-            else:
-                self.voltageONFromThread()
+            self.queueCommand(self.moduleON) # after pending setpoints
+            if not parallel:
+                self.flushCommands() # make sure this is completed before closing connection
         elif getTestMode():
             self.fakeNumbers()
 
-    def voltageONFromThread(self):
-        for module in self.modules:
-            self.ISEGWriteRead(message=f":VOLT {'ON' if self.device.isOn() else 'OFF'},(#{module}@0-{self.maxID})\r\n".encode('utf-8'))
+    def moduleON(self):
+        with self.lock.acquire_timeout(1, timeoutMessage='Cannot acquire lock to turn voltages on or off.') as lock_acquired:
+            if lock_acquired:
+                self.ISEGPipeline([f":VOLT {'ON' if self.device.isOn() else 'OFF'},(#{module}@0-{self.maxID})\r\n" for module in self.modules])
 
     def fakeNumbers(self):
         for channel in self.device.getChannels():
@@ -162,35 +163,91 @@ class VoltageController(DeviceController):
                 channel.monitor = (channel.value if self.device.isOn() and channel.enabled else 0) + 5 * (np.random.choice([0, 1], p=[0.98, 0.02])) + np.random.random() - 0.5
 
     def runAcquisition(self, acquiring):
+        self.acquisitionTimer = PeriodicTimer(interval=lambda: self.device.interval, name=self.device.name)
         while acquiring():
             with self.lock.acquire_timeout(1) as lock_acquired:
                 if lock_acquired:
-                    if not getTestMode():
-                        for module in self.modules:
-                            res = self.ISEGWriteRead(message=f':MEAS:VOLT? (#{module}@0-{self.maxID+1})\r\n'.encode('utf-8'), lock_acquired=lock_acquired)
+                    if getTestMode():
+                        self.signalComm.updateValueSignal.emit() # fake numbers are generated in main thread
+                    else:
+                        # send pending setpoints and queries of all modules at once and wait for all responses in one round trip
+                        setpoints = self.commandQueue.takeSetpoints() if self.commandQueue is not None else []
+                        try:
+                            responses = self.ISEGPipeline(self.setpointCommands(setpoints) +
+                                                          [f':MEAS:VOLT? (#{module}@0-{self.maxID})\r\n' for module in self.modules])[len(setpoints):]
+                        finally:
+                            if setpoints:
+                                self.commandQueue.done()
+                        for module, res in zip(self.modules, responses):
                             if res != '':
                                 try:
-                                    monitors = [float(x[:-1]) for x in res[:-4].split(',')] # res[:-4] to remove trailing '\r\n'
+                                    monitors = [float(x.strip().rstrip('V')) for x in res.split(',')][:self.maxID+1] # remove unit
                                     # fill up to self.maxID to handle all modules the same independent of the number of channels.
                                     self.voltages[module] = np.hstack([monitors, np.zeros(self.maxID+1-len(monitors))])
                                 except (ValueError, TypeError) as e:
                                     self.print(f'Parsing error: {e} for {res}.')
-                self.signalComm.updateValueSignal.emit() # signal main thread to update GUI
-            time.sleep(self.device.interval/1000)
-
-    def ISEGWrite(self, message):
-        self.socket.sendall(message)
-
-    def ISEGRead(self):
-        # only call from thread! # make sure lock is acquired before and released after
-        if not getTestMode() and self.initialized or self.initializing:
-            return self.socket.recv(4096).decode("utf-8")
+                        channels = self.device.getChannels()
+                        indices = [i for i, channel in enumerate(channels) if channel.real]
+                        self.publishValues([self.voltages[channels[i].module][channels[i].id] for i in indices], indices) # signal main thread to update GUI
+            self.acquisitionTimer.wait()
+
+    def ISEGPipeline(self, commands):
+        """Sends all commands back to back and returns one response per command.
+        Responses are framed independent of how they are combined or split across recv calls.
+        Only call from thread with lock acquired!
+
+        :param commands: Commands including line termination.
+        :type commands: list[str]
+        :return: Responses without line termination. Empty for commands that have not been answered before timeout.
+        :rtype: list[str]
+        """
+        if len(commands) == 0:
+            return []
+        responses = []
+        try:
+            self.socket.sendall(''.join(commands).encode('utf-8'))
+            while len(responses) < len(commands):
+                data = self.socket.recv(4096)
+                if not data:
+                    raise ConnectionError('Connection closed by ECH244.')
+                responses.extend([response.rstrip('\r') for response in self.framer.feed(data)])
+        except (socket.timeout, OSError) as e:
+            self.print(f'Communication error: {e}. Received {len(responses)} of {len(commands)} responses.', PRINT.ERROR)
+            responses.extend(['']*(len(commands)-len(responses)))
+            self.drain() # late responses would otherwise be attributed to the next commands
+        return responses[:len(commands)]
+
+    def drain(self, timeout=0.5):
+        """Discards responses that arrive after a timeout so that the next pipeline starts aligned with its responses.
+        Only call from thread with lock acquired!
+
+        :param timeout: Time in s without new data after which the stream is considered empty, defaults to 0.5
+        :type timeout: float, optional
+        """
+        self.framer.reset()
+        discarded = 0
+        try:
+            self.socket.settimeout(timeout)
+            while True:
+                data = self.socket.recv(4096)
+                if not data:
+                    break # connection closed, next pipeline will report the error
+                discarded += len(data)
+        except (socket.timeout, OSError):
+            pass # no more data
+        finally:
+            try:
+                self.socket.settimeout(3)
+            except OSError:
+                pass
+        self.framer.reset()
+        if discarded > 0:
+            self.print(f'Discarded {discarded} bytes of late responses.', PRINT.WARNING)
 
     def ISEGWriteRead(self, message, lock_acquired=False):
         response = ''
         if not getTestMode():
             with self.lock.acquire_timeout(1, timeoutMessage=f'Cannot acquire lock for message: {message}.', lock_acquired=lock_acquired) as lock_acquired:
                 if lock_acquired:
-                    self.ISEGWrite(message) # get channel name
-                    response = self.ISEGRead()
+                    response = self.ISEGPipeline([message])[0]
         return response
@@ -5,7 +5,7 @@ import numpy as np
 from PyQt6.QtCore import pyqtSignal
 import pyvisa
 from esibd.plugins import Device
-from esibd.core import Parameter, parameterDict, PluginManager, Channel, PRINT, DeviceController, getTestMode
+from esibd.core import Parameter, parameterDict, PluginManager, Channel, PRINT, DeviceController, PeriodicTimer, getTestMode
 
 def providePlugins():
     return [KEITHLEY]
@@ -121,7 +121,8 @@ class CurrentChannel(Channel):
         self.preciseCharge = 0
 
     def realChanged(self):
-        self.getParameterByName(self.ADDRESS).getWidget().setVisible(self.real)
+        if self.realized: # otherwise visibility will be applied in realize
+            self.getParameterByName(self.ADDRESS).getWidget().setVisible(self.real)
         super().realChanged()
 
 class CurrentController(DeviceController):
@@ -178,6 +179,7 @@ class CurrentController(DeviceController):
             super().startAcquisition()
 
     def runAcquisition(self, acquiring):
+        self.acquisitionTimer = PeriodicTimer(interval=lambda: self.channel.device.interval, name=f'{self.channel.device.name} {self.channel.name}')
         while acquiring():
             with self.lock.acquire_timeout(1) as lock_acquired:
                 if lock_acquired:
@@ -187,7 +189,7 @@ class CurrentController(DeviceController):
                         self.readSingleNum()
                         # no sleep needed, timing controlled by waiting during readSingleNum
             if getTestMode():
-                time.sleep(self.channel.device.interval/1000)
+                self.acquisitionTimer.wait()
 
     def updateValue(self, value):
         self.channel.value = value
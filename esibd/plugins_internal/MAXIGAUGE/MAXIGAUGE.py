@@ -1,5 +1,4 @@
 # pylint: disable=[missing-module-docstring] # only single class in module
-import time
 import serial
 import numpy as np
 from esibd.plugins import Device
@@ -58,9 +57,12 @@ class PressureChannel(Channel):
 
 class PressureController(DeviceController):
 
+    useScheduler = True
+
     def closeCommunication(self):
         if self.port is not None:
             with self.lock.acquire_timeout(1, timeoutMessage='Could not acquire lock before closing port.'):
+                self.detachSerialTransport(self.port)
                 self.port.close()
                 self.port = None
         super().closeCommunication()
@@ -69,6 +71,7 @@ class PressureController(DeviceController):
         try:
             self.port=serial.Serial(f'{self.device.COM}', baudrate=9600, bytesize=serial.EIGHTBITS,
                                     parity=serial.PARITY_NONE, stopbits=serial.STOPBITS_ONE, xonxoff=False, timeout=2)
+            self.attachSerialTransport(self.port, encoding='ascii', EOL='\r\n')
             TPGStatus = self.TPGWriteRead(message='TID')
             self.print(f"MaxiGauge Status: {TPGStatus}") # gauge identification
             if TPGStatus == '':
@@ -83,13 +86,9 @@ class PressureController(DeviceController):
         self.pressures = [np.nan]*len(self.device.channels)
         super().initComplete()
 
-    def runAcquisition(self, acquiring):
-        while acquiring():
-            with self.lock.acquire_timeout(1) as lock_acquired:
-                if lock_acquired:
-                    self.fakeNumbers() if getTestMode() else self.readNumbers()
-                    self.signalComm.updateValueSignal.emit()
-            time.sleep(self.device.interval/1000)
+    def readValues(self):
+        self.fakeNumbers() if getTestMode() else self.readNumbers()
+        self.publishValues(self.pressures) # update all channels in one step
 
     PRESSURE_READING_STATUS = {
       0: 'Measurement data okay',
@@ -102,23 +101,35 @@ class PressureController(DeviceController):
     }
 
     def readNumbers(self):
-        for i, channel in enumerate(self.device.getChannels()):
-            if channel.enabled and channel.active:
-                if self.initialized:
-                    msg = self.TPGWriteRead(message=f'PR{channel.id}', lock_acquired=True)
-                    try:
-                        status, pressure = msg.split(',')
-                        if status == '0':
-                            self.pressures[i] = float(pressure) # set unit to mbar on device
-                            # self.print(f'Read pressure for channel {channel.name}', flag=PRINT.DEBUG)
-                        else:
-                            self.print(f'Could not read pressure for {channel.name}: {self.PRESSURE_READING_STATUS[int(status)]}.', PRINT.WARNING)
-                            self.pressures[i] = np.nan
-                    except Exception as e:
-                        self.print(f'Failed to parse pressure from {msg}: {e}', PRINT.ERROR)
-                        self.pressures[i] = np.nan
-                else:
-                    self.pressures[i] = np.nan
+        channels = self.device.getChannels()
+        ids = np.array([channel.id if channel.enabled and channel.active else 0 for channel in channels]) # 0 -> not read
+        self.pressures = np.full(len(channels), np.nan)
+        if not self.initialized or not ids.any():
+            return
+        msg = self.TPGWriteRead(message='PRX', lock_acquired=True) # status and pressure of all gauges in one round trip
+        try:
+            statuses, pressures = self.parsePRX(msg)
+        except ValueError as e:
+            self.print(f'Failed to parse pressures from {msg}: {e}', PRINT.ERROR)
+            return
+        read = (ids > 0) & (ids <= statuses.shape[0])
+        gauges = ids[read]-1
+        self.pressures[read] = np.where(statuses[gauges] == 0, pressures[gauges], np.nan) # set unit to mbar on device
+        for i in np.flatnonzero(read)[statuses[gauges] != 0]:
+            self.print(f'Could not read pressure for {channels[i].name}: {self.PRESSURE_READING_STATUS.get(statuses[ids[i]-1], "Unknown status")}.', PRINT.WARNING)
+
+    def parsePRX(self, msg):
+        """Parses the response to PRX, e.g. 0,1.2340E-08,0,5.6780E-03,5,0.0000E+00,...
+
+        :param msg: Comma separated status and pressure of each gauge.
+        :type msg: str
+        :return: Status and pressure of each gauge.
+        :rtype: numpy.array, numpy.array
+        """
+        fields = np.array(msg.split(','))
+        if fields.shape[0] < 2 or fields.shape[0] % 2 != 0:
+            raise ValueError(f'Expected pairs of status and pressure, got {fields.shape[0]} values.')
+        return fields[::2].astype(int), fields[1::2].astype(float)
 
     def fakeNumbers(self):
         for i, pressure in enumerate(self.pressures):
@@ -129,10 +140,6 @@ class PressureController(DeviceController):
         significand = 0.9 * np.random.random() + 0.1
         return significand * 10**exp
 
-    def updateValue(self):
-        for channel, pressure in zip(self.device.getChannels(), self.pressures):
-            channel.value = pressure
-
     def TPGWrite(self, message):
         self.serialWrite(self.port, f'{message}\r', encoding='ascii')
         self.serialRead(self.port, encoding='ascii') # read acknowledgment
@@ -145,7 +152,7 @@ class PressureController(DeviceController):
 
     def TPGWriteRead(self, message, lock_acquired=False):
         response = ''
-        with self.tpgLock.acquire_timeout(2, timeoutMessage=f'Cannot acquire lock for message: {message}', lock_acquired=lock_acquired) as lock_acquired:
+        with self.lock.acquire_timeout(2, timeoutMessage=f'Cannot acquire lock for message: {message}', lock_acquired=lock_acquired) as lock_acquired:
             if lock_acquired:
                 self.TPGWrite(message)
                 response = self.TPGRead() # reads return value
@@ -1,11 +1,9 @@
 # pylint: disable=[missing-module-docstring] # only single class in module
 import serial
-from threading import Thread
-import time
 from random import choices
 import numpy as np
 from esibd.plugins import Device
-from esibd.core import Parameter, parameterDict, PluginManager, Channel, PRINT, DeviceController, getTestMode
+from esibd.core import Parameter, parameterDict, PluginManager, Channel, PRINT, DeviceController, PeriodicTimer, getTestMode
 
 def providePlugins():
     return [MIPS]
@@ -92,8 +90,9 @@ class VoltageChannel(Channel):
                                                                     or (not self.device.isOn() and abs(self.monitor - 0) > 1)))
 
     def realChanged(self):
-        self.getParameterByName(self.COM).getWidget().setVisible(self.real)
-        self.getParameterByName(self.ID).getWidget().setVisible(self.real)
+        if self.realized: # otherwise visibility will be applied in realize
+            self.getParameterByName(self.COM).getWidget().setVisible(self.real)
+            self.getParameterByName(self.ID).getWidget().setVisible(self.real)
         super().realChanged()
 
 class VoltageController(DeviceController):
@@ -136,11 +135,14 @@ class VoltageController(DeviceController):
 
     def applyVoltage(self, channel):
         if not getTestMode() and self.initialized:
-            Thread(target=self.applyVoltageFromThread, args=(channel,), name=f'{self.device.name} applyVoltageFromThreadThread').start()
+            self.queueSetpoint(channel)
 
-    def applyVoltageFromThread(self, channel):
+    def applySetpoints(self, channels):
         if not getTestMode() and self.initialized:
-            self.MIPSWriteRead(channel.com, message=f'SDCB,{channel.id},{channel.value if (channel.enabled and self.device.isOn()) else 0}\r\n')
+            with self.lock.acquire_timeout(1, timeoutMessage=f'Cannot acquire lock to apply {len(channels)} voltages.') as lock_acquired:
+                if lock_acquired:
+                    for channel in channels:
+                        self.MIPSWriteRead(channel.com, message=f'SDCB,{channel.id},{channel.value if (channel.enabled and self.device.isOn()) else 0}\r\n', lock_acquired=lock_acquired)
 
     def updateValue(self):
         if getTestMode():
@@ -152,17 +154,13 @@ class VoltageController(DeviceController):
 
     def voltageON(self, parallel=True): # this can run in main thread
         if not getTestMode() and self.initialized:
-            if parallel:
-                Thread(target=self.voltageONFromThread, name=f'{self.device.name} voltageONFromThreadThread').start()
-            else:
-                self.voltageONFromThread() # use to make sure this is completed before closing connection
+            for channel in self.device.channels: # outputs are turned on or off by applying setpoints
+                self.queueSetpoint(channel)
+            if not parallel:
+                self.flushCommands() # use to make sure this is completed before closing connection
         elif getTestMode():
             self.fakeNumbers()
 
-    def voltageONFromThread(self):
-        for channel in self.device.channels:
-            self.applyVoltageFromThread(channel)
-
     def fakeNumbers(self):
         for channel in self.device.channels:
             if channel.real:
@@ -173,6 +171,7 @@ class VoltageController(DeviceController):
                     channel.monitor = 0             + 5*choices([0, 1],[.9,.1])[0] + np.random.rand()
 
     def runAcquisition(self, acquiring):
+        self.acquisitionTimer = PeriodicTimer(interval=lambda: self.device.interval, name=self.device.name)
         while acquiring():
             pass
             with self.lock.acquire_timeout(1) as lock_acquired:
@@ -185,7 +184,7 @@ class VoltageController(DeviceController):
                                 except ValueError:
                                     self.voltages[i][ID] = np.nan
                     self.signalComm.updateValueSignal.emit() # signal main thread to update GUI
-            time.sleep(self.device.interval/1000)
+            self.acquisitionTimer.wait()
 
     def MIPSWrite(self, COM, message):
         self.serialWrite(self.ports[self.COMs.index(COM)], message)
@@ -1,5 +1,5 @@
 # pylint: disable=[missing-module-docstring] # only single class in module
-from threading import Thread
+import numpy as np
 import nidaqmx
 from esibd.plugins import Device
 from esibd.core import Parameter, parameterDict, PluginManager, Channel, PRINT, DeviceController, getTestMode
@@ -69,15 +69,41 @@ class VoltageChannel(Channel):
             self.lastAppliedValue = self.value
 
     def realChanged(self):
-        self.getParameterByName(self.ADDRESS).getWidget().setVisible(self.real)
+        if self.realized: # otherwise visibility will be applied in realize
+            self.getParameterByName(self.ADDRESS).getWidget().setVisible(self.real)
         super().realChanged()
 
 class VoltageController(DeviceController):
 
+    def __init__(self, _parent):
+        super().__init__(_parent=_parent)
+        self.task = None # one task for all channels, kept while communication is initialized
+        self.taskIndices = {} # channel -> index in task
+        self.taskValues = None # last values written to task
+
+    def createTask(self):
+        """Returns a task with one analog output for every real channel. Uses :class:`~esibd.simulators.daq.MockTask` in test mode."""
+        if getTestMode():
+            from esibd.simulators.daq import MockTask # pylint: disable = import-outside-toplevel # only needed for testing
+            task = MockTask()
+        else:
+            task = nidaqmx.Task()
+        channels = [channel for channel in self.device.channels if channel.real]
+        try:
+            for channel in channels:
+                task.ao_channels.add_ao_voltage_chan(channel.address) # will raise exception if connection failed
+        except Exception:
+            task.close()
+            raise
+        self.taskIndices = {channel: i for i, channel in enumerate(channels)}
+        self.taskValues = np.zeros(len(channels))
+        return task
+
     def runInitialization(self):
         try:
-            with nidaqmx.Task() as task:
-                task.ao_channels # will raise exception if connection failed
+            if self.task is not None: # reinitializing
+                self.task.close()
+            self.task = self.createTask()
             self.signalComm.initCompleteSignal.emit()
         except Exception as e: # pylint: disable=[broad-except] # socket does not throw more specific exception
             self.print(f'Could not establish connection at {self.device.channels[0].address}. Exception: {e}', PRINT.WARNING)
@@ -85,33 +111,42 @@ class VoltageController(DeviceController):
             self.initializing = False
 
     def initComplete(self):
+        if self.task is None: # test mode
+            self.task = self.createTask()
         super().initComplete()
         if self.device.isOn():
             self.device.updateValues(apply=True) # apply voltages before turning on or off
         self.voltageON()
 
     def applyVoltage(self, channel):
-        if not getTestMode() and self.initialized:
-            Thread(target=self.applyVoltageFromThread, args=(channel,), name=f'{self.device.name} applyVoltageFromThreadThread').start()
+        if self.initialized:
+            self.queueSetpoint(channel)
+
+    def applySetpoints(self, channels):
+        with self.lock.acquire_timeout(1, timeoutMessage=f'Cannot acquire lock to set voltages of {len(channels)} channels.') as lock_acquired:
+            if lock_acquired and self.task is not None and self.taskValues.shape[0] > 0:
+                for channel in channels:
+                    if channel in self.taskIndices:
+                        self.taskValues[self.taskIndices[channel]] = channel.value if (channel.enabled and self.device.isOn()) else 0
+                    else:
+                        self.print(f'{channel.name} has been added after initialization. Reinitialize communication to use it.', PRINT.WARNING)
+                # a task always writes to all of its channels, unchanged channels keep their values
+                self.task.write(self.taskValues if self.taskValues.shape[0] > 1 else float(self.taskValues[0]))
 
-    def applyVoltageFromThread(self, channel):
-        with self.lock.acquire_timeout(1, timeoutMessage=f'Cannot acquire lock to set voltage of {channel.name}.') as lock_acquired:
-            if lock_acquired:
-                with nidaqmx.Task() as task:
-                    task.ao_channels.add_ao_voltage_chan(channel.address)
-                    task.write(channel.value if (channel.enabled and self.device.isOn()) else 0)
+    def closeCommunication(self):
+        if self.task is not None:
+            with self.lock.acquire_timeout(1, timeoutMessage='Could not acquire lock before closing task.'):
+                self.task.close()
+                self.task = None
+        super().closeCommunication()
 
     def voltageON(self, parallel=True): # this can run in main thread
-        if not getTestMode() and self.initialized:
-            if parallel:
-                Thread(target=self.voltageONFromThread, name=f'{self.device.name} voltageONFromThreadThread').start()
-            else:
-                self.voltageONFromThread()
-
-    def voltageONFromThread(self):
-        for channel in self.device.channels:
-            if channel.real:
-                self.applyVoltageFromThread(channel)
+        if self.initialized:
+            for channel in self.device.channels: # outputs are turned on or off by applying setpoints
+                if channel.real:
+                    self.queueSetpoint(channel)
+            if not parallel:
+                self.flushCommands() # make sure this is completed before closing connection
 
     def runAcquisition(self, acquiring):
         pass # nothing to acquire, no read backs
\ No newline at end of file
@@ -1,10 +1,9 @@
 # pylint: disable=[missing-module-docstring] # only single class in module
-import time
 import serial
 import numpy as np
 import pfeiffer_vacuum_protocol as pvp
 from esibd.plugins import Device
-from esibd.core import Parameter, PluginManager, Channel, parameterDict, DeviceController, PRINT, getTestMode
+from esibd.core import Parameter, PluginManager, Channel, parameterDict, DeviceController, PeriodicTimer, PRINT, getTestMode
 
 def providePlugins():
     return [OMNICONTROL]
@@ -81,12 +80,13 @@ class PressureController(DeviceController):
         super().initComplete()
 
     def runAcquisition(self, acquiring):
+        self.acquisitionTimer = PeriodicTimer(interval=lambda: self.device.interval, name=self.device.name)
         while acquiring():
             with self.lock.acquire_timeout(1) as lock_acquired:
                 if lock_acquired:
                     self.fakeNumbers() if getTestMode() else self.readNumbers()
                     self.signalComm.updateValueSignal.emit()
-            time.sleep(self.device.interval/1000)
+            self.acquisitionTimer.wait()
 
     def readNumbers(self):
         for i, channel in enumerate(self.device.channels):
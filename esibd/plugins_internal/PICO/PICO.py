@@ -1,5 +1,4 @@
 # pylint: disable=[missing-module-docstring] # only single class in module
-import time
 import numpy as np
 import ctypes
 # Download PicoSDK as described here https://github.com/picotech/picosdk-python-wrappers/tree/master
@@ -7,7 +6,7 @@ import ctypes
 from picosdk.usbPT104 import usbPt104 as pt104
 from picosdk.functions import assert_pico_ok
 from esibd.plugins import Device
-from esibd.core import Parameter, PluginManager, Channel, parameterDict, PRINT, DeviceController, getDarkMode, getTestMode
+from esibd.core import Parameter, PluginManager, Channel, parameterDict, PRINT, DeviceController, PeriodicTimer, getDarkMode, getTestMode
 
 def providePlugins():
     return [PICO]
@@ -116,12 +115,13 @@ class TemperatureController(DeviceController):
         super().initComplete()
 
     def runAcquisition(self, acquiring):
+        self.acquisitionTimer = PeriodicTimer(interval=lambda: self.device.interval, name=self.device.name)
         while acquiring():
             with self.lock.acquire_timeout(1) as lock_acquired:
                 if lock_acquired:
                     self.fakeNumbers() if getTestMode() else self.readNumbers()
                     self.signalComm.updateValueSignal.emit()
-            time.sleep(self.device.interval/1000)
+            self.acquisitionTimer.wait()
 
     def readNumbers(self):
         for i, channel in enumerate(self.device.channels):
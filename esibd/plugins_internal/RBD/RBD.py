@@ -1,5 +1,7 @@
 # pylint: disable=[missing-module-docstring] # only single class in module
+import re
 import time
+from collections import deque
 import h5py
 import serial
 import numpy as np
@@ -10,6 +12,34 @@ from esibd.core import Parameter, parameterDict, PluginManager, Channel, PRINT,
 def providePlugins():
     return [Current]
 
+UNITSCALE = {'mA': 1E9, 'uA': 1E6, 'nA': 1E3, 'pA': 1} # conversion to pA
+SAMPLEPATTERN = re.compile(r'&S,[^,\r\n]*,([^,\r\n]*),([a-zA-Z]*)') # e.g. &S,Range=002nA,+0.1234,nA
+
+def parseSamples(lines):
+    """Parses all single sample messages received in a burst at once.
+    Out of range and unstable samples are returned as 0, as in single sample mode.
+
+    :param lines: Messages of the form &S,Range=002nA,+0.1234,nA
+    :type lines: list[str]
+    :return: Values in pA, out of range flags, unstable flags. Samples that cannot be parsed are dropped.
+    :rtype: numpy.array, numpy.array, numpy.array
+    """
+    matches = SAMPLEPATTERN.findall('\n'.join(lines))
+    if len(matches) == 0:
+        return np.empty(0), np.empty(0, dtype=bool), np.empty(0, dtype=bool)
+    readings, units = np.array(matches).T
+    outOfRange = (np.char.find(readings, '<') >= 0) | (np.char.find(readings, '>') >= 0)
+    unstable = np.char.find(readings, '*') >= 0
+    readings = np.where(outOfRange | unstable, '0', readings)
+    try:
+        values = readings.astype(np.float64)
+    except ValueError: # only parse individually if there are invalid samples
+        values = np.array([float(reading) if re.fullmatch(r'[+-]?\d*\.?\d+(?:[eE][+-]?\d+)?', reading) else np.nan for reading in readings])
+    uniqueUnits, unitIndices = np.unique(units, return_inverse=True)
+    values *= np.array([UNITSCALE.get(unit, np.nan) for unit in uniqueUnits])[unitIndices]
+    valid = ~np.isnan(values)
+    return values[valid], outOfRange[valid], unstable[valid]
+
 class Current(Device):
     """Device that contains a list of current channels, each corresponding to a single RBD
     9103 picoammeter. The channels show the accumulated charge over time,
@@ -91,6 +121,13 @@ class Current(Device):
         Overwrite as needed."""
         ds = super().getDefaultSettings()
         ds[f'{self.name}/Interval'][Parameter.VALUE] = 100 # overwrite default value
+        ds[f'{self.name}/Streaming'] = parameterDict(value=False, widgetType=Parameter.TYPE.BOOL, attr='streaming',
+                                          toolTip='Sample at the sample interval and read all samples received since the last read in a single burst.\n'+
+                                                  'Values shown and saved at the device interval are averaged over all samples.\n'+
+                                                  'Individual samples are used to integrate the charge and to average the signal of scan steps.',
+                                          event=lambda: self.restartSampling())
+        ds[f'{self.name}/Sample interval'] = parameterDict(value=10, widgetType=Parameter.TYPE.INT, _min=1, _max=9999, attr='sampleInterval',
+                                          toolTip='Sample interval of the picoammeter in ms used in streaming mode.', event=lambda: self.restartSampling())
         return ds
 
     def getInitializedChannels(self):
@@ -100,6 +137,14 @@ class Current(Device):
         for channel in self.channels:
             channel.resetCharge()
 
+    def restartSampling(self):
+        """Applies sample interval and streaming mode on next read."""
+        for channel in self.channels:
+            if not self.streaming:
+                channel.samples = deque() # samples would otherwise be used for windows after streaming has been switched off
+            if channel.controller.acquiring:
+                channel.controller.startSamplingFlag = True
+
 class CurrentChannel(Channel):
     """UI for picoammeter with integrated functionality"""
 
@@ -107,6 +152,9 @@ class CurrentChannel(Channel):
         super().__init__(**kwargs)
         self.controller = CurrentController(_parent=self)
         self.preciseCharge = 0 # store independent of spin box precision to avoid rounding errors
+        self.samples = deque() # bursts of (times, values) received in streaming mode
+
+    sampleBufferTime = 600 # s, samples received in streaming mode are kept for this time. Older windows use the averaged history.
 
     CHARGE     = 'Charge'
     COM        = 'COM'
@@ -168,27 +216,58 @@ class CurrentChannel(Channel):
         # this does not only measure the deposition current but also on what lenses current is lost
         # make sure that the data interval is the same as used in data acquisition
         super().appendValue(lenT, nan=nan)
-        if not nan and not np.isnan(self.value) and not np.isinf(self.value):
+        if not nan and not np.isnan(self.value) and not np.isinf(self.value) and not self.device.streaming: # charge is integrated for every sample in streaming mode
             chargeIncrement = (self.value-self.background)*self.device.interval/1000/3600 if self.values.size > 1 else 0
             self.preciseCharge += chargeIncrement # display accumulated charge # don't use np.sum(self.charges) to allow
             self.charge = self.preciseCharge # pylint: disable=[attribute-defined-outside-init] # attribute defined dynamically
 
     def clearHistory(self, max_size=None):
         super().clearHistory(max_size)
+        self.samples = deque()
         self.resetCharge()
 
+    def addSamples(self, times, values):
+        """Adds all samples received in a burst. The displayed value is the mean of the burst.
+
+        :param times: Time stamps in s since epoch.
+        :type times: numpy.array
+        :param values: Values in pA.
+        :type values: numpy.array
+        """
+        self.samples.append((times, values))
+        while self.samples and self.samples[0][0][-1] < times[-1] - self.sampleBufferTime:
+            self.samples.popleft()
+        self.value = np.mean(values)
+        self.preciseCharge += np.sum(values-self.background)*self.device.sampleInterval/1000/3600
+        self.charge = self.preciseCharge # pylint: disable=[attribute-defined-outside-init] # attribute defined dynamically
+
+    def getValuesInWindow(self, t_start, t_end, subtractBackground=None):
+        """Extends :meth:`~esibd.core.Channel.getValuesInWindow` to use all samples received in streaming mode.
+        Samples are only kept for :attr:`~esibd.plugins_internal.RBD.RBD.CurrentChannel.sampleBufferTime`.
+        Windows that start before the oldest sample use the history of values averaged over each burst."""
+        if not self.samples or not self.device.streaming or t_start < self.samples[0][0][0]:
+            return super().getValuesInWindow(t_start, t_end, subtractBackground=subtractBackground)
+        bursts = [(times, values) for times, values in self.samples if times[-1] >= t_start and times[0] <= t_end]
+        if len(bursts) == 0:
+            return np.empty(0)
+        times = np.hstack([times for times, _ in bursts])
+        values = np.hstack([values for _, values in bursts])
+        values = values[np.searchsorted(times, t_start, side='left'):np.searchsorted(times, t_end, side='right')]
+        return values - self.background if self.useBackgrounds and subtractBackground else values
+
     def resetCharge(self):
         self.charge = 0 # pylint: disable=[attribute-defined-outside-init] # attribute defined dynamically
         self.preciseCharge = 0
 
     def realChanged(self):
-        self.getParameterByName(self.COM).getWidget().setVisible(self.real)
-        self.getParameterByName(self.DEVICENAME).getWidget().setVisible(self.real)
-        self.getParameterByName(self.RANGE).getWidget().setVisible(self.real)
-        self.getParameterByName(self.AVERAGE).getWidget().setVisible(self.real)
-        self.getParameterByName(self.BIAS).getWidget().setVisible(self.real)
-        self.getParameterByName(self.OUTOFRANGE).getWidget().setVisible(self.real)
-        self.getParameterByName(self.UNSTABLE).getWidget().setVisible(self.real)
+        if self.realized: # otherwise visibility will be applied in realize
+            self.getParameterByName(self.COM).getWidget().setVisible(self.real)
+            self.getParameterByName(self.DEVICENAME).getWidget().setVisible(self.real)
+            self.getParameterByName(self.RANGE).getWidget().setVisible(self.real)
+            self.getParameterByName(self.AVERAGE).getWidget().setVisible(self.real)
+            self.getParameterByName(self.BIAS).getWidget().setVisible(self.real)
+            self.getParameterByName(self.OUTOFRANGE).getWidget().setVisible(self.real)
+            self.getParameterByName(self.UNSTABLE).getWidget().setVisible(self.real)
         if self.device.recording:
             self.controller.initializeCommunication()
         super().realChanged()
@@ -212,8 +291,11 @@ class CurrentChannel(Channel):
 
 class CurrentController(DeviceController):
 
+    useScheduler = True
+
     class SignalCommunicate(DeviceController.SignalCommunicate):
         updateValueSignal = pyqtSignal(float, bool, bool, str)
+        updateSamplesSignal = pyqtSignal(object, object, bool, bool)
         updateDeviceNameSignal = pyqtSignal(str)
 
     def __init__(self, _parent):
@@ -223,9 +305,12 @@ class CurrentController(DeviceController):
         self.device = self.channel.getDevice()
         self.port = None
         self.signalComm.updateDeviceNameSignal.connect(self.updateDeviceName)
+        self.signalComm.updateSamplesSignal.connect(self.updateSamples)
         self.updateAverageFlag = False
         self.updateRangeFlag = False
         self.updateBiasFlag = False
+        self.startSamplingFlag = False
+        self.lastSampleTime = None # time stamp of last sample of previous burst
         self.phase = np.random.rand()*10 # used in test mode
         self.omega = np.random.rand() # used in test mode
         self.offset = np.random.rand()*10 # used in test mode
@@ -241,6 +326,7 @@ class CurrentController(DeviceController):
             with self.lock.acquire_timeout(1, timeoutMessage=f'Could not acquire lock before closing port of {self.channel.devicename}.') as lock_acquired:
                 if self.initialized and lock_acquired:  # pylint: disable=[access-member-before-definition] # defined in DeviceController class
                     self.RBDWriteRead('I0000', lock_acquired=lock_acquired) # stop sampling
+                self.detachSerialTransport(self.port)
                 self.port.close()
                 self.port = None
         super().closeCommunication()
@@ -255,6 +341,7 @@ class CurrentController(DeviceController):
                 stopbits=serial.STOPBITS_ONE,
                 xonxoff=False,
                 timeout=3)
+            self.attachSerialTransport(self.port)
             self.setRange()
             self.setAverage()
             self.setGrounding()
@@ -275,21 +362,34 @@ class CurrentController(DeviceController):
 
     def startAcquisition(self):
         if self.channel.active and self.channel.real:
+            self.startSamplingFlag = True
             super().startAcquisition()
 
-    def runAcquisition(self, acquiring):
-        if not getTestMode():
-            self.RBDWriteRead(message=f'I{self.channel.getDevice().interval:04d}') # start sampling with given interval (implement high speed communication if available)
-        while acquiring():
-            with self.lock.acquire_timeout(1, timeoutMessage=f'Cannot acquire lock to read current from {self.channel.devicename}.') as lock_acquired:
-                if lock_acquired:
-                    if getTestMode():
-                        self.fakeSingleNum()
-                    else:
-                        self.readSingleNum() # no sleep needed, timing controlled by waiting during readSingleNum
-                    self.updateParameters()
-            if getTestMode():
-                time.sleep(self.channel.getDevice().interval/1000)
+    def readValues(self):
+        streaming = self.channel.getDevice().streaming
+        if getTestMode():
+            if streaming:
+                self.fakeSamples()
+            else:
+                self.fakeSingleNum()
+        else:
+            if self.startSamplingFlag:
+                interval = self.channel.getDevice().sampleInterval if streaming else self.channel.getDevice().interval
+                self.RBDWriteRead(message=f'I{interval:04d}', lock_acquired=True) # start sampling with given interval
+                self.startSamplingFlag = False
+                self.lastSampleTime = None
+            if streaming:
+                self.readSamples()
+            else:
+                while self.serialWaiting(self.port) > 0 and self.acquiring: # only read messages that have already been sent to not block worker threads of the scheduler
+                    self.readSingleNum()
+        self.updateParameters()
+
+    def updateSamples(self, times, values, outOfRange, unstable):
+        self.channel.addSamples(times, values)
+        self.channel.outOfRange = outOfRange
+        self.channel.unstable = unstable
+        self.channel.error = ''
 
     def updateDeviceName(self, name):
         self.channel.devicename = name
@@ -303,11 +403,13 @@ class CurrentController(DeviceController):
             self.print(error)
 
     def setRange(self):
-        self.RBDWriteRead(message=f'R{self.channel.getParameterByName(self.channel.RANGE).getWidget().currentIndex()}') # set range
+        _range = self.channel.getParameterByName(self.channel.RANGE)
+        self.RBDWriteRead(message=f'R{_range.items.index(_range.value)}') # set range, index does not depend on widget
         self.updateRangeFlag=False
 
     def setAverage(self):
-        _filter = self.channel.getParameterByName(self.channel.AVERAGE).getWidget().currentIndex()
+        average = self.channel.getParameterByName(self.channel.AVERAGE)
+        _filter = average.items.index(average.value) # index does not depend on widget
         _filter = 2**_filter if _filter > 0 else 0
         self.RBDWriteRead(message=f'F0{_filter:02}') # set filter
         self.updateAverageFlag=False
@@ -366,6 +468,45 @@ class CurrentController(DeviceController):
         if not self.channel.getDevice().pluginManager.closing:
             self.signalComm.updateValueSignal.emit(np.sin(self.omega*time.time()/5+self.phase)*10+np.random.rand()+self.offset, False, False, '')
 
+    def fakeSamples(self):
+        if not self.channel.getDevice().pluginManager.closing:
+            sampleInterval = self.channel.getDevice().sampleInterval/1000
+            times = self.getSampleTimes(max(int(self.channel.getDevice().interval/1000/sampleInterval), 1))
+            self.signalComm.updateSamplesSignal.emit(times, np.sin(self.omega*times/5+self.phase)*10+np.random.rand(times.shape[0])+self.offset, False, False)
+
+    def readSamples(self):
+        """Reads and parses all samples that have been received since the last call.
+        Time stamps are assigned based on the sample interval, as samples are taken by the picoammeter at a fixed rate
+        while the time of arrival depends on buffering by the serial interface."""
+        if not self.channel.getDevice().pluginManager.closing:
+            lines = self.serialReadLines(self.port)
+            if len(lines) == 0 or not self.acquiring:
+                return
+            values, outOfRange, unstable = parseSamples(lines)
+            if values.shape[0] == 0:
+                self.signalComm.updateValueSignal.emit(0, False, False, f'Could not parse any of {len(lines)} messages.')
+                return
+            times = self.getSampleTimes(values.shape[0])
+            self.signalComm.updateSamplesSignal.emit(times, values, bool(outOfRange[-1]), bool(unstable[-1]))
+
+    def getSampleTimes(self, n):
+        """Returns time stamps for n samples of a burst that ends now and is spaced by the sample interval.
+        If the burst would overlap with the previous burst, e.g. as samples have been delayed by the serial interface,
+        it is anchored to the end of the previous burst so that time stamps are strictly increasing.
+
+        :param n: Number of samples.
+        :type n: int
+        :return: Time stamps in s since epoch.
+        :rtype: numpy.array
+        """
+        now = time.time()
+        sampleInterval = self.channel.getDevice().sampleInterval/1000
+        times = now - sampleInterval*np.arange(n)[::-1]
+        if self.lastSampleTime is not None and times[0] <= self.lastSampleTime:
+            times = np.linspace(self.lastSampleTime, max(now, self.lastSampleTime + sampleInterval), n + 1)[1:]
+        self.lastSampleTime = times[-1]
+        return times
+
     def readSingleNum(self):
         if not self.channel.getDevice().pluginManager.closing:
             msg = ''
@@ -1,11 +1,9 @@
 # pylint: disable=[missing-module-docstring] # only single class in module
-from threading import Thread
-import time
 from random import choices
 import numpy as np
 import pyvisa
 from esibd.plugins import Device
-from esibd.core import Parameter, parameterDict, PluginManager, Channel, PRINT, DeviceController, getTestMode
+from esibd.core import Parameter, parameterDict, PluginManager, Channel, PRINT, DeviceController, PeriodicTimer, getTestMode
 
 def providePlugins():
     return [RSPD3303C]
@@ -102,9 +100,10 @@ class VoltageChannel(Channel):
                                                                     or (not self.device.isOn() and abs(self.monitor - 0) > 1)))
 
     def realChanged(self):
-        self.getParameterByName(self.POWER).getWidget().setVisible(self.real)
-        self.getParameterByName(self.CURRENT).getWidget().setVisible(self.real)
-        self.getParameterByName(self.ID).getWidget().setVisible(self.real)
+        if self.realized: # otherwise visibility will be applied in realize
+            self.getParameterByName(self.POWER).getWidget().setVisible(self.real)
+            self.getParameterByName(self.CURRENT).getWidget().setVisible(self.real)
+            self.getParameterByName(self.ID).getWidget().setVisible(self.real)
         super().realChanged()
 
 class VoltageController(DeviceController):
@@ -134,10 +133,13 @@ class VoltageController(DeviceController):
 
     def applyVoltage(self, channel):
         if not getTestMode() and self.initialized:
-            Thread(target=self.applyVoltageFromThread, args=(channel,), name=f'{self.device.name} applyVoltageFromThreadThread').start()
+            self.queueSetpoint(channel)
 
-    def applyVoltageFromThread(self, channel):
-        self.RSWrite(f'CH{channel.id}:VOLT {channel.value}')
+    def applySetpoints(self, channels):
+        with self.lock.acquire_timeout(1, timeoutMessage=f'Cannot acquire lock to apply {len(channels)} voltages.') as lock_acquired:
+            if lock_acquired:
+                for channel in channels:
+                    self.RSWrite(f'CH{channel.id}:VOLT {channel.value}', lock_acquired=lock_acquired)
 
     def updateValue(self):
         if getTestMode():
@@ -151,16 +153,17 @@ class VoltageController(DeviceController):
 
     def voltageON(self, parallel=True): # this can run in main thread
         if not getTestMode() and self.initialized:
-            if parallel:
-                Thread(target=self.voltageONFromThread, name=f'{self.device.name} voltageONFromThreadThread').start()
-            else:
-                self.voltageONFromThread()
+            self.queueCommand(self.outputON) # after pending setpoints
+            if not parallel:
+                self.flushCommands() # make sure this is completed before closing connection
         elif getTestMode():
             self.fakeNumbers()
 
-    def voltageONFromThread(self):
-        for channel in self.device.channels:
-            self.RSWrite(f"OUTPUT CH{channel.id},{'ON' if self.device.isOn() else 'OFF'}")
+    def outputON(self):
+        with self.lock.acquire_timeout(1, timeoutMessage='Cannot acquire lock to turn outputs on or off.') as lock_acquired:
+            if lock_acquired:
+                for channel in self.device.channels:
+                    self.RSWrite(f"OUTPUT CH{channel.id},{'ON' if self.device.isOn() else 'OFF'}", lock_acquired=lock_acquired)
 
     def fakeNumbers(self):
         for channel in self.device.channels:
@@ -174,6 +177,7 @@ class VoltageController(DeviceController):
                 channel.power = channel.monitor*channel.current
 
     def runAcquisition(self, acquiring):
+        self.acquisitionTimer = PeriodicTimer(interval=lambda: self.device.interval, name=self.device.name)
         while acquiring():
             with self.lock.acquire_timeout(1) as lock_acquired:
                 if lock_acquired:
@@ -182,10 +186,10 @@ class VoltageController(DeviceController):
                             self.voltages[i] = self.RSQuery(f'MEAS:VOLT? CH{channel.id}', lock_acquired=lock_acquired)
                             self.currents[i] = self.RSQuery(f'MEAS:CURR? CH{channel.id}', lock_acquired=lock_acquired)
                     self.signalComm.updateValueSignal.emit() # signal main thread to update GUI
-            time.sleep(self.device.interval/1000)
+            self.acquisitionTimer.wait()
 
-    def RSWrite(self, message):
-        with self.lock.acquire_timeout(1, timeoutMessage=f'Cannot acquire lock for message {message}.') as lock_acquired:
+    def RSWrite(self, message, lock_acquired=False):
+        with self.lock.acquire_timeout(1, timeoutMessage=f'Cannot acquire lock for message {message}.', lock_acquired=lock_acquired) as lock_acquired:
             if lock_acquired:
                 self.port.write(message)
 
@@ -1,6 +1,4 @@
 # pylint: disable=[missing-module-docstring] # only single class in module
-import time
-import re
 import serial
 import numpy as np
 from esibd.plugins import Device
@@ -59,6 +57,8 @@ class PressureChannel(Channel):
 
 class PressureController(DeviceController):
 
+    useScheduler = True
+
     def __init__(self, _parent):
         super().__init__(_parent=_parent)
         self.TICgaugeID = [913, 914, 915, 934, 935, 936]
@@ -66,6 +66,7 @@ class PressureController(DeviceController):
     def closeCommunication(self):
         if self.port is not None:
             with self.lock.acquire_timeout(1, timeoutMessage='Could not acquire lock before closing port.'):
+                self.detachSerialTransport(self.port)
                 self.port.close()
                 self.port = None
         super().closeCommunication()
@@ -75,6 +76,7 @@ class PressureController(DeviceController):
             self.port=serial.Serial(
                 f'{self.device.COM}', baudrate=9600, bytesize=serial.EIGHTBITS,
                 parity=serial.PARITY_NONE, stopbits=serial.STOPBITS_ONE, xonxoff=True, timeout=2)
+            self.attachSerialTransport(self.port, EOL='\r') # Note: unlike most other devices TIC terminates messages with \r and not \r\n
             TICStatus = self.TICWriteRead(message=902)
             self.print(f"TIC Status: {TICStatus}") # query status
             if TICStatus == '':
@@ -89,27 +91,46 @@ class PressureController(DeviceController):
         self.pressures = [np.nan]*len(self.device.channels)
         super().initComplete()
 
-    def runAcquisition(self, acquiring):
-        while acquiring():
-            with self.lock.acquire_timeout(1) as lock_acquired:
-                if lock_acquired:
-                    self.fakeNumbers() if getTestMode() else self.readNumbers()
-                    self.signalComm.updateValueSignal.emit()
-            time.sleep(self.device.interval/1000)
+    def readValues(self):
+        self.fakeNumbers() if getTestMode() else self.readNumbers()
+        self.publishValues(self.pressures) # update all channels in one step
 
     def readNumbers(self):
-        for i, channel in enumerate(self.device.getChannels()):
-            if channel.enabled and channel.active:
-                if self.initialized:
-                    msg = self.TICWriteRead(message=f'{self.TICgaugeID[channel.id]}', lock_acquired=True)
-                    try:
-                        self.pressures[i] = float(re.split(' |;', msg)[1])/100 # parse and convert to mbar = 0.01 Pa
-                        # self.print(f'Read pressure for channel {c.name}', flag=PRINT.DEBUG)
-                    except Exception as e:
-                        self.print(f'Failed to parse pressure from {msg}: {e}', PRINT.ERROR)
-                        self.pressures[i] = np.nan
-                else:
-                    self.pressures[i] = np.nan
+        channels = self.device.getChannels()
+        self.pressures = np.full(len(channels), np.nan)
+        if not self.initialized:
+            return
+        indices = [i for i, channel in enumerate(channels) if channel.enabled and channel.active and channel.id < len(self.TICgaugeID)]
+        if len(indices) == 0:
+            return
+        # send queries for all gauges at once and receive all responses in one round trip
+        responses = self.TICQuery([self.TICgaugeID[channels[i].id] for i in indices], lock_acquired=True)
+        pressures = self.parsePressures(responses)
+        self.pressures[indices] = pressures
+        for i, response in zip(np.array(indices)[np.isnan(pressures)], np.array(responses)[np.isnan(pressures)]):
+            self.print(f'Failed to parse pressure for {channels[i].name} from {response}.', PRINT.ERROR)
+
+    def parsePressures(self, responses):
+        """Parses responses like =V913 1.23e-05;59;11;0;0 and converts the pressure from Pa to mbar.
+
+        :param responses: Responses to pressure queries.
+        :type responses: list[str]
+        :return: Pressures in mbar. NaN for responses that cannot be parsed.
+        :rtype: numpy.array
+        """
+        responses = np.array(responses, dtype=str)
+        values = np.char.partition(np.char.partition(responses, ' ')[:, 2], ';')[:, 0] if responses.shape[0] > 0 else responses
+        pressures = np.full(responses.shape[0], np.nan)
+        valid = np.char.startswith(responses, '=V') # error responses start with *
+        try:
+            pressures[valid] = values[valid].astype(float)/100 # mbar = 0.01 Pa
+        except ValueError: # only parse individually if there are invalid values
+            for i in np.flatnonzero(valid):
+                try:
+                    pressures[i] = float(values[i])/100
+                except ValueError:
+                    pass
+        return pressures
 
     def fakeNumbers(self):
         for i, pressure in enumerate(self.pressures):
@@ -120,21 +141,23 @@ class PressureController(DeviceController):
         significand = 0.9 * np.random.random() + 0.1
         return significand * 10**exp
 
-    def updateValue(self):
-        for channel, pressure in zip(self.device.getChannels(), self.pressures):
-            channel.value = pressure
-
-    def TICWrite(self, _id):
-        self.serialWrite(self.port, f'?V{_id}\r')
-
-    def TICRead(self):
-        # Note: unlike most other devices TIC terminates messages with \r and not \r\n
-        return self.serialRead(self.port, EOL='\r')
-
     def TICWriteRead(self, message, lock_acquired=False):
         response = ''
-        with self.ticLock.acquire_timeout(2, timeoutMessage=f'Cannot acquire lock for message: {message}', lock_acquired=lock_acquired) as lock_acquired:
+        with self.lock.acquire_timeout(2, timeoutMessage=f'Cannot acquire lock for message: {message}', lock_acquired=lock_acquired) as lock_acquired:
             if lock_acquired:
-                self.TICWrite(message)
-                response = self.TICRead() # reads return value
+                response = self.serialQuery(self.port, f'?V{message}\r') # response is matched to request by serial transport
         return response
+
+    def TICQuery(self, objectIDs, lock_acquired=False):
+        """Queries multiple objects in one message. The TIC answers each query with one line in order.
+
+        :param objectIDs: IDs of queried objects.
+        :type objectIDs: list[int]
+        :return: Responses in the order of objectIDs.
+        :rtype: list[str]
+        """
+        responses = ['']*len(objectIDs)
+        with self.lock.acquire_timeout(2, timeoutMessage=f'Cannot acquire lock to query {objectIDs}', lock_acquired=lock_acquired) as lock_acquired:
+            if lock_acquired:
+                responses = self.serialQueryLines(self.port, ''.join([f'?V{objectID}\r' for objectID in objectIDs]), responses=len(objectIDs))
+        return responses
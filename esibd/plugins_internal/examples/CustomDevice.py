@@ -1,11 +1,10 @@
 # pylint: disable=[missing-module-docstring] # only single class in module
-import time
 import numpy as np
 # Users who add custom controls can use the build-in features at their own risk.
 # If you want your module to be more independent, implement your own replacement for the following imports.
 from PyQt6.QtWidgets import QMessageBox
 from esibd.plugins import Device
-from esibd.core import Parameter, parameterDict, PluginManager, Channel, DeviceController, getTestMode, PRINT
+from esibd.core import Parameter, parameterDict, PluginManager, Channel, DeviceController, PeriodicTimer, getTestMode, PRINT
 
 def providePlugins():
     return [CustomDevice]
@@ -182,6 +181,7 @@ class CustomController(DeviceController):
             super().startAcquisition()
 
     def runAcquisition(self, acquiring):
+        self.acquisitionTimer = PeriodicTimer(interval=lambda: self.device.interval, name=self.device.name)
         while acquiring():
             with self.lock.acquire_timeout(1, timeoutMessage='Could not acquire lock to acquire data') as lock_acquired:
                 if lock_acquired:
@@ -190,7 +190,7 @@ class CustomController(DeviceController):
                     else:
                         pass # TODO implement real feedback
                     self.signalComm.updateValueSignal.emit()
-            time.sleep(self.device.interval/1000) # release lock before waiting!
+            self.acquisitionTimer.wait() # release lock before waiting!
 
     def applyValue(self, channel):
         # Pseudocode: Apply channel.value to channel with channel.id
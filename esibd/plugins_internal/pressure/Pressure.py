@@ -1,10 +1,8 @@
 # pylint: disable=[missing-module-docstring] # only single class in module
-import time
-import re
 import serial
 import numpy as np
 from esibd.plugins import Device
-from esibd.core import Parameter, PluginManager, Channel, parameterDict, DeviceController, getDarkMode, PRINT, getTestMode, TimeoutLock
+from esibd.core import Parameter, PluginManager, Channel, parameterDict, DeviceController, PeriodicTimer, getDarkMode, PRINT, getTestMode, TimeoutLock
 
 def providePlugins():
     return [Pressure]
@@ -129,12 +127,13 @@ class PressureController(DeviceController):
         super().initComplete()
 
     def runAcquisition(self, acquiring):
+        self.acquisitionTimer = PeriodicTimer(interval=lambda: self.device.interval, name=self.device.name)
         while acquiring():
             with self.lock.acquire_timeout(1) as lock_acquired:
                 if lock_acquired:
                     self.fakeNumbers() if getTestMode() else self.readNumbers()
                     self.signalComm.updateValueSignal.emit()
-            time.sleep(self.device.interval/1000)
+            self.acquisitionTimer.wait()
 
     PRESSURE_READING_STATUS = {
       0: 'Measurement data okay',
@@ -147,31 +146,64 @@ class PressureController(DeviceController):
     }
 
     def readNumbers(self):
-        for i, channel in enumerate(self.device.getChannels()):
-            if channel.enabled and channel.active:
-                if channel._controller == channel.TIC and self.ticInitialized:
-                    msg = self.TICWriteRead(message=f'{self.TICgaugeID[channel.id]}', lock_acquired=True)
-                    try:
-                        self.pressures[i] = float(re.split(' |;', msg)[1])/100 # parse and convert to mbar = 0.01 Pa
-                        # self.print(f'Read pressure for channel {c.name}', flag=PRINT.DEBUG)
-                    except Exception as e:
-                        self.print(f'Failed to parse pressure from {msg}: {e}', PRINT.ERROR)
-                        self.pressures[i] = np.nan
-                elif channel._controller == channel.TPG and self.tpgInitialized:
-                    msg = self.TPGWriteRead(message=f'PR{channel.id}', lock_acquired=True)
-                    try:
-                        a, pressure = msg.split(',')
-                        if a == '0':
-                            self.pressures[i] = float(pressure) # set unit to mbar on device
-                            # self.print(f'Read pressure for channel {channel.name}', flag=PRINT.DEBUG)
-                        else:
-                            self.print(f'Could not read pressure for {channel.name}: {self.PRESSURE_READING_STATUS[int(a)]}.', PRINT.WARNING)
-                            self.pressures[i] = np.nan
-                    except Exception as e:
-                        self.print(f'Failed to parse pressure from {msg}: {e}', PRINT.ERROR)
-                        self.pressures[i] = np.nan
-                else:
-                    self.pressures[i] = np.nan
+        channels = self.device.getChannels()
+        self.pressures = np.full(len(channels), np.nan)
+        ticIndices = [i for i, channel in enumerate(channels) if channel.enabled and channel.active and channel._controller == channel.TIC and channel.id < len(self.TICgaugeID)]
+        if len(ticIndices) > 0 and self.ticInitialized:
+            # send queries for all gauges at once and receive all responses in one round trip
+            responses = self.TICQuery([self.TICgaugeID[channels[i].id] for i in ticIndices], lock_acquired=True)
+            pressures = self.parseTICPressures(responses)
+            self.pressures[ticIndices] = pressures
+            for i, response in zip(np.array(ticIndices)[np.isnan(pressures)], np.array(responses)[np.isnan(pressures)]):
+                self.print(f'Failed to parse pressure for {channels[i].name} from {response}.', PRINT.ERROR)
+        ids = np.array([channel.id if channel.enabled and channel.active and channel._controller == channel.TPG else 0 for channel in channels]) # 0 -> not read
+        if ids.any() and self.tpgInitialized:
+            msg = self.TPGWriteRead(message='PRX', lock_acquired=True) # status and pressure of all gauges in one round trip
+            try:
+                statuses, pressures = self.parsePRX(msg)
+            except ValueError as e:
+                self.print(f'Failed to parse pressures from {msg}: {e}', PRINT.ERROR)
+                return
+            read = (ids > 0) & (ids <= statuses.shape[0])
+            gauges = ids[read]-1
+            self.pressures[read] = np.where(statuses[gauges] == 0, pressures[gauges], np.nan) # set unit to mbar on device
+            for i in np.flatnonzero(read)[statuses[gauges] != 0]:
+                self.print(f'Could not read pressure for {channels[i].name}: {self.PRESSURE_READING_STATUS.get(statuses[ids[i]-1], "Unknown status")}.', PRINT.WARNING)
+
+    def parseTICPressures(self, responses):
+        """Parses responses like =V913 1.23e-05;59;11;0;0 and converts the pressure from Pa to mbar.
+
+        :param responses: Responses to pressure queries.
+        :type responses: list[str]
+        :return: Pressures in mbar. NaN for responses that cannot be parsed.
+        :rtype: numpy.array
+        """
+        responses = np.array(responses, dtype=str)
+        values = np.char.partition(np.char.partition(responses, ' ')[:, 2], ';')[:, 0] if responses.shape[0] > 0 else responses
+        pressures = np.full(responses.shape[0], np.nan)
+        valid = np.char.startswith(responses, '=V') # error responses start with *
+        try:
+            pressures[valid] = values[valid].astype(float)/100 # mbar = 0.01 Pa
+        except ValueError: # only parse individually if there are invalid values
+            for i in np.flatnonzero(valid):
+                try:
+                    pressures[i] = float(values[i])/100
+                except ValueError:
+                    pass
+        return pressures
+
+    def parsePRX(self, msg):
+        """Parses the response to PRX, e.g. 0,1.2340E-08,0,5.6780E-03,5,0.0000E+00,...
+
+        :param msg: Comma separated status and pressure of each gauge.
+        :type msg: str
+        :return: Status and pressure of each gauge.
+        :rtype: numpy.array, numpy.array
+        """
+        fields = np.array(msg.split(','))
+        if fields.shape[0] < 2 or fields.shape[0] % 2 != 0:
+            raise ValueError(f'Expected pairs of status and pressure, got {fields.shape[0]} values.')
+        return fields[::2].astype(int), fields[1::2].astype(float)
 
     def fakeNumbers(self):
         for i, pressure in enumerate(self.pressures):
@@ -201,6 +233,21 @@ class PressureController(DeviceController):
                 response = self.TICRead() # reads return value
         return response
 
+    def TICQuery(self, objectIDs, lock_acquired=False):
+        """Queries multiple objects in one message. The TIC answers each query with one line in order.
+
+        :param objectIDs: IDs of queried objects.
+        :type objectIDs: list[int]
+        :return: Responses in the order of objectIDs.
+        :rtype: list[str]
+        """
+        responses = ['']*len(objectIDs)
+        with self.ticLock.acquire_timeout(2, timeoutMessage=f'Cannot acquire lock to query {objectIDs}', lock_acquired=lock_acquired) as lock_acquired:
+            if lock_acquired:
+                self.serialWrite(self.ticPort, ''.join([f'?V{objectID}\r' for objectID in objectIDs]))
+                responses = [self.TICRead() for _ in objectIDs]
+        return responses
+
     def TPGWrite(self, message):
         self.serialWrite(self.tpgPort, f'{message}\r', encoding='ascii')
         self.serialRead(self.tpgPort, encoding='ascii') # read acknowledgment
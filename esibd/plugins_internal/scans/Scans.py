@@ -19,7 +19,7 @@ from PyQt6.QtWidgets import QSlider, QMessageBox
 from PyQt6.QtCore import QObject, Qt
 import numpy as np
 from esibd.core import (Parameter, INOUT, ControlCursor, parameterDict, DynamicNp, PluginManager, PRINT,
-    pyqtSignal, MetaChannel, colors, getDarkMode, dynamicImport, MultiState, MZCalculator, ScanChannel)
+    pyqtSignal, MetaChannel, colors, getDarkMode, dynamicImport, MultiState, MZCalculator, ScanChannel, PeriodicTimer)
 from esibd.plugins import Scan
 winsound = None
 if sys.platform == 'win32':
@@ -461,12 +461,12 @@ class Spectra(Beam):
                 if not waitLong and abs(_input.value-step[j]) > self.largestep:
                     waitLong=True
                 _input.updateValueSignal.emit(step[j])
-            time.sleep(((self.waitLong if waitLong else self.wait)+self.average)/1000) # if step is larger than threshold use longer wait time
+            window = self.dwell(self.waitLong if waitLong else self.wait) # if step is larger than threshold use longer wait time
             for j, output in enumerate(self.outputs):
                 # 2D scan
                 # definition updated to scan along x instead of y axis.
-                output.recordingData[i//len(self.inputs[0].getRecordingData()), i%len(self.inputs[0].getRecordingData())] = np.mean(output.getValues(
-                    subtractBackground=output.getDevice().subtractBackgroundActive(), length=self.measurementsPerStep))
+                output.recordingData[i//len(self.inputs[0].getRecordingData()), i%len(self.inputs[0].getRecordingData())] = self.getStepMean(output, window,
+                    subtractBackground=output.getDevice().subtractBackgroundActive())
             if i == len(steps)-1 or not recording(): # last step
                 for j, _input in enumerate(self.inputs):
                     _input.updateValueSignal.emit(_input.initialValue)
@@ -908,13 +908,13 @@ plt.show()
         if self.interactive:
             while recording():
                 # changing input is done in main thread using slider. Scan is only recording result.
-                time.sleep((self.wait+self.average)/1000) # if step is larger than threshold use longer wait time
+                window = self.dwell(self.wait)
                 if self.inputs[0].recording: # get average
-                    self.inputs[0].recordingData.add(np.mean(self.inputs[0].getValues(subtractBackground=self.inputs[0].subtractBackgroundActive(), length=self.measurementsPerStep)))
+                    self.inputs[0].recordingData.add(self.getStepMean(self.inputs[0], window, subtractBackground=self.inputs[0].subtractBackgroundActive()))
                 else: # use last value
                     self.inputs[0].recordingData.add(self.inputs[0].value)
                 for j, output in enumerate(self.outputs):
-                    self.outputs[j].recordingData.add(np.mean(output.getValues(subtractBackground=output.subtractBackgroundActive(), length=self.measurementsPerStep)))
+                    self.outputs[j].recordingData.add(self.getStepMean(output, window, subtractBackground=output.subtractBackgroundActive()))
                 if not recording(): # last step
                     self.signalComm.scanUpdateSignal.emit(True) # update graph and save data
                     self.signalComm.updateRecordingSignal.emit(False)
@@ -928,9 +928,9 @@ plt.show()
                 if not waitLong and abs(self.inputs[0].value-step) > self.largestep:
                     waitLong=True
                 self.inputs[0].updateValueSignal.emit(step)
-                time.sleep(((self.waitLong if waitLong else self.wait)+self.average)/1000) # if step is larger than threshold use longer wait time
+                window = self.dwell(self.waitLong if waitLong else self.wait) # if step is larger than threshold use longer wait time
                 for j, output in enumerate(self.outputs):
-                    output.recordingData[i] = np.mean(output.getValues(subtractBackground=output.getDevice().subtractBackgroundActive(), length=self.measurementsPerStep))
+                    output.recordingData[i] = self.getStepMean(output, window, subtractBackground=output.getDevice().subtractBackgroundActive())
                 if i == len(steps)-1 or not recording(): # last step
                     self.inputs[0].updateValueSignal.emit(self.inputs[0].initialValue)
                     time.sleep(.5) # allow time to reset to initial value before saving
@@ -1309,8 +1309,9 @@ plt.show()
         return tm
 
     def run(self, recording):
+        timer = PeriodicTimer(interval=lambda: self.interval, name=self.name)
         while recording():
-            time.sleep(self.interval/1000)
+            timer.wait()
             self.inputs[0].recordingData.add(time.time())
             for i, output in enumerate(self.outputs):
                 if output.isChargeChannel:
@@ -1498,8 +1499,8 @@ plt.show()
         self.outputs[1].recordingData.add(fitnessStart)
         while recording():
             self.gaSignalComm.updateValuesSignal.emit(-1, False)
-            time.sleep((self.wait+self.average)/1000)
-            self.ga.fitness(np.mean(self.outputs[0].getValues(subtractBackground=self.outputs[0].subtractBackgroundActive(), length=self.measurementsPerStep)))
+            window = self.dwell(self.wait)
+            self.ga.fitness(self.getStepMean(self.outputs[0], window, subtractBackground=self.outputs[0].subtractBackgroundActive()))
             if self.log:
                 self.print(self.ga.step_string().replace('GA: ',''))
             _, session_saved = self.ga.check_restart()
@@ -1,5 +1,4 @@
 # pylint: disable=[missing-module-docstring] # only single class in module
-import time
 from threading import Thread
 import serial
 import numpy as np
@@ -105,6 +104,8 @@ class TemperatureChannel(Channel):
 
 class TemperatureController(DeviceController):
 
+    useScheduler = True
+
     def __init__(self, _parent):
         super().__init__(_parent)
         self.messageBox = QMessageBox(QMessageBox.Icon.Information, 'Water cooling!', 'Water cooling!', buttons=QMessageBox.StandardButton.Ok)
@@ -143,13 +144,9 @@ class TemperatureController(DeviceController):
         if self.device.isOn():
             self.cryoON()
 
-    def runAcquisition(self, acquiring):
-        while acquiring():
-            with self.lock.acquire_timeout(1) as lock_acquired:
-                if lock_acquired:
-                    self.fakeNumbers() if getTestMode() else self.readNumbers()
-                    self.signalComm.updateValueSignal.emit()
-            time.sleep(self.device.interval/1000)
+    def readValues(self):
+        self.fakeNumbers() if getTestMode() else self.readNumbers()
+        self.publishValues(self.temperatures) # update all channels in one step
 
     toggleCounter = 0
     def readNumbers(self):
@@ -183,10 +180,6 @@ class TemperatureController(DeviceController):
     def rndTemperature(self):
         return np.random.uniform(0, 400)
 
-    def updateValue(self):
-        for channel, temperature in zip(self.device.getChannels(), self.temperatures):
-            channel.monitor = temperature
-
     def cryoON(self):
         if not getTestMode() and self.initialized:
             if self.device.isOn():
@@ -0,0 +1,11 @@
+"""Simulators that serve the protocols of the hardware supported by the internal plugins over pseudo terminals and localhost sockets.
+They allow to test and benchmark the real controllers, including parsing and timeouts, without hardware.
+Start all simulators using ``python -m esibd.simulators`` and configure the devices to use the printed ports and addresses.
+National Instruments DAQ hardware is simulated by replacing nidaqmx.Task with :class:`~esibd.simulators.daq.MockTask`."""
+
+from esibd.simulators.endpoints import Simulator, PtyEndpoint, SocketEndpoint
+from esibd.simulators.devices import RBD9103Simulator, TPGSimulator, TICSimulator, ISEGSimulator, MIPSSimulator, RSPD3303CSimulator
+from esibd.simulators.daq import MockTask
+
+__all__ = ['Simulator', 'PtyEndpoint', 'SocketEndpoint', 'RBD9103Simulator', 'TPGSimulator', 'TICSimulator', 'ISEGSimulator', 'MIPSSimulator',
+           'RSPD3303CSimulator', 'MockTask']
@@ -0,0 +1,32 @@
+"""Starts simulators for all supported devices and prints their ports and addresses."""
+
+import time
+import argparse
+from esibd.simulators import (PtyEndpoint, SocketEndpoint, RBD9103Simulator, TPGSimulator, TICSimulator, ISEGSimulator,
+                              MIPSSimulator, RSPD3303CSimulator)
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulates hardware supported by the internal plugins.')
+    parser.add_argument('--latency', type=float, default=0, help='Delay of responses in s.')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of responses that are dropped or corrupted.')
+    parser.add_argument('--rbd', type=int, default=1, help='Number of simulated picoammeters.')
+    args = parser.parse_args()
+    options = {'latency': args.latency, 'errorRate': args.error_rate}
+    endpoints = [PtyEndpoint(RBD9103Simulator(**options)).start() for _ in range(args.rbd)]
+    endpoints += [PtyEndpoint(TPGSimulator(**options)).start(), PtyEndpoint(TICSimulator(**options)).start(),
+                  PtyEndpoint(MIPSSimulator(**options)).start(),
+                  SocketEndpoint(ISEGSimulator(**options)).start(), SocketEndpoint(RSPD3303CSimulator(**options)).start()]
+    for endpoint in endpoints:
+        if isinstance(endpoint, PtyEndpoint):
+            print(f'{endpoint.simulator.name:12s} {endpoint.port}')
+        else:
+            print(f'{endpoint.simulator.name:12s} {endpoint.host}:{endpoint.port}')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        for endpoint in endpoints:
+            endpoint.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Mock of the subset of nidaqmx used by the NI9263 plugin to test analog outputs without National Instruments hardware or drivers."""
+
+import time
+from threading import Lock
+import numpy as np
+
+class MockAOChannelCollection():
+    """Analog output channels of a :class:`~esibd.simulators.daq.MockTask`."""
+
+    def __init__(self):
+        self.channels = [] # (physical channel, min_val, max_val)
+
+    def add_ao_voltage_chan(self, physical_channel, name_to_assign_to_channel='', min_val=-10.0, max_val=10.0, **kwargs): # pylint: disable = unused-argument # same signature as nidaqmx
+        self.channels.append((physical_channel, min_val, max_val))
+
+    @property
+    def channel_names(self):
+        return [physical_channel for physical_channel, _, _ in self.channels]
+
+    def __len__(self):
+        return len(self.channels)
+
+class MockTask():
+    """Replaces nidaqmx.Task for on demand analog output.
+    Written values are stored per physical channel in :attr:`~esibd.simulators.daq.MockTask.outputs`, which is shared by all tasks like the real hardware."""
+
+    outputs = {}
+    """Last value written to every physical channel."""
+    outputsLock = Lock()
+    creationTime = 0.02
+    """Time in s needed to create a task, similar to real tasks."""
+
+    def __init__(self, new_task_name=''):
+        time.sleep(self.creationTime)
+        self.name = new_task_name
+        self.ao_channels = MockAOChannelCollection()
+        self.writes = 0 # number of write calls
+        self.closed = False
+
+    def write(self, data, auto_start=True, timeout=10.0): # pylint: disable = unused-argument # same signature as nidaqmx
+        """Writes a single sample to every channel of the task.
+
+        :param data: A single value if the task has one channel, one value per channel otherwise.
+        :type data: float | list | numpy.array
+        :return: Number of samples written per channel.
+        :rtype: int
+        """
+        if self.closed:
+            raise RuntimeError(f'Task {self.name} has been closed.')
+        values = np.atleast_1d(np.asarray(data, dtype=np.float64))
+        if values.shape[0] != len(self.ao_channels):
+            raise ValueError(f'Got {values.shape[0]} values for {len(self.ao_channels)} channels.')
+        for value, (physical_channel, min_val, max_val) in zip(values, self.ao_channels.channels):
+            if not min_val <= value <= max_val:
+                raise ValueError(f'{value} V is outside of range {min_val} V to {max_val} V of {physical_channel}.')
+        with self.outputsLock:
+            self.outputs.update(zip(self.ao_channels.channel_names, values.tolist()))
+        self.writes += 1
+        return 1
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
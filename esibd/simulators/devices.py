@@ -0,0 +1,212 @@
+"""Protocols of the simulated devices. Only commands used by the internal plugins are implemented."""
+
+import re
+import time
+import numpy as np
+from esibd.simulators.endpoints import Simulator
+
+class RBD9103Simulator(Simulator):
+    """RBD Instruments 9103 picoammeter. Streams samples after the sample interval has been set using I{interval}."""
+
+    name = 'RBD 9103'
+    RANGES = ['AutoR', '2nA', '20nA', '200nA', '2uA', '20uA', '200uA', '2mA']
+
+    def __init__(self, current=10, **kwargs):
+        """
+        :param current: Mean simulated current in pA, defaults to 10
+        :type current: float, optional
+        """
+        super().__init__(**kwargs)
+        self.current = current
+        self.range = 0
+        self.filter = 0
+        self.bias = False
+        self.interval = 0 # ms, 0 -> not sampling
+        self.nextSample = 0
+        self.pid = 'SIMSMURF'
+
+    def handle(self, command):
+        command = command.strip().lstrip('&')
+        match command[:1]:
+            case 'P':
+                return [f'P, PID={self.pid}']
+            case 'R':
+                self.range = int(command[1:])
+                return [f'R, Range={self.RANGES[self.range]}']
+            case 'F':
+                self.filter = int(command[1:])
+                return [f'F, Filter={self.filter:03d}']
+            case 'B':
+                self.bias = command[1:] == '1'
+                return [f"B, BIAS={'ON' if self.bias else 'OFF'}"]
+            case 'G':
+                return ['G, AutoGrounding=DISABLED']
+            case 'I':
+                self.interval = int(command[1:])
+                self.nextSample = time.monotonic()
+                return [f'I, sample Interval={self.interval:04d} mSec']
+            case 'Q':
+                return ['RBD Instruments: PicoAmmeter', 'Firmware Version: 02.09', 'Build: 1-25-18', f'R, Range={self.RANGES[self.range]}',
+                        f'I, sample Interval={self.interval:04d} mSec', 'L, Chart Log Update Interval=0200 mSec', f'F, Filter={self.filter:03d}',
+                        f"B, BIAS={'ON' if self.bias else 'OFF'}", 'V, FormatLen=5', 'G, AutoGrounding=DISABLED', 'Q, State=MEASURE',
+                        f'P, PID={self.pid}', f'P, PID={self.pid}']
+        return []
+
+    def sample(self):
+        return f'&S,Range={self.RANGES[self.range]},{self.current*(1 + np.sin(time.time()/5)/10) + self.random.gauss(0, self.current/100):+.4f},pA'
+
+    def poll(self):
+        samples = []
+        if self.interval > 0:
+            now = time.monotonic()
+            while self.nextSample <= now:
+                samples.append(self.sample())
+                self.nextSample += self.interval/1000
+        return samples
+
+class TPGSimulator(Simulator):
+    """Pfeiffer MaxiGauge TPG 366. Mnemonics are acknowledged and the data is sent after an enquiry."""
+
+    name = 'MaxiGauge'
+    terminators = b'\r\n'
+    encoding = 'ascii'
+    ACK = '\x06'
+    NAK = '\x15'
+    ENQ = '\x05'
+
+    def __init__(self, pressures=(1E-7, 1E-5, 1E-3, 1, 1000, 1E-9), **kwargs):
+        super().__init__(**kwargs)
+        self.pressures = list(pressures)
+        self.mnemonic = None
+
+    def handle(self, command):
+        if command == self.ENQ:
+            if self.mnemonic is None:
+                return [self.NAK]
+            mnemonic, self.mnemonic = self.mnemonic, None
+            if mnemonic == 'TID':
+                return ['TPR,IKR,PKR,APR,CMR,noSen', self.NAK]
+            if mnemonic == 'PRX':
+                return [','.join([f'0,{pressure*self.random.uniform(.99, 1.01):.4E}' for pressure in self.pressures]), self.NAK]
+            if re.fullmatch(r'PR[1-6]', mnemonic):
+                pressure = self.pressures[int(mnemonic[2])-1]
+                return [f'0,{pressure*self.random.uniform(.99, 1.01):.4E}', self.NAK]
+            return [self.NAK]
+        self.mnemonic = command.strip()
+        return [self.ACK]
+
+class TICSimulator(Simulator):
+    """Edwards TIC instrument controller. Pressures are returned in Pa."""
+
+    name = 'TIC'
+    terminators = b'\r'
+    EOL = '\r'
+
+    def __init__(self, pressures=(1E-5, 1E-3, 1, 100, 1E5, 1E-7), **kwargs):
+        super().__init__(**kwargs)
+        self.gauges = dict(zip([913, 914, 915, 934, 935, 936], pressures))
+
+    def handle(self, command):
+        match = re.fullmatch(r'\?V(\d+)', command.strip())
+        if match is None:
+            return ['*C0 4'] # invalid command
+        _id = int(match.group(1))
+        if _id == 902:
+            return ['=V902 0;0;0;0;0;0;0;0;0;0']
+        if _id in self.gauges:
+            return [f'=V{_id} {self.gauges[_id]*self.random.uniform(.99, 1.01):.2e};59;11;0;0']
+        return [f'*V{_id} 5'] # no such object
+
+class ISEGSimulator(Simulator):
+    """iseg high voltage modules controlled via SCPI over a network socket."""
+
+    name = 'ISEG'
+
+    def __init__(self, modules=1, channels=16, **kwargs):
+        super().__init__(**kwargs)
+        self.setVoltages = np.zeros((modules, channels))
+        self.on = np.zeros((modules, channels), dtype=bool)
+
+    def parseChannels(self, selection):
+        """Returns module and channel indices from SCPI channel list like (#0@0-7) or (#0@3)."""
+        match = re.search(r'\(#(\d+)@(\d+)(?:-(\d+))?\)', selection)
+        module, first = int(match.group(1)), int(match.group(2))
+        last = int(match.group(3)) if match.group(3) is not None else first
+        return module, slice(first, min(last, self.setVoltages.shape[1]-1)+1)
+
+    def handle(self, command):
+        command = command.strip()
+        if command == '*IDN?':
+            return ['iseg Spezialelektronik GmbH,EHS 8 60n,0000000,5.00.000']
+        try:
+            if command.startswith(':MEAS:VOLT?'):
+                module, channels = self.parseChannels(command)
+                voltages = np.where(self.on[module, channels], self.setVoltages[module, channels], 0)
+                return [','.join([f'{voltage + self.random.gauss(0, .05):.5E}V' for voltage in voltages])]
+            if command.startswith(':VOLT'):
+                value, selection = command[len(':VOLT'):].strip().split(',', 1)
+                module, channels = self.parseChannels(selection)
+                if value in ['ON', 'OFF']:
+                    self.on[module, channels] = value == 'ON'
+                else:
+                    self.setVoltages[module, channels] = float(value)
+                return ['']
+        except (AttributeError, ValueError, IndexError):
+            pass
+        return ['ERROR']
+
+class MIPSSimulator(Simulator):
+    """GAA Custom Electronics MIPS with DC bias channels."""
+
+    name = 'MIPS'
+
+    def __init__(self, channels=8, **kwargs):
+        super().__init__(**kwargs)
+        self.voltages = np.zeros(channels+1) # channel IDs start at 1
+
+    def handle(self, command):
+        parts = command.strip().split(',')
+        try:
+            if parts[0] == 'GDCBV':
+                return [f'{self.voltages[int(parts[1])] + self.random.gauss(0, .01):.2f}']
+            if parts[0] == 'SDCB':
+                self.voltages[int(parts[1])] = float(parts[2])
+                return ['\x06']
+        except (ValueError, IndexError):
+            pass
+        return ['\x15']
+
+class RSPD3303CSimulator(Simulator):
+    """Siglent SPD3303C power supply controlled via SCPI over a raw socket."""
+
+    name = 'RSPD3303C'
+    EOL = '\n'
+
+    def __init__(self, channels=3, load=1000, **kwargs):
+        """
+        :param load: Simulated load in Ohm used to calculate currents, defaults to 1000
+        :type load: float, optional
+        """
+        super().__init__(**kwargs)
+        self.load = load
+        self.voltages = np.zeros(channels+1) # channel IDs start at 1
+        self.on = np.zeros(channels+1, dtype=bool)
+
+    def handle(self, command):
+        command = command.strip()
+        if command == '*IDN?':
+            return ['Siglent Technologies,SPD3303C,SIM00001,1.01.01.02.05,V3.0']
+        match = re.fullmatch(r'CH(\d):VOLT ([-+\d.eE]+)', command)
+        if match is not None:
+            self.voltages[int(match.group(1))] = float(match.group(2))
+            return []
+        match = re.fullmatch(r'OUTPUT CH(\d),(ON|OFF)', command)
+        if match is not None:
+            self.on[int(match.group(1))] = match.group(2) == 'ON'
+            return []
+        match = re.fullmatch(r'MEAS:(VOLT|CURR)\? CH(\d)', command)
+        if match is not None:
+            channel = int(match.group(2))
+            voltage = self.voltages[channel] if self.on[channel] else 0
+            return [f'{voltage:.3f}' if match.group(1) == 'VOLT' else f'{voltage/self.load:.3f}']
+        return []
@@ -0,0 +1,178 @@
+"""Transport layer of the simulators: pseudo terminals for serial devices and TCP sockets for network devices."""
+
+import os
+import time
+import random
+import select
+import socket
+from threading import Thread
+
+class Simulator():
+    """Protocol of a simulated device. Converts received commands to responses.
+    Latency and error rate are applied to every response to test timeouts and error handling of controllers."""
+
+    name = 'Simulator'
+    terminators = b'\n'
+    """Characters that terminate a received command."""
+    EOL = '\r\n'
+    """Appended to every response."""
+    encoding = 'utf-8'
+
+    def __init__(self, latency=0, errorRate=0, seed=None):
+        """
+        :param latency: Delay of responses in s, defaults to 0
+        :type latency: float, optional
+        :param errorRate: Fraction of responses that are dropped or corrupted, defaults to 0
+        :type errorRate: float, optional
+        :param seed: Seed of the random number generator used for errors, defaults to None
+        :type seed: int, optional
+        """
+        self.latency = latency
+        self.errorRate = errorRate
+        self.random = random.Random(seed)
+        self.commands = 0 # number of commands received
+        self.errors = 0 # number of responses dropped or corrupted
+
+    def handle(self, command):
+        """Returns a list of responses to command. Overwrite with device specific protocol.
+
+        :param command: Received command without terminator.
+        :type command: str
+        :return: Responses without EOL.
+        :rtype: list[str]
+        """
+        return []
+
+    def poll(self):
+        """Returns messages that are sent without request, e.g. streamed data. Called regularly by the endpoint."""
+        return []
+
+    def respond(self, command):
+        """Returns the encoded responses to command including latency and errors."""
+        self.commands += 1
+        responses = self.handle(command)
+        if self.latency > 0 and len(responses) > 0:
+            time.sleep(self.latency)
+        return self.encode(responses)
+
+    def encode(self, responses):
+        data = b''
+        for response in responses:
+            if self.errorRate > 0 and self.random.random() < self.errorRate:
+                self.errors += 1
+                if self.random.random() < .5:
+                    continue # drop response to test timeouts
+                response = response[:self.random.randint(0, len(response))] + '#' # corrupt response to test parsing
+            data += (response + self.EOL).encode(self.encoding)
+        return data
+
+    def split(self, buffer):
+        """Splits buffer into complete commands and remaining bytes."""
+        commands = []
+        start = 0
+        for i, char in enumerate(buffer):
+            if char in self.terminators:
+                commands.append(buffer[start:i].decode(self.encoding, errors='replace'))
+                start = i + 1
+        return [command for command in commands if command != ''], buffer[start:]
+
+class PtyEndpoint():
+    """Serves a :class:`~esibd.simulators.endpoints.Simulator` on a pseudo terminal. Use :attr:`port` as serial port of the device (Linux only)."""
+
+    def __init__(self, simulator, pollInterval=0.01):
+        import tty # pylint: disable = import-outside-toplevel # not available on Windows, keep other simulators importable
+        self.simulator = simulator
+        self.pollInterval = pollInterval
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.master)
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = Thread(target=self.run, name=f'{self.simulator.name} simulator')
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def run(self):
+        buffer = b''
+        while self.running:
+            readable, _, _ = select.select([self.master], [], [], self.pollInterval)
+            if readable:
+                buffer += os.read(self.master, 4096)
+                commands, buffer = self.simulator.split(buffer)
+                for command in commands:
+                    self.write(self.simulator.respond(command))
+            self.write(self.simulator.encode(self.simulator.poll()))
+
+    def write(self, data):
+        if data:
+            os.write(self.master, data)
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+        os.close(self.master)
+        os.close(self.slave)
+
+class SocketEndpoint():
+    """Serves a :class:`~esibd.simulators.endpoints.Simulator` on a localhost TCP socket. Every client is served in its own thread."""
+
+    def __init__(self, simulator, host='127.0.0.1', port=0):
+        """
+        :param port: TCP port, defaults to 0 (any free port)
+        :type port: int, optional
+        """
+        self.simulator = simulator
+        self.server = socket.create_server((host, port))
+        self.host, self.port = self.server.getsockname()[:2]
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = Thread(target=self.run, name=f'{self.simulator.name} simulator')
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def run(self):
+        self.server.settimeout(.2)
+        while self.running:
+            try:
+                connection, _ = self.server.accept()
+            except (socket.timeout, OSError):
+                continue
+            thread = Thread(target=self.serve, args=(connection,), name=f'{self.simulator.name} client')
+            thread.daemon = True
+            thread.start()
+
+    def serve(self, connection):
+        buffer = b''
+        connection.settimeout(.2)
+        with connection:
+            while self.running:
+                try:
+                    data = connection.recv(4096)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    return
+                if not data:
+                    return # client closed connection
+                buffer += data
+                commands, buffer = self.simulator.split(buffer)
+                for command in commands:
+                    response = self.simulator.respond(command)
+                    if response:
+                        connection.sendall(response)
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+        self.server.close()
@@ -0,0 +1,83 @@
+"""Tests for the NI9263 controller using :class:`~esibd.simulators.daq.MockTask` instead of nidaqmx.Task."""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+core = pytest.importorskip('esibd.core', exc_type=ImportError)
+NI9263 = pytest.importorskip('esibd.plugins_internal.NI9263.NI9263', exc_type=ImportError)
+from esibd.simulators import MockTask # noqa: E402
+
+class ChannelStandIn():
+    """Provides the attributes of a :class:`~esibd.core.Channel` used by the controller. Hashable like channels."""
+
+    def __init__(self, address, value, enabled=True, real=True):
+        self.name = address
+        self.address = address
+        self.value = value
+        self.enabled = enabled
+        self.real = real
+
+class ControllerStandIn():
+    """Uses the methods of the NI9263 controller without a device or user interface."""
+
+    name = 'NI9263'
+    createTask = NI9263.VoltageController.createTask
+    applySetpoints = NI9263.VoltageController.applySetpoints
+
+    def __init__(self, channels):
+        self.on = True
+        self.device = SimpleNamespace(channels=channels, isOn=lambda: self.on)
+        self.errorCount = 0
+        self.messages = []
+        self.lock = core.TimeoutLock(_parent=self)
+        self.task = None
+        self.taskIndices = {}
+        self.taskValues = None
+
+    def print(self, message, flag=None):
+        self.messages.append(message)
+
+@pytest.fixture
+def controller(monkeypatch):
+    monkeypatch.setattr(NI9263, 'getTestMode', lambda: True) # use MockTask
+    monkeypatch.setattr(MockTask, 'outputs', {})
+    channels = [ChannelStandIn(f'cDAQ1Mod1/ao{i}', value=i + 1.5) for i in range(4)] + [ChannelStandIn('virtual', value=5, real=False)]
+    controller = ControllerStandIn(channels)
+    controller.task = controller.createTask()
+    writes = []
+    write = controller.task.write
+    def recordWrite(data, **kwargs):
+        writes.append(np.array(data, dtype=float))
+        return write(data, **kwargs)
+    controller.task.write = recordWrite
+    controller.writes = writes
+    return controller
+
+def test_single_write_with_full_vector(controller):
+    channels = controller.device.channels
+    assert isinstance(controller.task, MockTask)
+    assert controller.task.ao_channels.channel_names == [channel.address for channel in channels if channel.real]
+    controller.applySetpoints(channels[:4])
+    assert len(controller.writes) == 1 # one write for all channels
+    np.testing.assert_array_equal(controller.writes[0], [1.5, 2.5, 3.5, 4.5])
+    assert MockTask.outputs == {f'cDAQ1Mod1/ao{i}': i + 1.5 for i in range(4)}
+
+def test_unchanged_channels_keep_values(controller):
+    channels = controller.device.channels
+    controller.applySetpoints(channels[:4])
+    channels[2].value = -3
+    channels[3].enabled = False
+    controller.applySetpoints(channels[2:4]) # only changed channels are passed
+    assert len(controller.writes) == 2
+    np.testing.assert_array_equal(controller.writes[1], [1.5, 2.5, -3, 0]) # task always writes all of its channels
+    controller.on = False
+    controller.applySetpoints(channels[:1])
+    np.testing.assert_array_equal(controller.writes[2], [0, 2.5, -3, 0])
+    assert controller.messages == []
+
+def test_channel_added_after_initialization(controller):
+    controller.applySetpoints([ChannelStandIn('cDAQ1Mod1/ao4', value=1)])
+    assert len(controller.writes) == 1
+    np.testing.assert_array_equal(controller.writes[0], [0, 0, 0, 0])
+    assert any('Reinitialize' in message for message in controller.messages)
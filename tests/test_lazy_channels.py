@@ -0,0 +1,83 @@
+"""Tests for on-demand creation of channel widgets, see :attr:`~esibd.plugins.ChannelManager.lazyWidgets`."""
+import os
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+QtGui = pytest.importorskip('PyQt6.QtGui', exc_type=ImportError)
+QtWidgets = pytest.importorskip('PyQt6.QtWidgets', exc_type=ImportError)
+core = pytest.importorskip('esibd.core', exc_type=ImportError)
+
+class LazyDevice:
+    """Provides the parts of a :class:`~esibd.plugins.ChannelManager` used by :class:`~esibd.core.Channel` while loading."""
+    name = 'Lazy'
+    lazyWidgets = True
+
+    def __init__(self):
+        self._loading = 0
+
+    @property
+    def loading(self):
+        return self._loading != 0
+
+    @loading.setter
+    def loading(self, loading):
+        if loading:
+            self._loading +=1
+        else:
+            self._loading -= 1
+
+    def print(self, message, flag=None):
+        pass
+
+    def makeCoreIcon(self, file, desaturate=False):
+        return QtGui.QIcon()
+
+    def channelSelection(self, selectedChannel):
+        pass
+
+@pytest.fixture(scope='module')
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+def loadChannels(device, tree, n):
+    """Mimics :meth:`~esibd.plugins.ChannelManager.loadConfiguration`."""
+    channels = []
+    device.loading = True
+    for i in range(n):
+        channel = core.Channel(device=device, tree=tree)
+        tree.addTopLevelItem(channel)
+        channel.initGUI({core.Channel.NAME : f'{device.name}{i+1}'})
+        channels.append(channel)
+    for channel in channels:
+        channel.collapseChanged(toggle=False)
+        channel.updateWarningState(True)
+    device.loading = False
+    return channels
+
+def test_load_keeps_channels_lazy(app):
+    device = LazyDevice()
+    tree = QtWidgets.QTreeWidget()
+    channels = loadChannels(device, tree, 500)
+    assert not device.loading
+    assert not any(channel.realized for channel in channels)
+    assert all(channel.warningState for channel in channels)
+
+def test_realize_on_access(app):
+    device = LazyDevice()
+    tree = QtWidgets.QTreeWidget()
+    channels = loadChannels(device, tree, 10)
+    channels[3].getParameterByName(core.Channel.COLLAPSE).getWidget()
+    assert channels[3].realized
+    assert [channel.realized for channel in channels].count(True) == 1
+
+def test_realize_restores_loading(app):
+    device = LazyDevice()
+    tree = QtWidgets.QTreeWidget()
+    channel = loadChannels(device, tree, 1)[0]
+    device.loading = True
+    channel.realize()
+    assert device.loading # caller is still loading
+    device.loading = False
+    assert not device.loading
+    assert device._loading == 0
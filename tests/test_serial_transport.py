@@ -0,0 +1,115 @@
+"""Tests for :class:`~esibd.core.SerialConnection` using simulated devices on pseudo terminals."""
+import sys
+import time
+
+import pytest
+
+if sys.platform == 'win32':
+    pytest.skip('Pseudo terminals are not available on Windows.', allow_module_level=True)
+serial = pytest.importorskip('serial')
+core = pytest.importorskip('esibd.core', exc_type=ImportError)
+from esibd.simulators import PtyEndpoint, Simulator, RBD9103Simulator, TICSimulator # noqa: E402
+
+class EchoSimulator(Simulator):
+    """Responds to command,n with n numbered lines, defaults to one line."""
+
+    name = 'Echo'
+
+    def handle(self, command):
+        lines = int(command.split(',')[1]) if ',' in command else 1
+        return [f'{command.split(",")[0]} {i}' for i in range(lines)]
+
+@pytest.fixture
+def transport():
+    transport = core.SerialTransport()
+    yield transport
+    transport.shutdown()
+
+def openEndpoint(simulator):
+    endpoint = PtyEndpoint(simulator).start()
+    return endpoint, serial.Serial(endpoint.port, timeout=1)
+
+def test_query(transport):
+    endpoint, port = openEndpoint(TICSimulator(pressures=(1E-5, 1E-3, 1, 100, 1E5, 1E-7)))
+    try:
+        connection = transport.attach(port, EOL='\r')
+        assert connection.query('?V902\r') == ['=V902 0;0;0;0;0;0;0;0;0;0']
+        assert connection.query('?V999\r') == ['*V999 5']
+    finally:
+        transport.detach(port)
+        port.close()
+        endpoint.stop()
+
+def test_multi_line_response(transport):
+    endpoint, port = openEndpoint(RBD9103Simulator())
+    try:
+        connection = transport.attach(port, EOL='\r\n')
+        lines = connection.query('Q\n', responses=13)
+        assert len(lines) == 13
+        assert lines[0] == 'RBD Instruments: PicoAmmeter'
+        assert lines[-1] == 'P, PID=SIMSMURF'
+        assert connection.query('P\n') == ['P, PID=SIMSMURF'] # next query is aligned with its response
+    finally:
+        transport.detach(port)
+        port.close()
+        endpoint.stop()
+
+def test_multiple_queries_in_one_message(transport):
+    endpoint, port = openEndpoint(EchoSimulator())
+    try:
+        connection = transport.attach(port, EOL='\r\n')
+        assert connection.query('a\nb,2\nc\n', responses=4) == ['a 0', 'b 0', 'b 1', 'c 0']
+    finally:
+        transport.detach(port)
+        port.close()
+        endpoint.stop()
+
+def test_timeout(transport):
+    endpoint, port = openEndpoint(EchoSimulator(latency=.5))
+    try:
+        connection = transport.attach(port, EOL='\r\n')
+        start = time.monotonic()
+        assert connection.query('late\n', timeout=.1) == ['']
+        assert time.monotonic() - start < .4 # does not wait for late response
+        time.sleep(.6) # late response is received as unrequested line
+        assert connection.query('next\n', timeout=2) == ['next 0'] # late responses are not attributed to the next query
+        assert connection.query('partial,1\n', responses=2, timeout=1) == ['partial 0', ''] # missing lines are empty
+    finally:
+        transport.detach(port)
+        port.close()
+        endpoint.stop()
+
+def test_unrequested_lines(transport):
+    endpoint, port = openEndpoint(RBD9103Simulator())
+    try:
+        connection = transport.attach(port, EOL='\r\n')
+        connection.write('I0010\n') # starts streaming samples every 10 ms
+        time.sleep(.3)
+        lines = connection.readLines()
+        assert lines[0] == 'I, sample Interval=0010 mSec'
+        assert len(lines) > 10
+        assert all(line.startswith('&S,') for line in lines[1:])
+        connection.write('I0000\n')
+    finally:
+        transport.detach(port)
+        port.close()
+        endpoint.stop()
+
+def test_reconnect(transport):
+    endpoint, port = openEndpoint(TICSimulator())
+    try:
+        connection = transport.attach(port, EOL='\r')
+        assert connection.query('?V902\r') == ['=V902 0;0;0;0;0;0;0;0;0;0']
+        transport.detach(port)
+        port.close()
+        assert transport.getConnection(port) is None
+        port = serial.Serial(endpoint.port, timeout=1) # reinitialize communication
+        connection = transport.attach(port, EOL='\r')
+        assert transport.getConnection(port) is connection
+        assert connection.query('?V902\r') == ['=V902 0;0;0;0;0;0;0;0;0;0']
+        assert transport.attach(port, EOL='\r').query('?V902\r') == ['=V902 0;0;0;0;0;0;0;0;0;0'] # attaching again replaces connection
+        assert len(transport.connections) == 1
+    finally:
+        transport.detach(port)
+        port.close()
+        endpoint.stop()
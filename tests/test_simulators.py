@@ -0,0 +1,163 @@
+"""Round trips between the simulators in :mod:`esibd.simulators` and the communication and parsing code of the corresponding controllers."""
+import socket
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+serial = pytest.importorskip('serial')
+core = pytest.importorskip('esibd.core', exc_type=ImportError)
+MAXIGAUGE = pytest.importorskip('esibd.plugins_internal.MAXIGAUGE.MAXIGAUGE', exc_type=ImportError)
+TIC = pytest.importorskip('esibd.plugins_internal.TIC.TIC', exc_type=ImportError)
+ISEG = pytest.importorskip('esibd.plugins_internal.ISEG.ISEG', exc_type=ImportError)
+RBD = pytest.importorskip('esibd.plugins_internal.RBD.RBD', exc_type=ImportError)
+from esibd.simulators import PtyEndpoint, SocketEndpoint, TPGSimulator, TICSimulator, ISEGSimulator, RBD9103Simulator # noqa: E402
+
+ptyOnly = pytest.mark.skipif(sys.platform == 'win32', reason='Pseudo terminals are not available on Windows.')
+
+class ControllerStandIn():
+    """Provides the attributes used by the communication methods of a :class:`~esibd.core.DeviceController` without a device or user interface.
+    Subclasses use the methods of the controller under test."""
+
+    name = 'Simulated'
+    serialWrite = core.DeviceController.serialWrite
+    serialRead = core.DeviceController.serialRead
+    serialQuery = core.DeviceController.serialQuery
+    serialQueryLines = core.DeviceController.serialQueryLines
+    serialReadLines = core.DeviceController.serialReadLines
+
+    def __init__(self, transport=None, port=None, sampleInterval=10):
+        self.device = SimpleNamespace(name=self.name, sampleInterval=sampleInterval, pluginManager=SimpleNamespace(serialTransport=transport))
+        self.channel = SimpleNamespace(getDevice=lambda: self.device)
+        self.port = port
+        self.errorCount = 0
+        self.messages = []
+        self.lock = core.TimeoutLock(_parent=self)
+
+    def print(self, message, flag=None):
+        self.messages.append(message)
+
+class TPGController(ControllerStandIn):
+    TPGWrite = MAXIGAUGE.PressureController.TPGWrite
+    TPGRead = MAXIGAUGE.PressureController.TPGRead
+    TPGWriteRead = MAXIGAUGE.PressureController.TPGWriteRead
+    parsePRX = MAXIGAUGE.PressureController.parsePRX
+
+class TICController(ControllerStandIn):
+    TICWriteRead = TIC.PressureController.TICWriteRead
+    TICQuery = TIC.PressureController.TICQuery
+    parsePressures = TIC.PressureController.parsePressures
+
+class ISEGController(ControllerStandIn):
+    ISEGPipeline = ISEG.VoltageController.ISEGPipeline
+    drain = ISEG.VoltageController.drain
+    setpointCommands = ISEG.VoltageController.setpointCommands
+
+class RBDController(ControllerStandIn):
+    getSampleTimes = RBD.CurrentController.getSampleTimes
+    lastSampleTime = None
+
+@pytest.fixture
+def transport():
+    transport = core.SerialTransport()
+    yield transport
+    transport.shutdown()
+
+@pytest.fixture
+def serialDevice(transport):
+    """Returns a function that serves a simulator on a pseudo terminal and returns an open port attached to the transport."""
+    opened = []
+    def serve(simulator, **kwargs):
+        endpoint = PtyEndpoint(simulator).start()
+        port = serial.Serial(endpoint.port, timeout=1)
+        transport.attach(port, **kwargs)
+        opened.append((endpoint, port))
+        return port
+    yield serve
+    for endpoint, port in opened:
+        transport.detach(port)
+        port.close()
+        endpoint.stop()
+
+@ptyOnly
+def test_TPG_PRX(transport, serialDevice):
+    pressures = (1E-7, 1E-5, 1E-3, 1, 1000, 1E-9)
+    port = serialDevice(TPGSimulator(pressures=pressures), encoding='ascii', EOL='\r\n')
+    controller = TPGController(transport=transport, port=port)
+    assert controller.TPGWriteRead(message='TID') == 'TPR,IKR,PKR,APR,CMR,noSen'
+    statuses, values = controller.parsePRX(controller.TPGWriteRead(message='PRX'))
+    assert np.all(statuses == 0)
+    np.testing.assert_allclose(values, pressures, rtol=.02)
+    assert controller.messages == []
+
+@ptyOnly
+def test_TIC_V(transport, serialDevice):
+    pressures = (1E-5, 1E-3, 1, 100, 1E5, 1E-7) # Pa
+    port = serialDevice(TICSimulator(pressures=pressures), EOL='\r')
+    controller = TICController(transport=transport, port=port)
+    assert controller.TICWriteRead(message=902) == '=V902 0;0;0;0;0;0;0;0;0;0'
+    responses = controller.TICQuery([913, 914, 915, 934, 935, 936, 999])
+    assert all(response.startswith('=V') for response in responses[:-1])
+    assert responses[-1] == '*V999 5' # unknown object
+    values = controller.parsePressures(responses)
+    np.testing.assert_allclose(values[:-1], np.array(pressures)/100, rtol=.02) # mbar
+    assert np.isnan(values[-1])
+
+@pytest.fixture
+def ISEGDevice():
+    """Returns a function that serves a simulator on a localhost socket and returns a controller connected to it."""
+    opened = []
+    def serve(simulator, timeout=3):
+        endpoint = SocketEndpoint(simulator).start()
+        controller = ISEGController()
+        controller.socket = socket.create_connection(address=(endpoint.host, endpoint.port), timeout=timeout)
+        controller.framer = core.LineFramer(EOL='\n')
+        opened.append((endpoint, controller))
+        return controller
+    yield serve
+    for endpoint, controller in opened:
+        controller.socket.close()
+        endpoint.stop()
+
+def test_ISEG_pipeline(ISEGDevice):
+    controller = ISEGDevice(ISEGSimulator(modules=1, channels=8))
+    channels = [SimpleNamespace(value=10.0*i, enabled=i != 3, module=0, id=i) for i in range(8)]
+    assert controller.ISEGPipeline(controller.setpointCommands(channels) + [':VOLT ON,(#0@0-7)\r\n']) == ['']*9
+    response = controller.ISEGPipeline([':MEAS:VOLT? (#0@0-7)\r\n'])[0]
+    monitors = [float(x.strip().rstrip('V')) for x in response.split(',')] # as parsed in runAcquisition
+    np.testing.assert_allclose(monitors, [channel.value if channel.enabled else 0 for channel in channels], atol=.5)
+    assert controller.ISEGPipeline(['*IDN?\r\n', 'INVALID\r\n']) == ['iseg Spezialelektronik GmbH,EHS 8 60n,0000000,5.00.000', 'ERROR']
+    assert controller.messages == []
+
+def test_ISEG_pipeline_timeout(ISEGDevice):
+    controller = ISEGDevice(ISEGSimulator(modules=1, channels=8, latency=.3), timeout=.1)
+    assert controller.ISEGPipeline(['*IDN?\r\n']) == [''] # timeout
+    assert any('Discarded' in message for message in controller.messages) # late response has been drained
+    assert controller.ISEGPipeline(['*IDN?\r\n']) == ['iseg Spezialelektronik GmbH,EHS 8 60n,0000000,5.00.000'] # next pipeline is aligned
+
+@ptyOnly
+def test_RBD_burst(transport, serialDevice):
+    port = serialDevice(RBD9103Simulator(current=10), EOL='\r\n')
+    controller = RBDController(transport=transport, port=port, sampleInterval=10)
+    controller.serialWrite(port, 'I0010\n') # start streaming
+    bursts = []
+    for _ in range(3):
+        time.sleep(.2)
+        values, outOfRange, unstable = RBD.parseSamples(controller.serialReadLines(port)) # acknowledgment of I0010 is dropped
+        assert values.shape[0] > 5
+        assert not outOfRange.any() and not unstable.any()
+        np.testing.assert_allclose(values, 10, atol=2) # pA
+        bursts.append(controller.getSampleTimes(values.shape[0]))
+    controller.serialWrite(port, 'I0000\n')
+    times = np.hstack(bursts)
+    assert np.all(np.diff(times) > 0) # bursts do not overlap
+    assert times[-1] <= time.time()
+
+def test_RBD_burst_time_stamps():
+    controller = RBDController(sampleInterval=10)
+    first = controller.getSampleTimes(50) # spans 0.5 s before now
+    second = controller.getSampleTimes(50) # received immediately after, e.g. buffered by serial interface
+    assert np.all(np.diff(np.hstack([first, second])) > 0)
+    np.testing.assert_allclose(np.diff(first), .01, rtol=1E-3)